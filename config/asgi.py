@@ -3,6 +3,10 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Production runs this under gunicorn with the uvicorn worker class (see Procfile),
+so media streaming (config.range_media) never pins a worker per slow client.
+WebSocket scopes go to the chat gateway in freestyle.ws_chat.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -13,4 +17,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from freestyle import ws_chat  # noqa: E402  (needs the app registry loaded above)
+
+
+async def application(scope, receive, send):
+    # WebSocket chat (freestyle/ws_chat.py); everything else is Django
+    if scope["type"] == "websocket":
+        await ws_chat.application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
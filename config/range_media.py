@@ -1,95 +1,173 @@
 from __future__ import annotations
 
+import asyncio
 import mimetypes
-import os
 import re
+import time
 from pathlib import Path
-from typing import Iterator
+from typing import AsyncIterator, Iterator
 
 from django.conf import settings
-from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.views.decorators.http import require_GET
 
+from freestyle import metrics
+
 
 _CHUNK_SIZE = 8192
 _RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
 
 
-def _iter_file(path: Path, start: int, length: int) -> Iterator[bytes]:
+def _chunk_size() -> int:
+    return int(getattr(settings, "MEDIA_STREAM_CHUNK_SIZE", 0) or _CHUNK_SIZE)
+
+
+def _first_byte_ms(t0: float | None) -> float | None:
+    return (time.perf_counter() - t0) * 1000 if t0 is not None else None
+
+
+def _iter_file(path: Path, start: int, length: int, t0: float | None = None) -> Iterator[bytes]:
+    chunk_size = _chunk_size()
     with path.open("rb") as f:
         f.seek(start)
         remaining = length
         while remaining > 0:
-            chunk = f.read(min(_CHUNK_SIZE, remaining))
+            chunk = f.read(min(chunk_size, remaining))
             if not chunk:
                 break
             remaining -= len(chunk)
+            first_byte_ms, t0 = _first_byte_ms(t0), None
             yield chunk
+            if first_byte_ms is not None:
+                metrics.observe("media.first_byte_ms", first_byte_ms)
 
 
-@require_GET
-def media_serve(request, path: str):
-    """
-    Range-enabled MEDIA serving for local dev.
-    This prevents MP4 "restart every few seconds" when the player seeks to offset_seconds.
+async def _aiter_file(path: Path, start: int, length: int, t0: float | None = None) -> AsyncIterator[bytes]:
     """
-    media_root = Path(settings.MEDIA_ROOT)
-    full_path = (media_root / path).resolve()
-
-    # Prevent path traversal
-    if not str(full_path).startswith(str(media_root.resolve())):
-        raise Http404("Invalid path")
+    Async twin of _iter_file for ASGI.
 
-    if not full_path.exists() or not full_path.is_file():
-        raise Http404("Not found")
+    Every blocking read runs in the default thread pool, so the event loop
+    never waits on the disk. Backpressure comes for free: Django's ASGI handler
+    awaits send() for each chunk, and the server only lets send() return once
+    the socket buffer drains, so a slow client never makes us read ahead.
+    """
+    chunk_size = _chunk_size()
+    f = await asyncio.to_thread(path.open, "rb")
+    try:
+        remaining = length
+        offset = start
+        while remaining > 0:
+            chunk = await asyncio.to_thread(_pread, f, min(chunk_size, remaining), offset)
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            offset += len(chunk)
+            first_byte_ms, t0 = _first_byte_ms(t0), None
+            yield chunk
+            if first_byte_ms is not None:
+                await asyncio.to_thread(metrics.observe, "media.first_byte_ms", first_byte_ms)
+    finally:
+        await asyncio.to_thread(f.close)
 
-    size = full_path.stat().st_size
-    content_type, _ = mimetypes.guess_type(str(full_path))
-    content_type = content_type or "application/octet-stream"
 
-    range_header = request.headers.get("Range") or request.META.get("HTTP_RANGE")
+def _pread(f, size: int, offset: int) -> bytes:
+    f.seek(offset)
+    return f.read(size)
 
-    # No Range => normal response (but still advertise Accept-Ranges)
-    if not range_header:
-        resp = FileResponse(full_path.open("rb"), content_type=content_type)
-        resp["Content-Length"] = str(size)
-        resp["Accept-Ranges"] = "bytes"
-        return resp
 
-    m = _RANGE_RE.match(range_header.strip())
+def _parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """
+    Returns (start, end) inclusive, or None if the header should be ignored
+    (bad syntax => serve the full file). Raises ValueError when the range
+    can't be satisfied ("bytes=-", "bytes=-0", a start at or past EOF, any
+    range of an empty file), which the caller answers with 416.
+    """
+    m = _RANGE_RE.match((range_header or "").strip())
     if not m:
-        # Bad range => return full
-        resp = FileResponse(full_path.open("rb"), content_type=content_type)
-        resp["Content-Length"] = str(size)
-        resp["Accept-Ranges"] = "bytes"
-        return resp
+        return None
 
     start_s, end_s = m.groups()
 
-    # Parse start/end
     if start_s == "" and end_s == "":
-        return HttpResponse(status=416)
+        raise ValueError("empty range")
 
     if start_s == "":
         # bytes=-500  (last 500 bytes)
-        end = size - 1
         length = int(end_s)
-        start = max(0, size - length)
-    else:
-        start = int(start_s)
-        end = int(end_s) if end_s else size - 1
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable suffix range")
+        return max(0, size - length), size - 1
 
-    # Clamp
-    start = max(0, min(start, size - 1))
-    end = max(start, min(end, size - 1))
-    length = (end - start) + 1
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if start >= size:
+        raise ValueError("range starts past EOF")
+    if end < start:
+        return None  # invalid syntax: ignore the header
+    return start, min(end, size - 1)
 
+
+def file_range_response(request, full_path: Path) -> HttpResponse:
+    """
+    Build a (possibly 206) streaming response for a file on disk.
+
+    Under ASGI the body is an async iterator (thread-pool reads); under WSGI it
+    stays a plain generator. Handing a sync iterator to the ASGI handler would
+    make Django buffer the whole file in memory first.
+
+    Reads from the head of a file (a player joining an item, usually right
+    at a schedule boundary) record their time-to-first-byte in metrics.
+    """
+    t0 = time.perf_counter()
+    size = full_path.stat().st_size
+    content_type, _ = mimetypes.guess_type(str(full_path))
+    content_type = content_type or "application/octet-stream"
+
+    range_header = request.headers.get("Range") or request.META.get("HTTP_RANGE")
+
+    try:
+        rng = _parse_range(range_header, size) if range_header else None
+    except ValueError:
+        resp = HttpResponse(status=416)
+        resp["Content-Range"] = f"bytes */{size}"
+        return resp
+
+    if rng is None:
+        start, end, status = 0, size - 1, 200
+    else:
+        start, end = rng
+        status = 206
+    length = max(0, (end - start) + 1)
+
+    iterator = _aiter_file if isinstance(request, ASGIRequest) else _iter_file
     resp = StreamingHttpResponse(
-        _iter_file(full_path, start, length),
-        status=206,
+        iterator(full_path, start, length, t0 if start == 0 else None),
+        status=status,
         content_type=content_type,
     )
     resp["Content-Length"] = str(length)
-    resp["Content-Range"] = f"bytes {start}-{end}/{size}"
+    if status == 206:
+        resp["Content-Range"] = f"bytes {start}-{end}/{size}"
     resp["Accept-Ranges"] = "bytes"
     return resp
+
+
+@require_GET
+async def media_serve(request, path: str):
+    """
+    Range-enabled MEDIA serving.
+    This prevents MP4 "restart every few seconds" when the player seeks to offset_seconds.
+    """
+    media_root = Path(settings.MEDIA_ROOT)
+    full_path = (media_root / path).resolve()
+
+    # Prevent path traversal
+    if not str(full_path).startswith(str(media_root.resolve())):
+        raise Http404("Invalid path")
+
+    if not await asyncio.to_thread(full_path.is_file):
+        raise Http404("Not found")
+
+    # stat() can block on a cold disk too; keep it off the event loop
+    return await asyncio.to_thread(file_range_response, request, full_path)
@@ -75,6 +75,7 @@ INSTALLED_APPS = [
 # -------------------------
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "freestyle.polling.PollHintMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -107,6 +108,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
 
 # -------------------------
@@ -128,6 +130,21 @@ if database_url:
     )
 
 
+# -------------------------
+# Cache
+# -------------------------
+# Viewer counters, metrics and schedule invalidation all go through the cache,
+# so multi-worker deploys should point REDIS_URL at a shared Redis.
+redis_url = env("REDIS_URL")
+if redis_url:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": redis_url,
+        }
+    }
+
+
 # -------------------------
 # Password validation
 # -------------------------
@@ -171,6 +188,199 @@ MEDIA_ROOT = Path(env("MEDIA_ROOT", str(BASE_DIR / "media")))
 # On Render with a persistent disk, you likely want SERVE_MEDIA=1
 SERVE_MEDIA = env_bool("SERVE_MEDIA", "1" if DEBUG else "0")
 
+# Bytes per read when streaming media. Under ASGI each read is a thread-pool hop,
+# so bigger chunks = fewer hops; backpressure still caps what sits in memory.
+MEDIA_STREAM_CHUNK_SIZE = int(env("MEDIA_STREAM_CHUNK_SIZE", str(256 * 1024)))
+
+
+# -------------------------
+# Schedule / linear HLS
+# -------------------------
+# Compiled schedules are also invalidated by model signals; this TTL only
+# matters for edits made by another process with a per-process cache.
+SCHEDULE_CACHE_SECONDS = int(env("SCHEDULE_CACHE_SECONDS", "30"))
+
+# live.m3u8: cut segments on keyframes about this long, keep this many in the window
+HLS_SEGMENT_SECONDS = float(env("HLS_SEGMENT_SECONDS", "4"))
+HLS_WINDOW_SEGMENTS = int(env("HLS_WINDOW_SEGMENTS", "6"))
+
+# Page-cache warmer (manage.py prefetch_warmer): this long before an item airs,
+# hint its head, moov and first PREFETCH_SECONDS into the OS page cache.
+# It runs as its own process, so its prefetch.* metrics only reach
+# /metrics.json through a shared cache (REDIS_URL); without one they read
+# "unavailable".
+PREFETCH_LEAD_SECONDS = float(env("PREFETCH_LEAD_SECONDS", "30"))
+PREFETCH_ITEMS = int(env("PREFETCH_ITEMS", "2"))
+PREFETCH_SECONDS = float(env("PREFETCH_SECONDS", "10"))
+PREFETCH_HEAD_BYTES = int(env("PREFETCH_HEAD_BYTES", str(1024 * 1024)))
+
+# now.json "prefetch": each TV preloads the next item at a jittered moment in
+# the last NEXT_PRELOAD_WINDOW_SECONDS of the current one (but at least
+# NEXT_PRELOAD_MIN_LEAD_SECONDS before the boundary), then switches locally.
+# Keep PREFETCH_LEAD_SECONDS above the window so those reads hit warm pages.
+NEXT_PRELOAD_WINDOW_SECONDS = float(env("NEXT_PRELOAD_WINDOW_SECONDS", "20"))
+NEXT_PRELOAD_MIN_LEAD_SECONDS = float(env("NEXT_PRELOAD_MIN_LEAD_SECONDS", "3"))
+
+
+# -------------------------
+# Presence / viewers
+# -------------------------
+# Pings are buffered per worker and upserted into Presence every
+# PRESENCE_FLUSH_SECONDS; a viewer counts as watching for PRESENCE_TTL_SECONDS.
+PRESENCE_TTL_SECONDS = int(env("PRESENCE_TTL_SECONDS", "30"))
+PRESENCE_FLUSH_SECONDS = float(env("PRESENCE_FLUSH_SECONDS", "5"))
+# Granularity of the sliding-window viewer counter (viewer_counter.py)
+VIEWER_BUCKET_SECONDS = int(env("VIEWER_BUCKET_SECONDS", "1"))
+
+# Unique viewers (audience.py): HLL sketches per minute/hour/day, p=12 is 4 KiB
+# per bucket at ~1.6% standard error. "hll" serves now.json viewers from them
+# (distinct sids over ~1-2 minutes) instead of the exact sliding window.
+VIEWER_COUNT_SOURCE = env("VIEWER_COUNT_SOURCE", "window")
+AUDIENCE_HLL_P = int(env("AUDIENCE_HLL_P", "12"))
+AUDIENCE_FLUSH_SECONDS = float(env("AUDIENCE_FLUSH_SECONDS", "10"))
+AUDIENCE_MINUTE_DAYS = float(env("AUDIENCE_MINUTE_DAYS", "2"))
+AUDIENCE_HOUR_DAYS = float(env("AUDIENCE_HOUR_DAYS", "60"))
+
+# Reaction totals (reactions.py): cached per (channel, video) this long; a
+# vote drops its entry, so this only bounds staleness across processes.
+REACTION_COUNTS_CACHE_SECONDS = float(env("REACTION_COUNTS_CACHE_SECONDS", "10"))
+# Votes are deduped in memory and written in batches every REACTION_FLUSH_MS
+# (or once REACTION_MAX_BATCH are waiting); 0 writes each vote inline.
+REACTION_FLUSH_MS = float(env("REACTION_FLUSH_MS", "250"))
+REACTION_MAX_BATCH = int(env("REACTION_MAX_BATCH", "2000"))
+# Per-second timelines (timeline.py): trust the player's position when it is
+# at most this far behind the schedule; peak = hottest window of this many s.
+REACTION_OFFSET_SLACK_SECONDS = float(env("REACTION_OFFSET_SLACK_SECONDS", "60"))
+REACTION_PEAK_WINDOW = int(env("REACTION_PEAK_WINDOW", "5"))
+# `voted` (vote_receipts.py): signed receipt cookie listing a client's newest
+# REACTION_RECEIPT_MAX votes, else a per-worker Bloom filter of voters for
+# the REACTION_BLOOM_VIDEOS most recently polled videos.
+REACTION_RECEIPT_COOKIE = env("REACTION_RECEIPT_COOKIE", "fs_votes")
+REACTION_RECEIPT_MAX = int(env("REACTION_RECEIPT_MAX", "200"))
+REACTION_RECEIPT_DAYS = float(env("REACTION_RECEIPT_DAYS", "30"))
+REACTION_BLOOM_VIDEOS = int(env("REACTION_BLOOM_VIDEOS", "256"))
+REACTION_BLOOM_REFRESH_SECONDS = float(env("REACTION_BLOOM_REFRESH_SECONDS", "5"))
+REACTION_BLOOM_ERROR_RATE = float(env("REACTION_BLOOM_ERROR_RATE", "0.01"))
+
+
+# -------------------------
+# Background worker (manage.py freestyle_worker)
+# -------------------------
+# Retire the oldest rotation entry (once it has aired) while a channel has more
+# than this many active entries; 0 disables.
+CHANNEL_MAX_ENTRIES = int(env("CHANNEL_MAX_ENTRIES", "0"))
+# Concurrent-viewer history (rollups.py) samples viewer counts this often.
+VIEWER_SAMPLE_SECONDS = float(env("VIEWER_SAMPLE_SECONDS", "5"))
+# Chat older than this (whole UTC days) moves out of the table into gzip JSONL
+# files, one per channel-day, under CHAT_ARCHIVE_DIR in default storage
+# (chat_archive.py). Channel.chat_retention_days overrides it; 0 keeps all.
+CHAT_RETENTION_DAYS = float(env("CHAT_RETENTION_DAYS", "30"))
+CHAT_ARCHIVE_DIR = env("CHAT_ARCHIVE_DIR", "chat-archive")
+
+
+# -------------------------
+# Chat long-polling (chat_notify.py)
+# -------------------------
+# messages.json?wait=N parks for at most this long (keep under proxy timeouts).
+CHAT_LONGPOLL_MAX_SECONDS = float(env("CHAT_LONGPOLL_MAX_SECONDS", "25"))
+# How often a parked request re-reads the shared latest-id key, which is how
+# messages sent through another worker reach it. Without REDIS_URL the key is
+# per-process, so one check per channel per worker re-reads Max(id) from the
+# database instead and wakes every request parked on that channel.
+CHAT_NOTIFY_CHECK_SECONDS = float(env("CHAT_NOTIFY_CHECK_SECONDS", "1"))
+# Recent messages each worker keeps per channel (chat_buffer.py); reads after
+# an id inside this window never touch the database.
+CHAT_BUFFER_SIZE = int(env("CHAT_BUFFER_SIZE", "500"))
+
+# chat_send queues messages (chat_ingest.py) and writes them with one
+# bulk_create every CHAT_INGEST_FLUSH_MS or CHAT_INGEST_MAX_BATCH messages;
+# 0 writes each message inline.
+CHAT_INGEST_FLUSH_MS = float(env("CHAT_INGEST_FLUSH_MS", "50"))
+CHAT_INGEST_MAX_BATCH = int(env("CHAT_INGEST_MAX_BATCH", "500"))
+# Directory for the crash-safe journal: every message is fsync'd there before
+# chat_send answers, and replayed if the process dies before its batch commits.
+CHAT_INGEST_JOURNAL = env("CHAT_INGEST_JOURNAL", "")
+
+
+# -------------------------
+# Write rate limits (freestyle/ratelimit.py)
+# -------------------------
+# GCRA per client id (X-Client-Id / sid) and, at RATE_LIMIT_IP_FACTOR times the
+# rate, per IP. "N/period": N requests per period, bursts of up to N.
+RATE_LIMIT_ENABLED = env_bool("RATE_LIMIT_ENABLED", "1")
+RATE_LIMITS = {
+    "chat_send": env("RATE_LIMIT_CHAT_SEND", "5/10s"),
+    "reaction_vote": env("RATE_LIMIT_REACTION_VOTE", "10/m"),
+    "save_duration": env("RATE_LIMIT_SAVE_DURATION", "10/m"),
+}
+RATE_LIMIT_IP_FACTOR = float(env("RATE_LIMIT_IP_FACTOR", "10"))
+# Share buckets across nodes through the cache (needs REDIS_URL to matter).
+RATE_LIMIT_SHARED = env_bool("RATE_LIMIT_SHARED", "1" if redis_url else "0")
+# Proxies in front of us that append to X-Forwarded-For (Render: 1).
+RATE_LIMIT_PROXY_HOPS = int(env("RATE_LIMIT_PROXY_HOPS", "0" if DEBUG else "1"))
+
+# -------------------------
+# WebSocket chat (freestyle/ws_chat.py)
+# -------------------------
+# How committed messages reach the hubs of all web workers (chat_broker.py):
+#   freestyle.chat_broker.LocalBroker       one process
+#   freestyle.chat_broker.UnixSocketBroker  several workers on one host
+#   freestyle.chat_broker.RedisBroker       several hosts (REDIS_URL)
+CHAT_BROKER = env(
+    "CHAT_BROKER",
+    "freestyle.chat_broker.RedisBroker" if redis_url else "freestyle.chat_broker.LocalBroker",
+)
+CHAT_BROKER_DIR = env("CHAT_BROKER_DIR", "")
+# Messages queued per socket before a stalled reader is disconnected.
+CHAT_WS_QUEUE = int(env("CHAT_WS_QUEUE", "256"))
+
+# -------------------------
+# Chat moderation (freestyle/moderation.py)
+# -------------------------
+# Banned terms: one per line in CHAT_BANNED_TERMS_FILE (# comments) plus the
+# comma-separated CHAT_BANNED_TERMS. "word" whole word, "word*" prefix,
+# "*word*" anywhere. The file is re-read when it changes.
+CHAT_BANNED_TERMS_FILE = env("CHAT_BANNED_TERMS_FILE", "")
+# (not split_csv: terms may contain spaces)
+CHAT_BANNED_TERMS = [t.strip() for t in env("CHAT_BANNED_TERMS", "").split(",") if t.strip()]
+# "reject" refuses the message, "mask" stars out the matched characters.
+CHAT_MODERATION_ACTION = env("CHAT_MODERATION_ACTION", "reject")
+CHAT_MODERATION_RELOAD_SECONDS = float(env("CHAT_MODERATION_RELOAD_SECONDS", "5"))
+
+
+# -------------------------
+# Poll hints (freestyle/polling.py)
+# -------------------------
+# TVs come back after the next_poll_ms the server hands out (tv.js adds up to 15% jitter).
+POLL_BASE_MS = int(env("POLL_BASE_MS", "2500"))
+POLL_MIN_MS = int(env("POLL_MIN_MS", "1000"))
+POLL_MAX_MS = int(env("POLL_MAX_MS", "15000"))
+# No chat for a minute slows polls; a busy room speeds up clients that poll for chat.
+POLL_QUIET_FACTOR = float(env("POLL_QUIET_FACTOR", "2.0"))
+POLL_BUSY_CHAT_PER_MINUTE = int(env("POLL_BUSY_CHAT_PER_MINUTE", "20"))
+POLL_BUSY_FACTOR = float(env("POLL_BUSY_FACTOR", "0.6"))
+# Back off in proportion above this worker's p95 / in-flight targets.
+POLL_LOAD_P95_MS = float(env("POLL_LOAD_P95_MS", "200"))
+POLL_LOAD_INFLIGHT = int(env("POLL_LOAD_INFLIGHT", "32"))
+POLL_LOAD_SAMPLES = int(env("POLL_LOAD_SAMPLES", "500"))
+POLL_MAX_BACKOFF = float(env("POLL_MAX_BACKOFF", "4.0"))
+# Polls due after a boundary land just past it, spread per sid over this window.
+POLL_BOUNDARY_SPREAD_MS = int(env("POLL_BOUNDARY_SPREAD_MS", "2500"))
+
+
+# -------------------------
+# Captions (freestyle/captions.py)
+# -------------------------
+# captions.json slices: default and largest window, browser cache lifetime
+# (slices revalidate by ETag), parsed videos kept per worker.
+CAPTIONS_WINDOW_SECONDS = int(env("CAPTIONS_WINDOW_SECONDS", "60"))
+CAPTIONS_MAX_WINDOW_SECONDS = int(env("CAPTIONS_MAX_WINDOW_SECONDS", "300"))
+CAPTIONS_MAX_AGE = int(env("CAPTIONS_MAX_AGE", "300"))
+CAPTIONS_CACHE_VIDEOS = int(env("CAPTIONS_CACHE_VIDEOS", "32"))
+# captions.vtt cues: at most this many words / seconds, split at longer pauses.
+CAPTIONS_VTT_CUE_WORDS = int(env("CAPTIONS_VTT_CUE_WORDS", "8"))
+CAPTIONS_VTT_CUE_SECONDS = float(env("CAPTIONS_VTT_CUE_SECONDS", "4"))
+CAPTIONS_VTT_GAP_SECONDS = float(env("CAPTIONS_VTT_GAP_SECONDS", "1"))
 
 # -------------------------
 # CSRF / proxy
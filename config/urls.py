@@ -3,8 +3,8 @@ from django.contrib import admin
 from django.urls import path, include, re_path
 from django.http import JsonResponse
 from django.conf import settings
-from django.conf.urls.static import static
-from django.views.static import serve as static_serve
+
+from config.range_media import media_serve
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -16,13 +16,10 @@ urlpatterns = [
     path("", include("freestyle.urls")),
 ]
 
-# DEV convenience
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-
-# Production: serve media only if explicitly enabled (Render disk)
-if getattr(settings, "SERVE_MEDIA", False):
+# Media: DEV convenience, or production if explicitly enabled (Render disk).
+# Range-aware + async so slow clients don't pin a worker under ASGI.
+if settings.DEBUG or getattr(settings, "SERVE_MEDIA", False):
     media_prefix = settings.MEDIA_URL.lstrip("/")
     urlpatterns += [
-        re_path(rf"^{media_prefix}(?P<path>.*)$", static_serve, {"document_root": settings.MEDIA_ROOT}),
+        re_path(rf"^{media_prefix}(?P<path>.*)$", media_serve),
     ]
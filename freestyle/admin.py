@@ -1,10 +1,24 @@
 from django.contrib import admin
-from .models import Channel, SponsorAd, FreestyleVideo, ChannelEntry, ChatMessage, Presence, VideoReaction
+from .models import (
+    Channel,
+    SponsorAd,
+    FreestyleVideo,
+    ChannelEntry,
+    ChatMessage,
+    Presence,
+    VideoReaction,
+    ReactionCounter,
+    ReactionTimeline,
+    VideoAiring,
+    ViewerRollup,
+    ViewerSketch,
+    WorkerLease,
+)
 
 
 @admin.register(Channel)
 class ChannelAdmin(admin.ModelAdmin):
-    list_display = ("id", "slug", "name", "is_default", "schedule_started_at")
+    list_display = ("id", "slug", "name", "is_default", "schedule_started_at", "chat_retention_days")
     list_editable = ("is_default",)
     search_fields = ("slug", "name")
 
@@ -45,8 +59,46 @@ class VideoReactionAdmin(admin.ModelAdmin):
     search_fields = ("client_id",)
 
 
+@admin.register(ReactionCounter)
+class ReactionCounterAdmin(admin.ModelAdmin):
+    list_display = ("id", "channel", "video", "fire", "nah", "updated_at")
+    list_filter = ("channel",)
+
+
+@admin.register(ReactionTimeline)
+class ReactionTimelineAdmin(admin.ModelAdmin):
+    list_display = ("id", "channel", "video", "seconds", "fire_total", "nah_total", "peak_fire", "peak_at", "updated_at")
+    list_filter = ("channel",)
+    exclude = ("fire", "nah")
+
+
 @admin.register(SponsorAd)
 class SponsorAdAdmin(admin.ModelAdmin):
     list_display = ("id", "is_active", "title")
     list_editable = ("is_active",)
     search_fields = ("title",)
+
+
+@admin.register(ViewerSketch)
+class ViewerSketchAdmin(admin.ModelAdmin):
+    list_display = ("id", "channel", "video", "resolution", "bucket_start", "updated_at")
+    list_filter = ("channel", "resolution")
+    exclude = ("registers",)
+
+
+@admin.register(WorkerLease)
+class WorkerLeaseAdmin(admin.ModelAdmin):
+    list_display = ("name", "owner", "expires_at", "last_run_at")
+
+
+@admin.register(ViewerRollup)
+class ViewerRollupAdmin(admin.ModelAdmin):
+    list_display = ("channel", "day", "day_peak", "day_avg", "minutes")
+    list_filter = ("channel",)
+    exclude = ("peak", "avg")
+
+
+@admin.register(VideoAiring)
+class VideoAiringAdmin(admin.ModelAdmin):
+    list_display = ("id", "channel", "video", "started_at", "ended_at", "peak_viewers", "avg_viewers", "unique_viewers")
+    list_filter = ("channel",)
@@ -3,14 +3,14 @@ from __future__ import annotations
 import json
 from urllib.parse import urlparse
 
-from django.db import IntegrityError
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
-from freestyle.models import Channel, ChannelEntry, FreestyleVideo, ChatMessage, VideoReaction
+from freestyle import reactions
+from freestyle.models import Channel, ChannelEntry, FreestyleVideo, ChatMessage
 
 
 def _json_ok(payload: dict, status: int = 200) -> JsonResponse:
@@ -163,8 +163,8 @@ def reactions_state(request, channel_slug: str) -> JsonResponse:
     except (TypeError, ValueError):
         return _json_err("Invalid video_id", status=400)
 
-    qs = VideoReaction.objects.filter(channel=channel, video_id=vid)
-    return _json_ok({"video_id": vid, "counts": {"fire": qs.filter(reaction="fire").count(), "nah": qs.filter(reaction="nah").count()}})
+    counts = reactions.counts(channel.id, vid)
+    return _json_ok({"video_id": vid, "counts": {"fire": counts["fire"], "nah": counts["nah"]}})
 
 
 @csrf_exempt
@@ -190,11 +190,9 @@ def reactions_vote(request, channel_slug: str) -> JsonResponse:
     get_object_or_404(FreestyleVideo, id=vid)
     cid = _client_id(request)
 
-    try:
-        VideoReaction.objects.create(channel=channel, video_id=vid, client_id=cid, reaction=reaction)
+    if reactions.record(channel.id, vid, cid, reaction):
         return _json_ok({"voted": True, "already_voted": False, "video_id": vid, "reaction": reaction})
-    except IntegrityError:
-        return _json_ok({"voted": False, "already_voted": True, "video_id": vid, "reaction": reaction})
+    return _json_ok({"voted": False, "already_voted": True, "video_id": vid, "reaction": reaction})
 
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
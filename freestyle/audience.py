@@ -0,0 +1,201 @@
+# freestyle/audience.py
+"""
+Approximate unique-viewer counts per channel and per video, from HLL sketches.
+
+Every ping adds the viewer's sid to per-worker HyperLogLog sketches keyed
+(channel, video|None, resolution, bucket) for minute, hour and day buckets;
+video is whatever the compiled schedule says is airing. Sketches are
+flushed into ViewerSketch rows by register-wise max, so workers and flushes
+merge without double counting, and any time range is answered by merging
+the stored buckets that cover it.
+
+Memory is constant per bucket (4 KiB at p=12) however large the audience,
+with a standard error of 1.04/sqrt(m) (see hll.py).
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .hll import HyperLogLog, hash64
+from .models import Channel, ViewerSketch
+from .schedule import compiled_schedule
+from .write_behind import WriteBehindBuffer
+
+
+RESOLUTIONS = {
+    ViewerSketch.MINUTE: 60,
+    ViewerSketch.HOUR: 3600,
+    ViewerSketch.DAY: 86400,
+}
+CONCURRENT_KEY = "freestyle:audience:concurrent:{}"
+
+
+def precision() -> int:
+    return int(getattr(settings, "AUDIENCE_HLL_P", 12))
+
+
+def _new_sketch() -> HyperLogLog:
+    return HyperLogLog(precision())
+
+
+def _bucket(epoch: float, resolution: str) -> int:
+    width = RESOLUTIONS[resolution]
+    return int(epoch) // width * width
+
+
+def _dt(epoch: int) -> datetime:
+    return datetime.fromtimestamp(epoch, tz=dt_timezone.utc)
+
+
+# -------------------------
+# Write path
+# -------------------------
+def _store(channel_id: int, video_id: int | None, resolution: str, bucket: int, sketch: HyperLogLog) -> None:
+    lookup = dict(channel_id=channel_id, video_id=video_id, resolution=resolution, bucket_start=_dt(bucket))
+    with transaction.atomic():
+        row = ViewerSketch.objects.select_for_update().filter(**lookup).first()
+        if row is None:
+            try:
+                with transaction.atomic():
+                    ViewerSketch.objects.create(registers=sketch.to_bytes(), **lookup)
+                return
+            except IntegrityError:
+                # another worker created it first: fall through and merge
+                row = ViewerSketch.objects.select_for_update().get(**lookup)
+        merged = HyperLogLog.from_bytes(row.registers).merge(sketch)
+        row.registers = merged.to_bytes()
+        row.save(update_fields=["registers", "updated_at"])
+
+
+def _flush(batch: dict[tuple, HyperLogLog]) -> None:
+    for (channel_id, video_id, resolution, bucket), sketch in batch.items():
+        _store(channel_id, video_id, resolution, bucket, sketch)
+
+
+_buffer = WriteBehindBuffer(
+    "audience",
+    _flush,
+    interval=lambda: float(getattr(settings, "AUDIENCE_FLUSH_SECONDS", 10)),
+    merge=lambda a, b: a.merge(b),
+)
+
+
+def record(channel: Channel, sid: str, now: float | None = None) -> None:
+    if not sid:
+        return
+    now = time.time() if now is None else now
+    slot = compiled_schedule(channel).at(now)
+    h = hash64(sid)
+
+    def add(sketch):
+        sketch.add_hash(h)
+
+    for resolution in RESOLUTIONS:
+        bucket = _bucket(now, resolution)
+        _buffer.update((channel.id, None, resolution, bucket), add, _new_sketch)
+        if slot:
+            _buffer.update((channel.id, slot.item.id, resolution, bucket), add, _new_sketch)
+
+
+def flush() -> int:
+    return _buffer.flush()
+
+
+# -------------------------
+# Read path
+# -------------------------
+def _resolution_for(span: float) -> str:
+    if span <= 2 * 3600:
+        return ViewerSketch.MINUTE
+    if span <= 3 * 86400:
+        return ViewerSketch.HOUR
+    return ViewerSketch.DAY
+
+
+def _merge_pending(sketch: HyperLogLog, match) -> None:
+    for key, pending in _buffer.pending().items():
+        if match(key):
+            sketch.merge(pending)
+
+
+def unique_viewers(channel_id: int, video_id: int | None = None, since: float | None = None, until: float | None = None) -> int:
+    """
+    Estimated distinct sids on a channel (or one video on it) in [since, until].
+
+    Buckets overlapping the range are merged whole, so the range is rounded
+    out to the chosen resolution (minutes up to 2h, hours up to 3 days, else days).
+    """
+    until = time.time() if until is None else until
+    since = until - 86400 if since is None else since
+    resolution = _resolution_for(until - since)
+    lo = _bucket(since, resolution)
+
+    sketch = _new_sketch()
+    rows = ViewerSketch.objects.filter(
+        channel_id=channel_id,
+        video_id=video_id,
+        resolution=resolution,
+        bucket_start__gte=_dt(lo),
+        bucket_start__lte=_dt(int(until)),
+    ).values_list("registers", flat=True)
+    for registers in rows:
+        sketch.merge(HyperLogLog.from_bytes(registers))
+
+    _merge_pending(sketch, lambda k: k[0] == channel_id and k[1] == video_id and k[2] == resolution and lo <= k[3] <= until)
+    return sketch.count()
+
+
+def concurrent_viewers(channel_id: int) -> int:
+    """
+    Distinct sids seen in the current and previous minute. Cached briefly:
+    this is what now.json reads when VIEWER_COUNT_SOURCE = "hll".
+    """
+    key = CONCURRENT_KEY.format(channel_id)
+    n = cache.get(key)
+    if n is None:
+        now = time.time()
+        n = unique_viewers(channel_id, since=now - 60, until=now)
+        cache.set(key, n, timeout=5)
+    return int(n)
+
+
+def unique_by_video(video_ids) -> dict[int, int]:
+    """All-time distinct viewers per video (merged day sketches, every channel)."""
+    video_ids = set(video_ids)
+    sketches: dict[int, HyperLogLog] = {}
+    rows = ViewerSketch.objects.filter(video_id__in=video_ids, resolution=ViewerSketch.DAY).values_list(
+        "video_id", "registers"
+    )
+    for video_id, registers in rows:
+        sketches.setdefault(video_id, _new_sketch()).merge(HyperLogLog.from_bytes(registers))
+    for (_, video_id, resolution, _), pending in _buffer.pending().items():
+        if resolution == ViewerSketch.DAY and video_id in video_ids:
+            sketches.setdefault(video_id, _new_sketch()).merge(pending)
+    return {video_id: s.count() for video_id, s in sketches.items()}
+
+
+def standard_error() -> float:
+    return _new_sketch().standard_error
+
+
+# -------------------------
+# Retention
+# -------------------------
+def prune(now=None) -> int:
+    """Drop minute sketches after AUDIENCE_MINUTE_DAYS and hour sketches after AUDIENCE_HOUR_DAYS."""
+    now = now or timezone.now()
+    deleted = 0
+    for resolution, setting, default in (
+        (ViewerSketch.MINUTE, "AUDIENCE_MINUTE_DAYS", 2),
+        (ViewerSketch.HOUR, "AUDIENCE_HOUR_DAYS", 60),
+    ):
+        cutoff = now - timedelta(days=float(getattr(settings, setting, default)))
+        n, _ = ViewerSketch.objects.filter(resolution=resolution, bucket_start__lt=cutoff).delete()
+        deleted += n
+    return deleted
@@ -0,0 +1,54 @@
+# freestyle/bloom.py
+"""
+Small Bloom filter for "has this client already voted?" (vote_receipts.py).
+
+m bits and k hash positions per item, sized for `capacity` items at
+false-positive rate p:
+
+    m = -capacity * ln(p) / ln(2)^2        k = m / capacity * ln(2)
+
+so ~9.6 bits per item at 1%. Positions come from one 128-bit blake2b
+digest by double hashing (h1 + i*h2). A miss is definite; a hit is right
+with probability 1-p while the filter holds at most `capacity` items, so
+callers confirm hits against the database and rebuild larger when full.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        ln2 = math.log(2)
+        self.m = max(64, math.ceil(-self.capacity * math.log(error_rate) / (ln2 * ln2)))
+        self.k = max(1, round(self.m / self.capacity * ln2))
+        self.bits = bytearray((self.m + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        m = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    def add(self, item: str) -> None:
+        bits = self.bits
+        for pos in self._positions(item):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
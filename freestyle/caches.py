@@ -0,0 +1,23 @@
+# freestyle/caches.py
+"""
+Whether the cache is shared between workers.
+
+Several modules use the cache as a cross-worker channel (chat_notify's
+latest-id key, presence counts, metrics). Under a per-process backend
+(Django's default LocMem) each worker only sees its own writes, so those
+modules check is_shared() and fall back to the database or say the numbers
+are unavailable.
+"""
+from __future__ import annotations
+
+from django.conf import settings
+
+
+PER_PROCESS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_shared(alias: str = "default") -> bool:
+    return settings.CACHES[alias]["BACKEND"] not in PER_PROCESS
@@ -0,0 +1,143 @@
+# freestyle/captions.py
+"""
+Word-level captions served a window at a time.
+
+generate_captions produces a list of {"w", "s", "e"} words (seconds). For a
+long video that is tens of thousands of objects, far more than a player
+needs at once. build() turns it into what VideoCaptions.data stores,
+parallel arrays sorted by start:
+
+    {"v": 1,
+     "text": "helloworld...",        every word concatenated
+     "offsets": [0, 5, 10, ...],     word i is text[offsets[i]:offsets[i+1]]
+     "start": [120, 480, ...],       ms
+     "end":   [450, 900, ...],       ms
+     "longest": 2300}                longest word (ms), bounds the bisect
+
+window() bisects `start` for the words overlapping [from, to): a word that
+overlaps `from` started at most `longest` ms before it. Each worker keeps
+the parsed arrays of its CAPTIONS_CACHE_VIDEOS most recent videos, keyed by
+VideoCaptions.updated_at, so a slice request costs one primary-key lookup
+query plus two bisects. The same version keys the slice's ETag, so a client
+re-fetching a window it has gets a 304 without the captions being loaded.
+"""
+from __future__ import annotations
+
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Iterable
+
+from django.conf import settings
+
+from .models import FreestyleVideo, VideoCaptions
+
+
+FORMAT = 1
+
+
+def build(words: Iterable) -> dict:
+    """VideoCaptions.data for generate_captions' words ({"w","s","e"} dicts or objects, seconds)."""
+    rows = []
+    for word in words:
+        get = word.get if isinstance(word, dict) else lambda k, _w=word: getattr(_w, k, None)
+        text = str(get("w") or "").strip()
+        if not text:
+            continue
+        s = max(0, round(float(get("s") or 0) * 1000))
+        e = max(s, round(float(get("e") or 0) * 1000))
+        rows.append((s, e, text))
+    rows.sort(key=lambda r: (r[0], r[1]))
+
+    offsets = [0]
+    for _, _, text in rows:
+        offsets.append(offsets[-1] + len(text))
+    return {
+        "v": FORMAT,
+        "text": "".join(text for _, _, text in rows),
+        "offsets": offsets,
+        "start": [s for s, _, _ in rows],
+        "end": [e for _, e, _ in rows],
+        "longest": max((e - s for s, e, _ in rows), default=0),
+    }
+
+
+class Index:
+    """Parsed VideoCaptions.data."""
+
+    def __init__(self, data: dict | None):
+        data = data or {}
+        self.text: str = data.get("text", "")
+        self.offsets = array("l", data.get("offsets") or [0])
+        self.start = array("l", data.get("start", ()))
+        self.end = array("l", data.get("end", ()))
+        self.longest: int = int(data.get("longest", 0))
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def word(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+    @property
+    def duration_ms(self) -> int:
+        return max(self.end, default=0)
+
+    def _bounds(self, from_ms: int, to_ms: int) -> tuple[int, int]:
+        hi = bisect_left(self.start, to_ms)
+        return bisect_left(self.start, from_ms - self.longest, 0, hi), hi
+
+    def window(self, from_ms: int, to_ms: int) -> list[int]:
+        """Indexes of the words overlapping [from_ms, to_ms)."""
+        lo, hi = self._bounds(from_ms, to_ms)
+        # words are sorted by start, not end: a short word after a long one can end first
+        return [i for i in range(lo, hi) if self.end[i] > from_ms]
+
+    def slice(self, from_ms: int, to_ms: int) -> dict:
+        """The window as captions.json returns it: {w, s, e} words (seconds) and where to continue."""
+        idx = self.window(from_ms, to_ms)
+        following = self._bounds(from_ms, to_ms)[1]
+        following = following if following < len(self) else None
+        return {
+            "words": [
+                {"w": self.word(i), "s": self.start[i] / 1000, "e": self.end[i] / 1000}
+                for i in idx
+            ],
+            "next": self.start[following] / 1000 if following is not None else None,
+        }
+
+
+# -------------------------
+# Per-worker cache
+# -------------------------
+_lock = threading.Lock()
+_indexes: OrderedDict[int, tuple[str, Index]] = OrderedDict()
+
+
+def version(video_id: int) -> str | None:
+    """Changes whenever the video's captions do; None for an unknown video."""
+    updated_at = VideoCaptions.objects.filter(video_id=video_id).values_list("updated_at", flat=True).first()
+    if updated_at is not None:
+        return f"{updated_at.timestamp():.6f}"
+    return "0" if FreestyleVideo.objects.filter(id=video_id).exists() else None
+
+
+def index(video_id: int, ver: str) -> Index:
+    with _lock:
+        hit = _indexes.get(video_id)
+        if hit and hit[0] == ver:
+            _indexes.move_to_end(video_id)
+            return hit[1]
+    data = VideoCaptions.objects.filter(video_id=video_id).values_list("data", flat=True).first()
+    idx = Index(data)
+    with _lock:
+        _indexes[video_id] = (ver, idx)
+        _indexes.move_to_end(video_id)
+        while len(_indexes) > int(getattr(settings, "CAPTIONS_CACHE_VIDEOS", 32)):
+            _indexes.popitem(last=False)
+    return idx
+
+
+def etag(video_id: int, ver: str, from_ms: int, to_ms: int) -> str:
+    return f'"cap-{video_id}-{ver}-{from_ms}-{to_ms}"'
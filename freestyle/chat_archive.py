@@ -0,0 +1,176 @@
+# freestyle/chat_archive.py
+"""
+Chat retention: old messages move out of ChatMessage into gzip'd JSONL
+files, one per channel per UTC day, so the hot table (and its
+channel/id index) only holds recent chat.
+
+Layout in default_storage:
+    <CHAT_ARCHIVE_DIR>/<channel_id>/<YYYY-MM-DD>.jsonl.gz
+    <CHAT_ARCHIVE_DIR>/<channel_id>/<YYYY-MM-DD>.<n>.jsonl.gz   later parts
+
+archive_channel() handles whole UTC days older than the channel's
+retention. Each day is streamed from the DB (iterator, ordered by id) into
+a gzip temp file. The file is saved, and only then are the archived rows
+deleted in small batches. If a day is archived again (a crash between save
+and delete, or late rows), a new part is written. Readers merge the parts
+and drop duplicate ids, and concatenated parts are still one valid gzip
+stream for the export endpoint.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import re
+import tempfile
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import Channel, ChatMessage
+
+
+FIELDS = ("id", "username", "message", "created_at", "seq")
+_PART = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:\.(\d+))?\.jsonl\.gz$")
+
+
+def root() -> str:
+    return getattr(settings, "CHAT_ARCHIVE_DIR", "chat-archive").strip("/")
+
+
+def retention_days(channel: Channel) -> float:
+    if channel.chat_retention_days is not None:
+        return float(channel.chat_retention_days)
+    return float(getattr(settings, "CHAT_RETENTION_DAYS", 30))
+
+
+def _day_start(d: date) -> datetime:
+    return datetime.combine(d, dt_time.min, tzinfo=dt_timezone.utc)
+
+
+def _dir(channel_id: int) -> str:
+    return f"{root()}/{channel_id}"
+
+
+# -------------------------
+# Listing
+# -------------------------
+def parts(channel_id: int) -> dict[date, list[str]]:
+    """{day: [storage names in part order]} for a channel."""
+    try:
+        _, files = default_storage.listdir(_dir(channel_id))
+    except FileNotFoundError:
+        return {}
+    out: dict[date, list[tuple[int, str]]] = {}
+    for name in files:
+        m = _PART.match(name)
+        if m:
+            day = date.fromisoformat(m[1])
+            out.setdefault(day, []).append((int(m[2] or 0), f"{_dir(channel_id)}/{name}"))
+    return {d: [n for _, n in sorted(v)] for d, v in sorted(out.items())}
+
+
+def days(channel_id: int) -> list[date]:
+    return list(parts(channel_id))
+
+
+# -------------------------
+# Writing
+# -------------------------
+def _line(row: dict) -> bytes:
+    row["created_at"] = row["created_at"].isoformat()
+    return json.dumps(row, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _part_name(channel_id: int, day: date) -> str:
+    existing = parts(channel_id).get(day, [])
+    suffix = f".{len(existing)}" if existing else ""
+    return f"{_dir(channel_id)}/{day.isoformat()}{suffix}.jsonl.gz"
+
+
+def archive_day(channel_id: int, day: date, batch_size: int = 1000) -> int:
+    """Move one channel-day into the archive. Returns rows moved."""
+    lo = _day_start(day)
+    qs = ChatMessage.objects.filter(channel_id=channel_id, created_at__gte=lo, created_at__lt=lo + timedelta(days=1))
+
+    written = 0
+    last_id = 0
+    with tempfile.TemporaryFile() as tmp:
+        with gzip.GzipFile(fileobj=tmp, mode="wb", compresslevel=6) as gz:
+            for row in qs.order_by("id").values(*FIELDS).iterator(chunk_size=2000):
+                gz.write(_line(row))
+                written += 1
+                last_id = row["id"]
+        if not written:
+            return 0
+        tmp.seek(0)
+        default_storage.save(_part_name(channel_id, day), File(tmp))
+
+    # only what went into the file; small batches keep each DELETE short
+    archived = qs.filter(id__lte=last_id)
+    while True:
+        ids = list(archived.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        ChatMessage.objects.filter(id__in=ids).delete()
+    return written
+
+
+def archive_channel(channel: Channel, now=None, batch_size: int = 1000) -> int:
+    keep = retention_days(channel)
+    if keep <= 0:
+        return 0
+    now = now or timezone.now()
+    # whole UTC days only, so a day is archived in one go
+    cutoff = (now - timedelta(days=keep)).astimezone(dt_timezone.utc).date()
+
+    oldest = ChatMessage.objects.filter(channel=channel, created_at__lt=_day_start(cutoff)).aggregate(
+        m=Min("created_at")
+    )["m"]
+    if oldest is None:
+        return 0
+
+    moved = 0
+    day = oldest.astimezone(dt_timezone.utc).date()
+    while day < cutoff:
+        moved += archive_day(channel.id, day, batch_size=batch_size)
+        day += timedelta(days=1)
+    return moved
+
+
+def run(batch_size: int = 1000) -> dict[str, int]:
+    return {ch.slug: archive_channel(ch, batch_size=batch_size) for ch in Channel.objects.all()}
+
+
+# -------------------------
+# Reading
+# -------------------------
+@lru_cache(maxsize=32)  # part files never change once written
+def _read_part(name: str) -> tuple[dict, ...]:
+    with default_storage.open(name, "rb") as f, gzip.GzipFile(fileobj=f) as gz:
+        return tuple(json.loads(line) for line in gz)
+
+
+def read_day(channel_id: int, day: date, after_id: int = 0, limit: int | None = None) -> list[dict]:
+    """Archived messages of one channel-day with id > after_id, oldest first."""
+    seen = set()
+    out = []
+    for name in parts(channel_id).get(day, []):
+        for m in _read_part(name):
+            if m["id"] > after_id and m["id"] not in seen:
+                seen.add(m["id"])
+                out.append(m)
+    out.sort(key=lambda m: m["id"])
+    return out[:limit] if limit else out
+
+
+def open_export(channel_id: int, day: date):
+    """Yields the raw gzip bytes of a channel-day (parts concatenated = one gzip stream)."""
+    for name in parts(channel_id).get(day, []):
+        with default_storage.open(name, "rb") as f:
+            while chunk := f.read(64 * 1024):
+                yield chunk
@@ -0,0 +1,126 @@
+# freestyle/chat_broker.py
+"""
+Links the chat hubs (chat_hub.py) of every web worker.
+
+A broker carries one small JSON text per (channel, batch) to every worker,
+including the sender; each worker then fans it out to its own sockets.
+CHAT_BROKER picks the implementation (dotted path):
+
+  LocalBroker       in-process only. Single worker, tests.
+  UnixSocketBroker  workers on one host: each binds a datagram socket in
+                    CHAT_BROKER_DIR and publish() sends to all of them.
+  RedisBroker       workers on several hosts: Redis pub/sub on REDIS_URL.
+
+Brokers call `deliver(channel_id, text)` from whatever thread they like;
+the hub hands it to the event loops thread-safely.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+log = logging.getLogger(__name__)
+
+Deliver = Callable[[int, str], None]
+
+
+class Broker:
+    def __init__(self, deliver: Deliver):
+        self.deliver = deliver
+
+    def publish(self, channel_id: int, text: str) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class LocalBroker(Broker):
+    def publish(self, channel_id: int, text: str) -> None:
+        self.deliver(channel_id, text)
+
+
+class UnixSocketBroker(Broker):
+    """
+    Datagram fan-out between processes on one host. Each process binds
+    <dir>/chat-<pid>.sock; publish() sends the datagram to every socket in
+    the directory and unlinks the ones nobody is listening on any more.
+    """
+
+    def __init__(self, deliver: Deliver, path: str | None = None):
+        super().__init__(deliver)
+        self.root = Path(path or getattr(settings, "CHAT_BROKER_DIR", "") or Path(tempfile.gettempdir()) / "freestyle-chat")
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = self.root / f"chat-{os.getpid()}.sock"
+        self.path.unlink(missing_ok=True)
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(str(self.path))
+        self.out = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._thread = threading.Thread(target=self._recv, name="chat-broker", daemon=True)
+        self._thread.start()
+
+    def publish(self, channel_id: int, text: str) -> None:
+        data = f"{channel_id}\n{text}".encode("utf-8")
+        for peer in self.root.glob("chat-*.sock"):
+            try:
+                self.out.sendto(data, str(peer))
+            except (ConnectionRefusedError, FileNotFoundError):
+                peer.unlink(missing_ok=True)
+            except OSError:
+                log.exception("chat broker: send to %s failed", peer)
+
+    def _recv(self) -> None:
+        while True:
+            try:
+                data = self.sock.recv(1 << 20)
+            except OSError:
+                return
+            head, _, text = data.decode("utf-8").partition("\n")
+            try:
+                self.deliver(int(head), text)
+            except Exception:
+                log.exception("chat broker: deliver failed")
+
+    def close(self) -> None:
+        self.sock.close()
+        self.out.close()
+        self.path.unlink(missing_ok=True)
+
+
+class RedisBroker(Broker):
+    CHANNEL = "freestyle:chat:fanout"
+
+    def __init__(self, deliver: Deliver, url: str | None = None):
+        super().__init__(deliver)
+        import redis  # optional dependency, only needed for this broker
+
+        self.client = redis.Redis.from_url(url or os.environ["REDIS_URL"])
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(**{self.CHANNEL: self._on_message})
+        self._thread = self.pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def _on_message(self, message) -> None:
+        head, _, text = message["data"].decode("utf-8").partition("\n")
+        self.deliver(int(head), text)
+
+    def publish(self, channel_id: int, text: str) -> None:
+        self.client.publish(self.CHANNEL, f"{channel_id}\n{text}")
+
+    def close(self) -> None:
+        self._thread.stop()
+        self.pubsub.close()
+
+
+def create(deliver: Deliver) -> Broker:
+    path = getattr(settings, "CHAT_BROKER", "freestyle.chat_broker.LocalBroker")
+    return import_string(path)(deliver)
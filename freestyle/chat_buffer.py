@@ -0,0 +1,204 @@
+# freestyle/chat_buffer.py
+"""
+Per-channel ring buffer of recent chat messages, pre-serialized.
+
+Chat readers almost always ask for "everything after the id I last saw",
+and that id is recent. Each worker keeps the newest CHAT_BUFFER_SIZE
+messages per channel as the dicts messages.json returns, sorted by id, so
+such a read is a bisect + slice with no query.
+
+Coverage: `floor` is the newest id the buffer has *dropped* (or 0 when it
+holds the whole channel). Any after_id >= floor is answered from memory;
+an older after_id (a client far behind) falls back to the database.
+
+Freshness: messages sent through this worker are appended by chat_send.
+Messages sent through other workers are noticed via chat_notify's shared
+latest-id key; when it is ahead of the buffer, one `id > newest` query
+tops the buffer up for every reader in this worker. Under a per-process
+cache (LocMem) that key can't see other workers, so a read instead
+re-reads the latest id from the database (chat_notify.refresh()) at most
+once per CHAT_NOTIFY_CHECK_SECONDS per channel.
+
+A channel's buffer is warmed from the database on its first read in the
+process (one query for the newest CHAT_BUFFER_SIZE + 1 rows).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+
+from . import caches, chat_notify
+from .models import ChatMessage
+
+
+def capacity() -> int:
+    return max(1, int(getattr(settings, "CHAT_BUFFER_SIZE", 500)))
+
+
+def payload(m: ChatMessage) -> dict:
+    return {
+        "id": m.id,
+        "username": m.username,
+        "message": m.message,
+        "created_at": m.created_at.isoformat(),
+        "seq": m.seq,
+    }
+
+
+@dataclass
+class Stats:
+    hits: int = 0
+    misses: int = 0
+    refills: int = 0
+    warms: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class _Ring:
+    cap: int
+    ids: list[int] = field(default_factory=list)
+    items: list[dict] = field(default_factory=list)
+    floor: int = 0
+    checked_at: float = 0.0  # monotonic time of the last database check (per-process cache only)
+
+    @property
+    def newest(self) -> int:
+        return self.ids[-1] if self.ids else self.floor
+
+    def extend(self, items: list[dict]) -> None:
+        for item in items:
+            if item["id"] > self.newest:
+                self.ids.append(item["id"])
+                self.items.append(item)
+        # trim in chunks so appends stay amortized O(1)
+        if len(self.ids) > self.cap * 2:
+            drop = len(self.ids) - self.cap
+            self.floor = self.ids[drop - 1]
+            del self.ids[:drop]
+            del self.items[:drop]
+
+    def after(self, after_id: int, limit: int) -> list[dict]:
+        i = bisect_right(self.ids, after_id)
+        return self.items[i:i + limit]
+
+
+_lock = threading.Lock()
+_rings: dict[int, _Ring] = {}
+stats = Stats()
+
+
+def _newest_rows(channel_id: int, n: int, after_id: int = 0) -> list[dict]:
+    """The newest n messages with id > after_id, oldest first."""
+    rows = list(ChatMessage.objects.filter(channel_id=channel_id, id__gt=after_id).order_by("-id")[:n])
+    rows.reverse()
+    return [payload(m) for m in rows]
+
+
+def _build(rows: list[dict], cap: int) -> _Ring:
+    ring = _Ring(cap)
+    if len(rows) > cap:
+        ring.floor = rows[0]["id"]
+        rows = rows[1:]
+    ring.extend(rows)
+    return ring
+
+
+def _warm(channel_id: int) -> _Ring:
+    stats.warms += 1
+    cap = capacity()
+    ring = _build(_newest_rows(channel_id, cap + 1), cap)
+    ring.checked_at = time.monotonic()
+    return ring
+
+
+def _ring(channel_id: int) -> _Ring:
+    with _lock:
+        ring = _rings.get(channel_id)
+    if ring is None:
+        ring = _warm(channel_id)
+        with _lock:
+            ring = _rings.setdefault(channel_id, ring)
+    return ring
+
+
+def _latest(ring: _Ring, channel_id: int) -> int:
+    if caches.is_shared():
+        return chat_notify.latest_id(channel_id)
+    now = time.monotonic()
+    with _lock:
+        due = now - ring.checked_at >= chat_notify.check_seconds()
+        if due:
+            ring.checked_at = now
+    return chat_notify.refresh(channel_id) if due else chat_notify.latest_id(channel_id)
+
+
+def read(channel_id: int, after_id: int, limit: int) -> list[dict]:
+    """Messages with id > after_id, oldest first, at most `limit`."""
+    ring = _ring(channel_id)
+
+    latest = _latest(ring, channel_id)
+    if ring.newest < latest:
+        stats.refills += 1
+        fresh = _newest_rows(channel_id, ring.cap + 1, after_id=ring.newest)
+        with _lock:
+            if len(fresh) > ring.cap:
+                # fell more than a buffer behind: start over from the newest rows
+                ring = _rings[channel_id] = _build(fresh, ring.cap)
+            else:
+                ring.extend(fresh)
+
+    with _lock:
+        if after_id >= ring.floor:
+            stats.hits += 1
+            return ring.after(after_id, limit)
+    stats.misses += 1
+    qs = ChatMessage.objects.filter(channel_id=channel_id, id__gt=after_id).order_by("id")[:limit]
+    return [payload(m) for m in qs]
+
+
+def recent_count(channel_id: int, seconds: float) -> int:
+    """Messages in this worker's buffer sent within the last `seconds` (chat activity)."""
+    since = datetime.now(dt_timezone.utc) - timedelta(seconds=seconds)
+    ring = _ring(channel_id)
+    n = 0
+    with _lock:
+        for item in reversed(ring.items):
+            if datetime.fromisoformat(item["created_at"]) < since:
+                break
+            n += 1
+    return n
+
+
+def append(channel_id: int, item: dict) -> None:
+    """
+    Called with payload(m) for each committed message, before
+    chat_notify.notify(). Only appends when the
+    buffer is already current; otherwise the next read tops it up from the
+    database so messages from other workers aren't skipped. A per-process
+    cache can't tell whether it is current, so there it never appends and
+    the id notify() stores makes the next read top up instead.
+    """
+    with _lock:
+        ring = _rings.get(channel_id)
+    if ring is None or not caches.is_shared():
+        return
+    if ring.newest >= chat_notify.latest_id(channel_id):
+        with _lock:
+            ring.extend([item])
+
+
+def reset() -> None:
+    global stats
+    with _lock:
+        _rings.clear()
+    stats = Stats()
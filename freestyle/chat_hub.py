@@ -0,0 +1,95 @@
+# freestyle/chat_hub.py
+"""
+Per-worker pub/sub hub for WebSocket chat (ws_chat.py).
+
+Each connected socket subscribes a bounded asyncio.Queue to its channel.
+When chat_ingest commits a batch, publish() serializes the new messages
+once and hands the text to the broker (chat_broker.py), which delivers it
+to the hub of every worker; each hub puts the same string on its local
+subscribers' queues. So a message costs one broker publish and one JSON
+encode per batch, not a query or an encode per recipient.
+
+A subscriber whose queue is full (a socket that stopped reading) is
+dropped; its connection closes and the client falls back to polling.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from . import chat_broker
+
+
+def queue_size() -> int:
+    return int(getattr(settings, "CHAT_WS_QUEUE", 256))
+
+
+@dataclass(eq=False)
+class Subscriber:
+    channel_id: int
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(queue_size()))
+    dropped: bool = False
+
+    def offer(self, text: str) -> None:
+        # runs on self.loop
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self.dropped = True
+            hub.unsubscribe(self)
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)  # tells the socket writer to close
+
+
+class Hub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs: dict[int, set[Subscriber]] = {}
+        self._broker: chat_broker.Broker | None = None
+
+    @property
+    def broker(self) -> chat_broker.Broker:
+        with self._lock:
+            if self._broker is None:
+                self._broker = chat_broker.create(self.deliver)
+            return self._broker
+
+    def subscribe(self, channel_id: int) -> Subscriber:
+        self.broker  # start the broker before the first message can arrive
+        sub = Subscriber(channel_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subs.setdefault(channel_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            group = self._subs.get(sub.channel_id)
+            if group is not None:
+                group.discard(sub)
+                if not group:
+                    self._subs.pop(sub.channel_id, None)
+
+    def deliver(self, channel_id: int, text: str) -> None:
+        """Broker callback: fan `text` out to this worker's sockets on the channel."""
+        with self._lock:
+            subs = list(self._subs.get(channel_id, ()))
+        for sub in subs:
+            sub.loop.call_soon_threadsafe(sub.offer, text)
+
+    def publish(self, channel_id: int, items: list[dict]) -> None:
+        if items:
+            self.broker.publish(channel_id, json.dumps({"type": "messages", "items": items}))
+
+    def connections(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+
+hub = Hub()
@@ -0,0 +1,254 @@
+# freestyle/chat_ingest.py
+"""
+Batched chat ingestion.
+
+chat_send hands messages to submit() instead of INSERTing each one. Every
+message gets a provisional per-channel `seq` right away (a shared cache
+counter, seeded from the DB), which the sender gets back and which is
+stored on the row, so the client can place its own message before it is
+written. A write-behind buffer collects the messages and writes them with
+one bulk_create every CHAT_INGEST_FLUSH_MS, or sooner once
+CHAT_INGEST_MAX_BATCH are waiting; on SQLite that is one write lock per
+batch instead of one per message. Batches are inserted in seq order, so
+within a worker row ids follow seq. After each batch the ring buffer,
+long-poll readers and WebSocket subscribers (chat_hub.py) get the new rows.
+
+CHAT_INGEST_FLUSH_MS = 0 writes inline (still with a seq).
+
+Crash-safe mode (CHAT_INGEST_JOURNAL = a directory): each message is first
+appended to a local JSONL journal and fsync'd before submit() returns.
+The journal is rotated each time a batch is taken and a segment is deleted
+once its batch is committed. A process holds an flock on each of its
+segments until then, so a segment nobody holds a lock on was left behind by
+a dead process; it is replayed on the next submit() in any process on the
+same host (taking the lock first, so only one process replays it). Rows
+already present (the crash came between commit and delete) are skipped.
+"""
+from __future__ import annotations
+
+import fcntl
+import itertools
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from . import chat_buffer, chat_hub, chat_notify
+from .models import ChatMessage
+from .write_behind import WriteBehindBuffer
+
+
+log = logging.getLogger(__name__)
+
+SEQ_KEY = "freestyle:chat:ingest:seq:{}"
+SEQ_TIMEOUT = None
+
+
+def flush_ms() -> float:
+    return float(getattr(settings, "CHAT_INGEST_FLUSH_MS", 50))
+
+
+def journal_dir() -> str:
+    return getattr(settings, "CHAT_INGEST_JOURNAL", "") or ""
+
+
+# -------------------------
+# Provisional sequence
+# -------------------------
+def next_seq(channel_id: int) -> int:
+    key = SEQ_KEY.format(channel_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        top = ChatMessage.objects.filter(channel_id=channel_id).aggregate(m=Max("seq"))["m"] or 0
+        cache.add(key, top, timeout=SEQ_TIMEOUT)
+        return cache.incr(key)
+
+
+# -------------------------
+# Journal
+# -------------------------
+class Journal:
+    """
+    Append-only JSONL segments chat-<token>-<n>.jsonl, fsync'd per record.
+    token is the pid plus a random suffix, so a reused pid never claims a
+    dead process's segments. Each segment stays open and flock'd until
+    drop_closed() deletes it.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.pid = os.getpid()
+        self.token = f"{self.pid}.{uuid.uuid4().hex[:12]}"
+        self._n = itertools.count()
+        self._file = None
+        self._path: Path | None = None
+        self.closed: list[tuple[Path, object]] = []
+
+    def append(self, record: dict) -> None:
+        if self._file is None:
+            self._path = self.root / f"chat-{self.token}-{next(self._n)}.jsonl"
+            self._file = open(self._path, "a", encoding="utf-8")
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def rotate(self) -> None:
+        # stays open (and locked) until its batch commits
+        if self._file is not None:
+            self.closed.append((self._path, self._file))
+            self._file = None
+            self._path = None
+
+    def drop_closed(self) -> None:
+        for path, f in self.closed:
+            path.unlink(missing_ok=True)
+            f.close()
+        self.closed = []
+
+    def orphans(self) -> list[tuple[Path, object]]:
+        """Segments no live process holds, each returned open and locked by us."""
+        out = []
+        for path in sorted(self.root.glob("chat-*-*.jsonl")):
+            if path.name.startswith(f"chat-{self.token}-"):
+                continue
+            try:
+                f = open(path, encoding="utf-8")
+            except FileNotFoundError:
+                continue  # committed and deleted since the glob
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.close()  # its writer (or another recoverer) is alive
+                continue
+            if not os.path.exists(path):
+                f.close()  # replayed and deleted by another process meanwhile
+                continue
+            out.append((path, f))
+        return out
+
+
+_journal: Journal | None = None
+_journal_lock = threading.Lock()
+
+
+def _get_journal() -> Journal | None:
+    global _journal
+    root = journal_dir()
+    if not root:
+        return None
+    with _journal_lock:
+        if _journal is None or _journal.pid != os.getpid():
+            _journal = Journal(root)
+            _recover(_journal)
+        return _journal
+
+
+def _recover(journal: Journal) -> int:
+    replayed = 0
+    for path, f in journal.orphans():
+        records = []
+        with f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break  # torn final line: it was never acknowledged
+            replayed += _insert(records, skip_existing=True)
+            path.unlink(missing_ok=True)
+        for channel_id in {r["channel_id"] for r in records}:
+            cache.delete(SEQ_KEY.format(channel_id))  # reseed past the replayed seqs
+    if replayed:
+        log.warning("chat journal: replayed %d messages from a previous process", replayed)
+    return replayed
+
+
+# -------------------------
+# Write path
+# -------------------------
+def _existing(records: list[dict]) -> set[tuple]:
+    seqs = {r["seq"] for r in records}
+    channels = {r["channel_id"] for r in records}
+    rows = ChatMessage.objects.filter(channel_id__in=channels, seq__in=seqs).values_list(
+        "channel_id", "seq", "username", "message"
+    )
+    return set(rows)
+
+
+def _insert(records: list[dict], skip_existing: bool = False) -> int:
+    if skip_existing and records:
+        seen = _existing(records)
+        records = [r for r in records if (r["channel_id"], r["seq"], r["username"], r["message"]) not in seen]
+    if not records:
+        return 0
+
+    records.sort(key=lambda r: (r["channel_id"], r["seq"]))
+    rows = ChatMessage.objects.bulk_create([ChatMessage(**r) for r in records])
+
+    by_channel: dict[int, list[dict]] = {}
+    for m in rows:
+        if m.id is not None:
+            item = chat_buffer.payload(m)
+            chat_buffer.append(m.channel_id, item)
+            by_channel.setdefault(m.channel_id, []).append(item)
+    for channel_id, items in by_channel.items():
+        chat_notify.notify(channel_id, items[-1]["id"])
+        chat_hub.hub.publish(channel_id, items)
+    if len(by_channel) < len({r["channel_id"] for r in records}):
+        # backend didn't return ids: let readers reseed the latest id from the DB
+        for channel_id in {r["channel_id"] for r in records}:
+            cache.delete(chat_notify.SEQ_KEY.format(channel_id))
+    return len(rows)
+
+
+def _flush(batch: dict) -> None:
+    _insert(list(batch.values()))
+    if _journal is not None:
+        _journal.drop_closed()
+
+
+def _swap(batch: dict) -> None:
+    if _journal is not None:
+        _journal.rotate()
+
+
+_local = itertools.count()
+
+_buffer = WriteBehindBuffer(
+    "chat",
+    _flush,
+    interval=lambda: flush_ms() / 1000.0,
+    max_items=int(getattr(settings, "CHAT_INGEST_MAX_BATCH", 500)),
+    on_swap=_swap,
+)
+
+
+def submit(channel_id: int, username: str, message: str) -> int:
+    """Queue a message; returns its provisional seq."""
+    inline = flush_ms() <= 0
+    journal = None if inline else _get_journal()  # replays leftovers before handing out seqs
+    record = {"channel_id": channel_id, "username": username, "message": message, "seq": next_seq(channel_id)}
+
+    if inline:
+        _insert([record])
+        return record["seq"]
+
+    if journal is None:
+        _buffer.put((channel_id, next(_local)), record)
+    else:
+        # journal under the buffer lock, so a record can't land in a segment
+        # that is rotated out with a batch it isn't part of
+        _buffer.update((channel_id, next(_local)), journal.append, lambda: record)
+    return record["seq"]
+
+
+def flush() -> int:
+    return _buffer.flush()
@@ -0,0 +1,184 @@
+# freestyle/chat_notify.py
+"""
+Wake-ups for long-polling chat readers (messages.json?wait=N).
+
+A reader parks in wait_for() until the channel's latest message id passes
+its after_id, or the timeout runs out, and only then queries ChatMessage,
+so an idle chat costs one query per timeout instead of one per poll.
+
+Two wake paths:
+  - in-process: chat_send calls notify(), which resolves the futures of
+    every reader parked in this worker (thread-safe: chat_send may run in a
+    sync thread, the readers on the ASGI event loop).
+  - cross-worker: notify() also stores the id under a cache key; parked
+    readers re-read it every CHAT_NOTIFY_CHECK_SECONDS. With a shared cache
+    (REDIS_URL) a message sent through another worker wakes them within
+    that interval. A per-process cache (LocMem) never sees other workers'
+    ids, so there one checker task per channel re-reads Max(id) from the
+    database each interval (refresh()) and wakes all of the channel's
+    readers when it moved: one query per channel per interval per worker,
+    however many readers are parked.
+
+On a cache miss the latest id is seeded from the database once.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from . import caches
+from .models import ChatMessage
+
+
+log = logging.getLogger(__name__)
+
+SEQ_KEY = "freestyle:chat:seq:{}"
+SEQ_TIMEOUT = 24 * 3600
+
+_lock = threading.Lock()
+_waiters: dict[int, set[tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+_checkers: dict[int, asyncio.Task] = {}
+
+
+def max_wait_seconds() -> float:
+    return float(getattr(settings, "CHAT_LONGPOLL_MAX_SECONDS", 25))
+
+
+def check_seconds() -> float:
+    return max(0.1, float(getattr(settings, "CHAT_NOTIFY_CHECK_SECONDS", 1)))
+
+
+# -------------------------
+# Sequence
+# -------------------------
+def _db_latest(channel_id: int) -> int:
+    return ChatMessage.objects.filter(channel_id=channel_id).aggregate(m=Max("id"))["m"] or 0
+
+
+def _raise(key: str, message_id: int) -> None:
+    # ids only grow; a racing lower write just means a reader re-polls once more
+    if int(cache.get(key) or 0) < message_id:
+        cache.set(key, message_id, timeout=SEQ_TIMEOUT)
+
+
+def latest_id(channel_id: int) -> int:
+    key = SEQ_KEY.format(channel_id)
+    value = cache.get(key)
+    if value is None:
+        value = _db_latest(channel_id)
+        cache.add(key, value, timeout=SEQ_TIMEOUT)
+    return int(value)
+
+
+def refresh(channel_id: int) -> int:
+    """The latest id from the database, also stored under the cache key for this worker's readers."""
+    key = SEQ_KEY.format(channel_id)
+    value = _db_latest(channel_id)
+    _raise(key, value)
+    return max(value, int(cache.get(key) or 0))
+
+
+def notify(channel_id: int, message_id: int) -> None:
+    """Call after a ChatMessage is saved."""
+    _raise(SEQ_KEY.format(channel_id), message_id)
+    _wake(channel_id)
+
+
+def _wake(channel_id: int) -> None:
+    with _lock:
+        waiters = _waiters.pop(channel_id, set())
+    for loop, fut in waiters:
+        loop.call_soon_threadsafe(_resolve, fut)
+
+
+def _resolve(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(True)
+
+
+# -------------------------
+# Per-process check
+# -------------------------
+def _advanced(channel_id: int) -> bool:
+    before = int(cache.get(SEQ_KEY.format(channel_id)) or 0)
+    return refresh(channel_id) > before
+
+
+async def _check(channel_id: int) -> None:
+    """
+    Without a shared cache: refresh the channel once per interval while any
+    reader is parked on it, and wake them all when the latest id moved.
+    """
+    advanced = sync_to_async(_advanced, thread_sensitive=False)
+    try:
+        while True:
+            await asyncio.sleep(check_seconds())
+            with _lock:
+                if not _waiters.get(channel_id):
+                    _checkers.pop(channel_id, None)
+                    return
+            try:
+                if await advanced(channel_id):
+                    _wake(channel_id)
+            except Exception:
+                log.exception("chat notify check failed for channel %s", channel_id)
+    finally:
+        with _lock:
+            if _checkers.get(channel_id) is asyncio.current_task():
+                _checkers.pop(channel_id, None)
+
+
+# -------------------------
+# Waiting
+# -------------------------
+async def wait_for(channel_id: int, after_id: int, timeout: float) -> bool:
+    """
+    Park until a message newer than after_id exists on the channel or
+    `timeout` seconds pass. Returns True if there is something new.
+
+    Each pass only reads the cached latest id. With a shared cache the
+    reader re-reads it every interval; otherwise it sleeps until notify()
+    or the channel's _check() task wakes it.
+    """
+    deadline = time.monotonic() + min(timeout, max_wait_seconds())
+    loop = asyncio.get_running_loop()
+    get_latest = sync_to_async(latest_id, thread_sensitive=False)
+    shared = caches.is_shared()
+
+    while True:
+        if await get_latest(channel_id) > after_id:
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+
+        fut = loop.create_future()
+        entry = (loop, fut)
+        with _lock:
+            _waiters.setdefault(channel_id, set()).add(entry)
+            if not shared and channel_id not in _checkers:
+                _checkers[channel_id] = loop.create_task(_check(channel_id))
+        try:
+            # woken: loop round and compare against after_id again
+            await asyncio.wait_for(fut, timeout=min(remaining, check_seconds()) if shared else remaining)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with _lock:
+                group = _waiters.get(channel_id)
+                if group is not None:
+                    group.discard(entry)
+                    if not group:
+                        _waiters.pop(channel_id, None)
+
+
+def parked() -> int:
+    with _lock:
+        return sum(len(s) for s in _waiters.values())
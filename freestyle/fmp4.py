@@ -0,0 +1,314 @@
+# freestyle/fmp4.py
+"""
+Pure-Python fragmented-MP4 (CMAF-style) segmenter.
+
+Repackages a progressive MP4 into:
+  <name>_hls/init.mp4        ftyp + moov (empty sample tables + mvex/trex)
+  <name>_hls/seg_00000.m4s   styp + moof + mdat, one per ~HLS_SEGMENT_SECONDS GOP run
+  <name>_hls/index.m3u8      VOD playlist (EXT-X-MAP -> init.mp4)
+
+No re-encoding: samples are copied byte for byte, cut on video sync
+samples, using the sample tables parsed by freestyle/mp4.py.
+"""
+from __future__ import annotations
+
+import math
+import os
+import shutil
+import struct
+import tempfile
+from bisect import bisect_left
+from dataclasses import dataclass
+
+from .mp4 import Box, Track, find_box, iter_boxes, parse_tracks, top_level_boxes
+
+
+HLS_DIR_SUFFIX = "_hls"
+INIT_NAME = "init.mp4"
+PLAYLIST_NAME = "index.m3u8"
+
+# trun sample_flags
+_SYNC_FLAGS = 0x02000000      # sample_depends_on=2 (I-frame)
+_NON_SYNC_FLAGS = 0x01010000  # sample_depends_on=1, sample_is_non_sync_sample=1
+
+# trun flags
+_TRUN_DATA_OFFSET = 0x000001
+_TRUN_DURATION = 0x000100
+_TRUN_SIZE = 0x000200
+_TRUN_FLAGS = 0x000400
+_TRUN_CTS = 0x000800
+
+_TFHD_DEFAULT_BASE_IS_MOOF = 0x020000
+
+
+class SegmenterError(Exception):
+    pass
+
+
+@dataclass
+class PackagedSegment:
+    name: str
+    start: float
+    duration: float
+
+
+@dataclass
+class PackageResult:
+    out_dir: str
+    init_name: str
+    playlist_name: str
+    segments: list[PackagedSegment]
+
+
+# -------------------------
+# Box writers
+# -------------------------
+def _box(box_type: str, *payloads: bytes) -> bytes:
+    data = b"".join(payloads)
+    return struct.pack(">I4s", 8 + len(data), box_type.encode("latin1")) + data
+
+
+def _full_box(box_type: str, version: int, flags: int, *payloads: bytes) -> bytes:
+    return _box(box_type, struct.pack(">I", (version << 24) | flags), *payloads)
+
+
+def _rebuild(buf: bytes, parent: Box, replace: dict[str, bytes], descend: set[str]) -> bytes:
+    """Copy `parent`, swapping children listed in `replace` and recursing into `descend`."""
+    parts = []
+    for child in iter_boxes(buf, parent.payload_offset, parent.end):
+        if child.type in replace:
+            parts.append(replace[child.type])
+        elif child.type in descend:
+            parts.append(_rebuild(buf, child, replace, descend))
+        else:
+            parts.append(buf[child.offset:child.end])
+    return _box(parent.type, *parts)
+
+
+# -------------------------
+# Init segment
+# -------------------------
+def _empty_stbl(moov: bytes, track: Track) -> bytes:
+    stsd = find_box(moov, "mdia", "minf", "stbl", "stsd", start=track.trak.payload_offset, end=track.trak.end)
+    if not stsd:
+        raise SegmenterError(f"track {track.track_id}: no stsd")
+    return _box(
+        "stbl",
+        moov[stsd.offset:stsd.end],
+        _full_box("stts", 0, 0, struct.pack(">I", 0)),
+        _full_box("stsc", 0, 0, struct.pack(">I", 0)),
+        _full_box("stsz", 0, 0, struct.pack(">II", 0, 0)),
+        _full_box("stco", 0, 0, struct.pack(">I", 0)),
+    )
+
+
+def build_init_segment(moov: bytes, tracks: list[Track]) -> bytes:
+    mvhd = find_box(moov, "mvhd")
+    if not mvhd:
+        raise SegmenterError("no mvhd")
+
+    traks = [
+        _rebuild(moov, t.trak, {"stbl": _empty_stbl(moov, t)}, descend={"mdia", "minf"})
+        for t in tracks
+    ]
+    trex = [
+        _full_box("trex", 0, 0, struct.pack(">IIIII", t.track_id, 1, 0, 0, 0))
+        for t in tracks
+    ]
+
+    ftyp = _box("ftyp", b"iso6", struct.pack(">I", 0), b"iso6", b"cmfc", b"mp41", b"dash")
+    return ftyp + _box("moov", moov[mvhd.offset:mvhd.end], *traks, _box("mvex", *trex))
+
+
+# -------------------------
+# Media segments
+# -------------------------
+def _trun(track: Track, a: int, b: int, data_offset: int) -> bytes:
+    flags = _TRUN_DATA_OFFSET | _TRUN_DURATION | _TRUN_SIZE | _TRUN_FLAGS
+    cts = track.cts_offsets
+    version = 0
+    if cts is not None:
+        flags |= _TRUN_CTS
+        if any(cts[i] < 0 for i in range(a, b)):
+            version = 1
+
+    rows = []
+    for i in range(a, b):
+        sample_flags = _SYNC_FLAGS if track.is_sync(i) else _NON_SYNC_FLAGS
+        if cts is not None:
+            rows.append(struct.pack(">IIIi" if version else ">IIII",
+                                    track.durations[i], track.sizes[i], sample_flags, cts[i]))
+        else:
+            rows.append(struct.pack(">III", track.durations[i], track.sizes[i], sample_flags))
+
+    return _full_box("trun", version, flags, struct.pack(">Ii", b - a, data_offset), *rows)
+
+
+def _traf(track: Track, a: int, b: int, data_offset: int) -> bytes:
+    return _box(
+        "traf",
+        _full_box("tfhd", 0, _TFHD_DEFAULT_BASE_IS_MOOF, struct.pack(">I", track.track_id)),
+        _full_box("tfdt", 1, 0, struct.pack(">Q", track.dts[a])),
+        _trun(track, a, b, data_offset),
+    )
+
+
+def _read_samples(f, track: Track, a: int, b: int) -> bytes:
+    """Read samples a..b-1, coalescing runs that are contiguous on disk."""
+    out = []
+    i = a
+    while i < b:
+        start = track.offsets[i]
+        end = start + track.sizes[i]
+        j = i + 1
+        while j < b and track.offsets[j] == end:
+            end += track.sizes[j]
+            j += 1
+        f.seek(start)
+        chunk = f.read(end - start)
+        if len(chunk) != end - start:
+            raise SegmenterError(f"track {track.track_id}: short read at {start}")
+        out.append(chunk)
+        i = j
+    return b"".join(out)
+
+
+def build_media_segment(f, seq: int, runs: list[tuple[Track, int, int]]) -> bytes:
+    """runs = [(track, first_sample, end_sample), ...] in mdat order."""
+    payloads = [_read_samples(f, t, a, b) for t, a, b in runs]
+
+    def moof(offsets):
+        return _box(
+            "moof",
+            _full_box("mfhd", 0, 0, struct.pack(">I", seq)),
+            *[_traf(t, a, b, off) for (t, a, b), off in zip(runs, offsets)],
+        )
+
+    # data_offset is relative to the moof start; moof size doesn't depend on the values
+    moof_size = len(moof([0] * len(runs)))
+    offsets = []
+    pos = moof_size + 8
+    for p in payloads:
+        offsets.append(pos)
+        pos += len(p)
+
+    styp = _box("styp", b"msdh", struct.pack(">I", 0), b"msdh", b"msix")
+    return styp + moof(offsets) + _box("mdat", *payloads)
+
+
+def _cut_points(video: Track, target: float) -> list[int]:
+    """Video sample indices where a new segment starts (always on sync samples)."""
+    sync = video.sync if video.sync is not None else range(video.sample_count)
+    cuts = [0]
+    step = target * video.timescale
+    for i in sync:
+        if i and video.dts[i] - video.dts[cuts[-1]] >= step:
+            cuts.append(i)
+    return cuts
+
+
+# -------------------------
+# Public API
+# -------------------------
+def hls_dir_for(src_path: str) -> str:
+    root, _ = os.path.splitext(src_path)
+    return root + HLS_DIR_SUFFIX
+
+
+def package_mp4(src_path: str, target: float = 4.0, out_dir: str | None = None) -> PackageResult:
+    """
+    Repackage `src_path` into fMP4 segments + a VOD playlist next to it.
+    Writes into a temp dir first and swaps it in, so readers never see a
+    half-written rendition.
+    """
+    out_dir = out_dir or hls_dir_for(src_path)
+
+    boxes = top_level_boxes(src_path)
+    moov_box = next((b for b in boxes if b.type == "moov"), None)
+    if moov_box is None:
+        raise SegmenterError("no moov box (not an MP4?)")
+    if any(b.type == "moof" for b in boxes):
+        raise SegmenterError("already fragmented")
+
+    with open(src_path, "rb") as f:
+        f.seek(moov_box.payload_offset)
+        moov = f.read(moov_box.size - moov_box.header)
+
+    tracks = [t for t in parse_tracks(moov) if t.handler in ("vide", "soun") and t.sample_count]
+    video = next((t for t in tracks if t.handler == "vide"), None)
+    if video is None:
+        raise SegmenterError("no video track")
+    # video first so every segment leads with its keyframe
+    tracks.sort(key=lambda t: t.handler != "vide")
+
+    cuts = _cut_points(video, target)
+    bounds = [video.dts[i] / video.timescale for i in cuts]
+    end_time = (video.dts[-1] + video.durations[-1]) / video.timescale
+
+    parent = os.path.dirname(out_dir) or "."
+    tmp = tempfile.mkdtemp(prefix=".hls-", dir=parent)
+    segments: list[PackagedSegment] = []
+    try:
+        with open(os.path.join(tmp, INIT_NAME), "wb") as out:
+            out.write(build_init_segment(moov, tracks))
+
+        with open(src_path, "rb") as f:
+            for n, t0 in enumerate(bounds):
+                t1 = bounds[n + 1] if n + 1 < len(bounds) else None
+                runs = []
+                for t in tracks:
+                    a = bisect_left(t.dts, round(t0 * t.timescale)) if n else 0
+                    b = bisect_left(t.dts, round(t1 * t.timescale)) if t1 is not None else t.sample_count
+                    if t is video:
+                        a = cuts[n]
+                        b = cuts[n + 1] if n + 1 < len(cuts) else video.sample_count
+                    if b > a:
+                        runs.append((t, a, b))
+
+                name = f"seg_{n:05d}.m4s"
+                with open(os.path.join(tmp, name), "wb") as out:
+                    out.write(build_media_segment(f, n + 1, runs))
+                segments.append(PackagedSegment(name, t0, (t1 if t1 is not None else end_time) - t0))
+
+        target_duration = max(1, math.ceil(max(s.duration for s in segments)))
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:7",
+            f"#EXT-X-TARGETDURATION:{target_duration}",
+            "#EXT-X-PLAYLIST-TYPE:VOD",
+            "#EXT-X-INDEPENDENT-SEGMENTS",
+            f'#EXT-X-MAP:URI="{INIT_NAME}"',
+        ]
+        for s in segments:
+            lines.append(f"#EXTINF:{s.duration:.3f},")
+            lines.append(s.name)
+        lines.append("#EXT-X-ENDLIST")
+        with open(os.path.join(tmp, PLAYLIST_NAME), "w") as out:
+            out.write("\n".join(lines) + "\n")
+
+        if os.path.isdir(out_dir):
+            shutil.rmtree(out_dir)
+        os.replace(tmp, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    return PackageResult(out_dir, INIT_NAME, PLAYLIST_NAME, segments)
+
+
+def read_vod_playlist(path: str) -> tuple[str | None, list[tuple[str, float]]]:
+    """Parse our own index.m3u8 back into (init_uri, [(segment_uri, duration), ...])."""
+    init = None
+    out = []
+    duration = None
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#EXT-X-MAP:"):
+                init = line.split('URI="', 1)[1].split('"', 1)[0]
+            elif line.startswith("#EXTINF:"):
+                duration = float(line[len("#EXTINF:"):].split(",", 1)[0])
+            elif line and not line.startswith("#") and duration is not None:
+                out.append((line, duration))
+                duration = None
+    return init, out
@@ -0,0 +1,135 @@
+# freestyle/hll.py
+"""
+Small HyperLogLog for approximate distinct counts (unique viewers).
+
+m = 2**p one-byte registers; each value is hashed to 64 bits, the top p
+bits pick a register and the register keeps the longest run of leading
+zeros (+1) seen in the remaining bits. Sketches with the same p merge by
+taking the register-wise max, so minute sketches union into hours/days
+and per-worker sketches union across workers without double counting.
+
+Accuracy: the standard error of the estimate is 1.04 / sqrt(m):
+    p=12 (4 KiB)  ->  1.6 %
+    p=14 (16 KiB) ->  0.8 %
+i.e. ~95% of estimates fall within 2x that. The estimator is Ertl's
+"improved raw estimator" (arXiv:1702.01284), which holds that bound over the
+whole range without the bias-correction tables classic HLL needs around
+2.5*m, and is near exact for small audiences.
+`manage.py hll_check` measures this empirically.
+
+Serialized form: one byte p, then the m registers.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+
+
+DEFAULT_P = 12
+MIN_P = 4
+MAX_P = 16
+
+
+def hash64(value: str | bytes) -> int:
+    data = value.encode("utf-8") if isinstance(value, str) else value
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+_ALPHA_INF = 1 / (2 * math.log(2))
+
+
+def _sigma(x: float) -> float:
+    if x == 1.0:
+        return math.inf
+    y = 1.0
+    z = x
+    while True:
+        x *= x
+        prev = z
+        z += x * y
+        y += y
+        if z == prev:
+            return z
+
+
+def _tau(x: float) -> float:
+    if x == 0.0 or x == 1.0:
+        return 0.0
+    y = 1.0
+    z = 1 - x
+    while True:
+        x = math.sqrt(x)
+        prev = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == prev:
+            return z / 3
+
+
+class HyperLogLog:
+    __slots__ = ("p", "m", "registers")
+
+    def __init__(self, p: int = DEFAULT_P, registers: bytes | bytearray | None = None):
+        if not MIN_P <= p <= MAX_P:
+            raise ValueError(f"p must be in [{MIN_P}, {MAX_P}]")
+        self.p = p
+        self.m = 1 << p
+        if registers is None:
+            self.registers = bytearray(self.m)
+        else:
+            if len(registers) != self.m:
+                raise ValueError("register count does not match p")
+            self.registers = bytearray(registers)
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def add(self, value: str | bytes) -> None:
+        self.add_hash(hash64(value))
+
+    def add_hash(self, h: int) -> None:
+        idx = h >> (64 - self.p)
+        rest_bits = 64 - self.p
+        rest = h & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """In-place union with `other` (same p). Returns self."""
+        if other.p != self.p:
+            raise ValueError("cannot merge sketches with different p")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        m = self.m
+        q = 64 - self.p
+        hist = [0] * (q + 2)
+        for r in self.registers:
+            hist[r] += 1
+
+        z = m * _tau(1 - hist[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + hist[k])
+        z += m * _sigma(hist[0] / m)
+        if math.isinf(z):
+            return 0
+        return int(round(_ALPHA_INF * m * m / z))
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.p]) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes | memoryview) -> "HyperLogLog":
+        data = bytes(data)
+        if not data:
+            return cls()
+        return cls(data[0], data[1:])
+
+    def copy(self) -> "HyperLogLog":
+        return HyperLogLog(self.p, self.registers)
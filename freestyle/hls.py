@@ -0,0 +1,189 @@
+# freestyle/hls.py
+"""
+Virtual linear HLS: one live media playlist per channel, stitched from the
+compiled schedule.
+
+Items packaged by the fMP4 segmenter (fmp4.py, FreestyleVideo.cmaf_playlist)
+contribute their init.mp4 + seg_*.m4s objects. Anything else (progressive
+MP4s not packaged yet, remote/HLS items) is aired as EXT-X-GAP segments of
+at most HLS_SEGMENT_SECONDS: HLS clients need fMP4 or TS segments, so
+slices of a progressive MP4 would not play. Run `manage.py package_cmaf`
+to put an item on the stream. Item boundaries carry EXT-X-DISCONTINUITY.
+The playlist only depends on the wall clock, so every viewer (and any CDN
+in front of us) gets the same bytes.
+
+Media sequence numbers are stable across reloads: one rotation cycle has a
+fixed number of segments S, so segment j of cycle k is always k*S + j.
+"""
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+
+from django.conf import settings
+
+from .fmp4 import read_vod_playlist
+from .schedule import CompiledSchedule, ScheduleItem, media_path
+
+
+@dataclass(frozen=True)
+class Segment:
+    start: float            # seconds into the item
+    duration: float
+    uri: str
+    init_uri: str | None    # EXT-X-MAP URI
+    gap: bool = False       # no CMAF rendition: clients skip it
+
+
+def segment_seconds() -> float:
+    return float(getattr(settings, "HLS_SEGMENT_SECONDS", 4))
+
+
+def window_segments() -> int:
+    return int(getattr(settings, "HLS_WINDOW_SEGMENTS", 6))
+
+
+# -------------------------
+# Per-item segmentation
+# -------------------------
+def _file_stamp(path: str | None):
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def item_segments(item: ScheduleItem, target: float | None = None) -> tuple[Segment, ...]:
+    target = segment_seconds() if target is None else target
+    cmaf_path = media_path(item.cmaf_playlist)
+    cmaf_stamp = _file_stamp(cmaf_path)
+    if cmaf_stamp:
+        return _cmaf_segments(item, cmaf_path, cmaf_stamp, target)
+    return _gap_segments(item, target)
+
+
+@lru_cache(maxsize=512)
+def _gap_segments(item: ScheduleItem, target: float) -> tuple[Segment, ...]:
+    """Keep the timeline honest for an item with nothing playable, in target-sized gaps."""
+    duration = float(item.duration_seconds)
+    n = max(1, math.ceil(duration / target))
+    step = duration / n
+    return tuple(Segment(i * step, step, item.play_url, None, gap=True) for i in range(n))
+
+
+@lru_cache(maxsize=512)
+def _cmaf_segments(item: ScheduleItem, path: str, stamp, target: float) -> tuple[Segment, ...]:
+    init, rows = read_vod_playlist(path)
+    base = item.cmaf_playlist.rsplit("/", 1)[0] + "/"
+    duration = float(item.duration_seconds)
+
+    out = []
+    t = 0.0
+    for uri, dur in rows:
+        if t >= duration:
+            break
+        # the schedule is authoritative: trim the tail to the item's slot
+        dur = min(dur, duration - t)
+        out.append(Segment(t, dur, base + uri, base + init if init else None))
+        t += dur
+    return tuple(out) or _gap_segments(item, target)
+
+
+# -------------------------
+# Cycle layout
+# -------------------------
+@dataclass(frozen=True)
+class _Layout:
+    segments: tuple[tuple[float, int, Segment], ...]  # (start within cycle, item index, segment)
+    starts: tuple[float, ...]
+    target_duration: int
+
+
+_layouts: dict[tuple, _Layout] = {}
+_layouts_lock = threading.Lock()
+
+
+def _layout(sched: CompiledSchedule, target: float) -> _Layout:
+    key = (sched.channel_id, sched.compiled_at, target)
+    with _layouts_lock:
+        hit = _layouts.get(key)
+    if hit:
+        return hit
+
+    rows = []
+    for i, item in enumerate(sched.items):
+        for seg in item_segments(item, target):
+            rows.append((item.start + seg.start, i, seg))
+
+    layout = _Layout(
+        segments=tuple(rows),
+        starts=tuple(r[0] for r in rows),
+        target_duration=max(1, math.ceil(max((r[2].duration for r in rows), default=target))),
+    )
+    with _layouts_lock:
+        # one live layout per channel is all we ever need
+        for k in [k for k in _layouts if k[0] == sched.channel_id]:
+            _layouts.pop(k, None)
+        _layouts[key] = layout
+    return layout
+
+
+# -------------------------
+# Playlist
+# -------------------------
+def _pdt(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, tz=dt_timezone.utc).isoformat(timespec="milliseconds")
+
+
+def live_playlist(sched: CompiledSchedule, now: float | None = None) -> str | None:
+    """Render the sliding-window live playlist for `now`, or None if the channel is empty."""
+    if not sched.items or sched.total <= 0:
+        return None
+
+    now = time.time() if now is None else now
+    layout = _layout(sched, segment_seconds())
+    count = len(layout.segments)
+    n_items = len(sched.items)
+
+    elapsed = max(0.0, now - sched.anchor_epoch)
+    cycle, pos = divmod(elapsed, sched.total)
+    live = int(cycle) * count + (bisect_right(layout.starts, pos) - 1)
+    first = max(0, live - window_segments() + 1)
+
+    first_cycle, first_j = divmod(first, count)
+    discontinuity_seq = first_cycle * n_items + layout.segments[first_j][1]
+
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:8",
+        f"#EXT-X-TARGETDURATION:{layout.target_duration}",
+        f"#EXT-X-MEDIA-SEQUENCE:{first}",
+        f"#EXT-X-DISCONTINUITY-SEQUENCE:{discontinuity_seq}",
+    ]
+
+    for g in range(first, live + 1):
+        k, j = divmod(g, count)
+        cycle_start, _, seg = layout.segments[j]
+        item_start = g == first or seg.start == 0
+
+        if g != first and seg.start == 0:
+            lines.append("#EXT-X-DISCONTINUITY")
+        if item_start:
+            lines.append(f"#EXT-X-PROGRAM-DATE-TIME:{_pdt(sched.anchor_epoch + k * sched.total + cycle_start)}")
+            if seg.init_uri:
+                lines.append(f'#EXT-X-MAP:URI="{seg.init_uri}"')
+        if seg.gap:
+            lines.append("#EXT-X-GAP")
+        lines.append(f"#EXTINF:{seg.duration:.3f},")
+        lines.append(seg.uri)
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,55 @@
+# freestyle/leases.py
+"""
+Lease-based leader election on a plain DB row (WorkerLease), so it works the
+same on SQLite and Postgres.
+
+acquire() is a single conditional UPDATE ("take it if it's mine or expired"),
+falling back to INSERT for a lease that doesn't exist yet; the unique name
+makes concurrent inserts lose cleanly. A holder keeps the lease by
+re-acquiring before it expires; if it dies, the lease lapses after `ttl`
+and another node takes over.
+"""
+from __future__ import annotations
+
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import WorkerLease
+
+
+def make_owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def acquire(name: str, owner: str, ttl: float) -> bool:
+    now = timezone.now()
+    expires = now + timedelta(seconds=ttl)
+    taken = (
+        WorkerLease.objects.filter(name=name)
+        .filter(Q(owner=owner) | Q(expires_at__lt=now))
+        .update(owner=owner, expires_at=expires)
+    )
+    if taken:
+        return True
+    if WorkerLease.objects.filter(name=name).exists():
+        return False
+    try:
+        with transaction.atomic():
+            WorkerLease.objects.create(name=name, owner=owner, expires_at=expires)
+        return True
+    except IntegrityError:
+        return False
+
+
+def release(name: str, owner: str) -> None:
+    WorkerLease.objects.filter(name=name, owner=owner).update(owner="", expires_at=timezone.now())
+
+
+def mark_run(name: str, owner: str) -> None:
+    WorkerLease.objects.filter(name=name, owner=owner).update(last_run_at=timezone.now())
@@ -0,0 +1,134 @@
+import gzip
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+
+from freestyle import captions, captions_bin
+from freestyle.models import VideoCaptions
+
+
+# times JSON.parse vs FSCaptions.decode on the files given in argv
+NODE_BENCH = """
+const fs = require("fs");
+global.window = {};
+eval(fs.readFileSync(process.argv[2], "utf8"));
+const json = fs.readFileSync(process.argv[3], "utf8");
+const bin = new Uint8Array(fs.readFileSync(process.argv[4])).buffer;
+const runs = Number(process.argv[5]);
+const time = (fn) => { fn(); const t0 = process.hrtime.bigint(); for (let i = 0; i < runs; i++) fn();
+  return Number(process.hrtime.bigint() - t0) / 1e6 / runs; };
+console.log(JSON.stringify({
+  json: time(() => JSON.parse(json).words.length),
+  bin: time(() => window.FSCaptions.decode(bin).words.length),
+}));
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare caption payloads: {w,s,e} JSON vs captions.bin (size, gzip'd size, parse time). "
+        "--build (re)compiles VideoCaptions.compiled from VideoCaptions.data for the selected videos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--video", type=int, help="video id (default: every captioned video)")
+        parser.add_argument("--build", action="store_true", help="write the compiled blob from the words first")
+        parser.add_argument("--synthetic", type=int, default=0, help="measure N generated words instead of the DB")
+        parser.add_argument("--runs", type=int, default=20, help="parses per timing")
+        parser.add_argument("--js", action="store_true", help="also time the browser decoder under node")
+
+    def handle(self, *args, **o):
+        if o["synthetic"]:
+            rows = [("synthetic", _synthetic(o["synthetic"]))]
+        else:
+            qs = VideoCaptions.objects.order_by("video_id")
+            if o["video"]:
+                qs = qs.filter(video_id=o["video"])
+            rows = []
+            for c in qs:
+                if o["build"]:
+                    c.compiled = captions_bin.encode(c.data)
+                    c.save(update_fields=["compiled"])
+                rows.append((f"video {c.video_id}", c.data))
+            if not rows:
+                self.stdout.write("no captioned videos (try --synthetic 20000)")
+                return
+
+        node = shutil.which("node") if o["js"] else None
+        if o["js"] and not node:
+            self.stdout.write(self.style.WARNING("node not found; skipping JS timings"))
+
+        self.stdout.write(
+            f"{'':14}{'words':>8}{'json B':>10}{'bin B':>9}{'json gz':>9}{'bin gz':>8}"
+            f"{'py json ms':>12}{'py bin ms':>11}" + (f"{'js json ms':>12}{'js bin ms':>11}" if node else "")
+        )
+        for label, data in rows:
+            idx = captions.Index(data)
+            # what generate_captions used to store and captions.json used to return
+            text = json.dumps(
+                {"words": [{"w": idx.word(i), "s": idx.start[i] / 1000, "e": idx.end[i] / 1000} for i in range(len(idx))]}
+            )
+            blob = captions_bin.encode(data)
+            words, start, end = captions_bin.decode(blob)
+            assert words == [idx.word(i) for i in range(len(idx))] and start == list(idx.start)
+
+            py_json = _time(lambda: json.loads(text), o["runs"])
+            py_bin = _time(lambda: captions_bin.decode(blob), o["runs"])
+            line = (
+                f"{label:14}{len(idx):>8}{len(text):>10}{len(blob):>9}"
+                f"{len(gzip.compress(text.encode())):>9}{len(gzip.compress(blob)):>8}"
+                f"{py_json:>12.2f}{py_bin:>11.2f}"
+            )
+            if node:
+                js = self._node(node, text, blob, o["runs"])
+                line += f"{js['json']:>12.2f}{js['bin']:>11.2f}"
+            self.stdout.write(line)
+            self.stdout.write(
+                f"{'':14}binary is {len(text) / max(1, len(blob)):.1f}x smaller "
+                f"({len(gzip.compress(text.encode())) / max(1, len(gzip.compress(blob))):.1f}x gzip'd)"
+            )
+
+    def _node(self, node, text, blob, runs):
+        decoder = finders.find("freestyle/captions_bin.js") or os.path.join(
+            settings.BASE_DIR, "freestyle", "static", "freestyle", "captions_bin.js"
+        )
+        with tempfile.TemporaryDirectory() as td:
+            paths = [os.path.join(td, name) for name in ("bench.js", "captions.json", "captions.bin")]
+            for path, content in zip(paths, (NODE_BENCH.encode(), text.encode(), blob)):
+                with open(path, "wb") as f:
+                    f.write(content)
+            out = subprocess.run(
+                [node, paths[0], decoder, paths[1], paths[2], str(runs)],
+                capture_output=True, text=True, check=True,
+            )
+        return json.loads(out.stdout)
+
+
+def _time(fn, runs: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - t0) / runs * 1000
+
+
+def _synthetic(n: int) -> dict:
+    """n words of speech-like timing over a ~1.5k-word vocabulary (Zipf-ish)."""
+    rng = random.Random(1)
+    vocab = [f"{rng.choice('bcdfghjklmnprstvw')}{rng.choice('aeiou')}{rng.choice('nrstlmk')}" * rng.randint(1, 3)
+             for _ in range(1500)]
+    weights = [1 / (i + 1) for i in range(len(vocab))]
+    words, t = [], 0.0
+    for w in rng.choices(vocab, weights, k=n):
+        d = rng.uniform(0.12, 0.6)
+        words.append({"w": w, "s": round(t, 3), "e": round(t + d, 3)})
+        t += d + (rng.uniform(0.5, 2.0) if rng.random() < 0.05 else rng.uniform(0, 0.15))
+    return captions.build(words)
@@ -0,0 +1,84 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from freestyle import chat_buffer, chat_notify
+from freestyle.models import Channel, ChatMessage
+
+
+class Command(BaseCommand):
+    help = (
+        "Synthetic chat load on a scratch channel: readers poll after their last id while senders post. "
+        "Compares direct ChatMessage queries with the ring buffer (chat_buffer.py): DB queries, hit ratio, time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=200)
+        parser.add_argument("--rounds", type=int, default=50)
+        parser.add_argument("--sends", type=int, default=3, help="messages posted per round")
+        parser.add_argument("--history", type=int, default=2000, help="messages on the channel before the run")
+        parser.add_argument("--behind", type=float, default=0.02, help="share of reads from clients far behind")
+        parser.add_argument("--limit", type=int, default=60)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **o):
+        ch = Channel.objects.create(slug=f"chat-bench-{int(time.time())}", name="chat bench")
+        try:
+            ChatMessage.objects.bulk_create(
+                [ChatMessage(channel=ch, username="seed", message=f"m{i}") for i in range(o["history"])]
+            )
+            for mode in ("direct", "buffer"):
+                self._run(ch, mode, o)
+        finally:
+            ch.delete()
+            chat_buffer.reset()
+
+    def _run(self, ch, mode, o):
+        rng = random.Random(o["seed"])
+        chat_buffer.reset()
+        start_id = chat_notify.latest_id(ch.id)
+        readers = [start_id] * o["readers"]
+        reads = 0
+
+        def read(after_id):
+            if mode == "buffer":
+                return chat_buffer.read(ch.id, after_id, o["limit"])
+            qs = ChatMessage.objects.filter(channel=ch, id__gt=after_id).order_by("id")[: o["limit"]]
+            return [chat_buffer.payload(m) for m in qs]
+
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        t0 = time.perf_counter()
+        with connection.execute_wrapper(count):
+            for _ in range(o["rounds"]):
+                for _ in range(o["sends"]):
+                    m = ChatMessage.objects.create(channel=ch, username="bench", message="hello")
+                    if mode == "buffer":
+                        chat_buffer.append(ch.id, chat_buffer.payload(m))
+                    chat_notify.notify(ch.id, m.id)
+
+                for i, last in enumerate(readers):
+                    after_id = rng.randint(0, start_id) if rng.random() < o["behind"] else last
+                    items = read(after_id)
+                    reads += 1
+                    if items:
+                        readers[i] = max(last, items[-1]["id"])
+        elapsed = time.perf_counter() - t0
+
+        sends = o["rounds"] * o["sends"]
+        read_queries = queries - sends
+        line = (
+            f"{mode:>7}: {reads} reads, {read_queries} read queries "
+            f"({read_queries / reads:.3f}/read), {elapsed * 1000 / reads:.3f} ms/read"
+        )
+        if mode == "buffer":
+            s = chat_buffer.stats
+            line += f", hit ratio {s.hit_ratio * 100:.1f}% (misses {s.misses}, refills {s.refills}, warms {s.warms})"
+        self.stdout.write(line)
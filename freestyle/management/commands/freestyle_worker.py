@@ -0,0 +1,53 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from freestyle.worker import Scheduler, registered
+
+
+class Command(BaseCommand):
+    help = "Run periodic housekeeping (presence reaping, rollups, rotation cleanup, chat retention)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tick", type=float, default=1.0, help="Seconds between scheduler checks.")
+        parser.add_argument("--only", default="", help="Comma-separated task names to run (default: all).")
+        parser.add_argument("--once", action="store_true", help="Run every selected task once, then exit.")
+        parser.add_argument("--list", action="store_true", help="List registered tasks and exit.")
+
+    def handle(self, *args, **options):
+        tasks = registered()
+
+        if options["list"]:
+            for name, t in sorted(tasks.items()):
+                self.stdout.write(f"{name:20} every {t.every:g}s{'' if t.exclusive else ' (every node)'}")
+            return
+
+        only = [x.strip() for x in options["only"].split(",") if x.strip()]
+        unknown = [x for x in only if x not in tasks]
+        if unknown:
+            raise CommandError(f"unknown task(s): {', '.join(unknown)}")
+        selected = [tasks[n] for n in (only or sorted(tasks))]
+
+        scheduler = Scheduler(selected)
+
+        def report(r):
+            if r.ok:
+                self.stdout.write(f"{r.name}: {r.result!r} ({r.seconds * 1000:.0f} ms)")
+            else:
+                self.stderr.write(f"{r.name}: FAILED {r.result!r}")
+
+        if options["once"]:
+            try:
+                for r in scheduler.run_pending():
+                    report(r)
+            finally:
+                scheduler.shutdown()
+            return
+
+        stop = threading.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: stop.set())
+
+        self.stdout.write(f"freestyle_worker {scheduler.owner}: {', '.join(t.name for t in selected)}")
+        scheduler.run_forever(stop, tick=options["tick"], on_result=report)
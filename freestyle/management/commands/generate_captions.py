@@ -10,7 +10,8 @@ from typing import Any, Iterable
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 
-from freestyle.models import FreestyleVideo
+from freestyle import captions, captions_bin
+from freestyle.models import FreestyleVideo, VideoCaptions
 
 
 @dataclass
@@ -186,7 +187,7 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("--video", type=int, required=False, help="Video ID to caption.")
         parser.add_argument("--all", action="store_true", help="Caption all videos that need captions.")
-        parser.add_argument("--force", action="store_true", help="Overwrite existing captions_words.")
+        parser.add_argument("--force", action="store_true", help="Overwrite existing captions.")
         parser.add_argument("--model", default="small", help="tiny | base | small | medium | large-v3 (etc)")
         parser.add_argument("--language", default="", help="Optional: force language (e.g. en). Leave blank to auto.")
         parser.add_argument("--beam", type=int, default=5, help="Beam size (quality vs speed). Default 5.")
@@ -220,10 +221,7 @@ class Command(BaseCommand):
         self.stdout.write(f"Using ffmpeg: {ffmpeg}")
         self.stdout.write(f"Using model: {model_name} | beam: {beam_size} | language: {language or 'auto'}")
 
-        # What fields actually exist on this model?
-        model_field_names = {f.name for f in FreestyleVideo._meta.get_fields()}
-        has_captions_model = "captions_model" in model_field_names
-        has_captions_updated_at = "captions_updated_at" in model_field_names
+        captioned = set(VideoCaptions.objects.values_list("video_id", flat=True))
 
         updated = 0
         skipped = 0
@@ -231,8 +229,7 @@ class Command(BaseCommand):
 
         for v in qs:
             title = getattr(v, "title", "")
-            existing = (getattr(v, "captions_words", None) or [])
-            if existing and not force:
+            if v.id in captioned and not force:
                 self.stdout.write(f"SKIP id={v.id} '{title}' (already has captions)")
                 skipped += 1
                 continue
@@ -276,23 +273,20 @@ class Command(BaseCommand):
                         beam_size=beam_size,
                     )
 
-                payload: list[dict[str, Any]] = [{"w": w.w, "s": w.s, "e": w.e} for w in words]
+                # sorted parallel arrays, served a window at a time (captions.py)
+                payload = captions.build(words)
 
-                # Save only what exists on the model
-                v.captions_words = payload
-                update_fields = ["captions_words"]
+                VideoCaptions.objects.update_or_create(
+                    video=v,
+                    defaults={
+                        "data": payload,
+                        "compiled": captions_bin.encode(payload),
+                        "source_model": model_name,
+                        "updated_at": timezone.now(),
+                    },
+                )
 
-                if has_captions_model:
-                    v.captions_model = model_name
-                    update_fields.append("captions_model")
-
-                if has_captions_updated_at:
-                    v.captions_updated_at = timezone.now()
-                    update_fields.append("captions_updated_at")
-
-                v.save(update_fields=update_fields)
-
-                self.stdout.write(f"OK id={v.id} words={len(payload)}")
+                self.stdout.write(f"OK id={v.id} words={len(payload['start'])}")
                 updated += 1
 
             except KeyboardInterrupt:
@@ -0,0 +1,55 @@
+import random
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+
+from freestyle.hll import HyperLogLog
+
+
+class Command(BaseCommand):
+    help = "Measure HyperLogLog error against its 1.04/sqrt(m) bound and check that merges are lossless."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--p", type=int, default=12)
+        parser.add_argument("--trials", type=int, default=20)
+        parser.add_argument("--sizes", default="100,1000,10000,100000")
+
+    def handle(self, *args, **o):
+        p = o["p"]
+        bound = HyperLogLog(p).standard_error
+        rng = random.Random(7)
+        failed = False
+
+        self.stdout.write(f"p={p} m={1 << p} standard error 1.04/sqrt(m) = {bound * 100:.2f}%")
+        self.stdout.write(f"{'n':>9}{'mean |err|':>12}{'rms err':>10}{'max |err|':>11}")
+        for n in [int(x) for x in o["sizes"].split(",") if x.strip()]:
+            errors = []
+            for _ in range(o["trials"]):
+                h = HyperLogLog(p)
+                salt = rng.getrandbits(64)
+                for i in range(n):
+                    h.add(f"{salt}:{i}")
+                errors.append((h.count() - n) / n)
+
+            rms = statistics.fmean(e * e for e in errors) ** 0.5
+            mean_abs = statistics.fmean(abs(e) for e in errors)
+            self.stdout.write(
+                f"{n:>9}{mean_abs * 100:>11.2f}%{rms * 100:>9.2f}%{max(map(abs, errors)) * 100:>10.2f}%"
+            )
+            # rms should sit near the bound; allow sampling noise over few trials
+            if rms > 2 * bound:
+                failed = True
+
+        # merge(A, B) must equal the sketch of A u B register for register
+        a, b, both = HyperLogLog(p), HyperLogLog(p), HyperLogLog(p)
+        for i in range(20000):
+            (a if i % 2 else b).add(f"m{i}")
+            both.add(f"m{i}")
+        merged = a.copy().merge(b)
+        lossless = merged.registers == both.registers
+        roundtrip = HyperLogLog.from_bytes(merged.to_bytes()).registers == merged.registers
+        self.stdout.write(f"merge lossless: {lossless}, bytes round-trip: {roundtrip}")
+
+        if failed or not lossless or not roundtrip:
+            raise CommandError("HLL check failed")
+        self.stdout.write(self.style.SUCCESS("HLL within bounds"))
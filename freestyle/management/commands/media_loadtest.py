@@ -0,0 +1,134 @@
+import socket
+import statistics
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# -----------------------------
+# Slow client (raw socket so we control how fast we drain)
+# -----------------------------
+def slow_reader(host: str, port: int, path: str, read_bps: int, stop: threading.Event, stats: dict, lock):
+    """
+    Opens a Range request and reads it at ~read_bps, like a phone on bad LTE.
+    A tiny receive buffer makes the server feel the backpressure quickly.
+    """
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        s.settimeout(30)
+        s.connect((host, port))
+        req = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host}\r\n"
+            "Range: bytes=0-\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        s.sendall(req.encode("latin1"))
+    except Exception:
+        with lock:
+            stats["slow_failed"] += 1
+        return
+
+    per_tick = max(1, read_bps // 10)
+    try:
+        while not stop.is_set():
+            data = s.recv(per_tick)
+            if not data:
+                break
+            with lock:
+                stats["slow_bytes"] += len(data)
+            time.sleep(0.1)
+    except Exception:
+        pass
+    finally:
+        s.close()
+
+
+def time_request(url: str, timeout: float) -> float | None:
+    t0 = time.perf_counter()
+    try:
+        with urlopen(url, timeout=timeout) as r:
+            r.read()
+    except Exception:
+        return None
+    return time.perf_counter() - t0
+
+
+# -----------------------------
+# Command
+# -----------------------------
+class Command(BaseCommand):
+    help = (
+        "Load test: N slow clients stream a media file while we time now.json. "
+        "Run it against `gunicorn config.wsgi` and then the ASGI worker to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Server to hit.")
+        parser.add_argument("--media", required=True, help="Media path, e.g. /media/videos/big.mp4")
+        parser.add_argument("--now", default="/now.json", help="Path of the JSON endpoint to time.")
+        parser.add_argument("--slow-clients", type=int, default=8, help="How many slow streamers.")
+        parser.add_argument("--read-bps", type=int, default=64 * 1024, help="Bytes/sec each slow client drains.")
+        parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run.")
+        parser.add_argument("--interval", type=float, default=0.25, help="Seconds between now.json probes.")
+        parser.add_argument("--timeout", type=float, default=10.0, help="Probe timeout (counts as failed).")
+
+    def handle(self, *args, **opts):
+        base = urlparse(opts["base_url"])
+        if base.scheme != "http" or not base.hostname:
+            raise CommandError("--base-url must be http://host:port")
+
+        host = base.hostname
+        port = base.port or 80
+        now_url = opts["base_url"].rstrip("/") + opts["now"]
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats = {"slow_bytes": 0, "slow_failed": 0}
+
+        readers = [
+            threading.Thread(
+                target=slow_reader,
+                args=(host, port, opts["media"], opts["read_bps"], stop, stats, lock),
+                daemon=True,
+            )
+            for _ in range(opts["slow_clients"])
+        ]
+        for t in readers:
+            t.start()
+
+        # let the streams get going so they actually hold whatever they hold
+        time.sleep(1.0)
+
+        latencies = []
+        failed = 0
+        deadline = time.monotonic() + opts["duration"]
+        while time.monotonic() < deadline:
+            dt = time_request(now_url, opts["timeout"])
+            if dt is None:
+                failed += 1
+            else:
+                latencies.append(dt)
+            time.sleep(opts["interval"])
+
+        stop.set()
+        for t in readers:
+            t.join(timeout=2)
+
+        self.stdout.write("=== MEDIA LOAD TEST ===")
+        self.stdout.write(f"Slow clients: {opts['slow_clients']} @ {opts['read_bps']} B/s "
+                          f"(connect failures: {stats['slow_failed']}, drained: {stats['slow_bytes']} bytes)")
+        self.stdout.write(f"now.json probes: ok={len(latencies)} failed/timeout={failed}")
+        if latencies:
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(
+                f"latency ms: p50={statistics.median(latencies) * 1000:.1f} "
+                f"p95={p95 * 1000:.1f} max={latencies[-1] * 1000:.1f}"
+            )
+        if failed and not latencies:
+            self.stdout.write(self.style.ERROR("now.json was fully starved."))
@@ -0,0 +1,94 @@
+import os
+import random
+import re
+import string
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from freestyle import moderation
+
+
+class Command(BaseCommand):
+    help = (
+        "Chat moderation throughput: synthetic banned-term list and messages, scanned with the "
+        "Aho-Corasick filter (moderation.py) vs one regex per term and one big alternation regex. "
+        "Also checks that editing the term file is picked up without a restart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--terms", type=int, default=10_000)
+        parser.add_argument("--messages", type=int, default=20_000)
+        parser.add_argument("--hit-rate", type=float, default=0.05, help="share of messages containing a term")
+        parser.add_argument("--naive-sample", type=int, default=200, help="messages run through the per-term loop")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **o):
+        rng = random.Random(o["seed"])
+        words = [self._word(rng) for _ in range(o["terms"])]
+        lines = [w if i % 10 else f"{w}*" for i, w in enumerate(words)]
+        vocab = [self._word(rng) for _ in range(2000)]
+        messages = []
+        for _ in range(o["messages"]):
+            msg = [rng.choice(vocab) for _ in range(rng.randint(3, 16))]
+            if rng.random() < o["hit_rate"]:
+                msg[rng.randrange(len(msg))] = self._leet(rng, rng.choice(words))
+            messages.append(" ".join(msg))
+
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("\n".join(lines) + "\n")
+            path = f.name
+        try:
+            with override_settings(
+                CHAT_BANNED_TERMS_FILE=path, CHAT_BANNED_TERMS=[], CHAT_MODERATION_RELOAD_SECONDS=0
+            ):
+                t0 = time.perf_counter()
+                ac = moderation.reload()
+                self.stdout.write(f"compile: {len(lines)} terms, {len(ac.goto)} states, {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+                t0 = time.perf_counter()
+                hits = sum(1 for m in messages if moderation.apply(m) is None)
+                elapsed = time.perf_counter() - t0
+                self.stdout.write(
+                    f"automaton: {len(messages) / elapsed:,.0f} msg/s, {elapsed * 1e6 / len(messages):.1f} µs/msg, "
+                    f"{hits} blocked ({hits / len(messages) * 100:.1f}%)"
+                )
+
+                sample = messages[: o["naive_sample"]]
+                patterns = [re.compile(rf"\b{re.escape(w)}\b") for w in words]
+                t0 = time.perf_counter()
+                naive_hits = sum(1 for m in sample if any(p.search(moderation.normalize_fast(m)) for p in patterns))
+                elapsed = time.perf_counter() - t0
+                auto_hits = sum(1 for m in sample if moderation.apply(m) is None)
+                self.stdout.write(
+                    f"regex per term: {len(sample) / elapsed:,.0f} msg/s on {len(sample)} messages "
+                    f"({naive_hits} blocked, automaton {auto_hits})"
+                )
+
+                big = re.compile(r"\b(?:" + "|".join(map(re.escape, sorted(words, key=len, reverse=True))) + r")\b")
+                t0 = time.perf_counter()
+                big_hits = sum(1 for m in messages if big.search(moderation.normalize_fast(m)))
+                elapsed = time.perf_counter() - t0
+                self.stdout.write(f"one alternation regex: {len(messages) / elapsed:,.0f} msg/s ({big_hits} blocked)")
+
+                probe = "totally fine zzqxj message"
+                assert moderation.apply(probe) == probe
+                with open(path, "a") as f:
+                    f.write("zzqxj\n")
+                os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+                blocked = moderation.apply(probe) is None
+                self.stdout.write(f"hot reload: new term {'applied' if blocked else 'NOT applied'} without restart")
+        finally:
+            os.unlink(path)
+            moderation.reload()
+
+    @staticmethod
+    def _word(rng) -> str:
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+
+    @staticmethod
+    def _leet(rng, word: str) -> str:
+        swap = {"o": "0", "i": "1", "e": "3", "a": "4", "s": "$", "t": "7"}
+        return "".join(swap[c] if c in swap and rng.random() < 0.5 else c.upper() if rng.random() < 0.2 else c for c in word)
@@ -0,0 +1,48 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from freestyle.fmp4 import SegmenterError
+from freestyle.models import FreestyleVideo
+from freestyle.services.packaging import package_video_cmaf
+
+
+class Command(BaseCommand):
+    help = "Repackage uploaded MP4s into fMP4/CMAF segments + a VOD playlist (no re-encode)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--video", type=int, required=False, help="Video ID to package.")
+        parser.add_argument("--all", action="store_true", help="Package every local MP4 that isn't packaged yet.")
+        parser.add_argument("--force", action="store_true", help="Re-package even if cmaf_playlist is set.")
+        parser.add_argument("--target", type=float, default=0, help="Target segment seconds (default HLS_SEGMENT_SECONDS).")
+
+    def handle(self, *args, **opts):
+        qs = FreestyleVideo.objects.filter(is_hls=False).exclude(video_file="").exclude(video_file=None).order_by("id")
+        if opts.get("video"):
+            qs = qs.filter(id=int(opts["video"]))
+        elif not opts.get("all"):
+            raise CommandError("Provide --video <id> or --all")
+
+        packaged = skipped = failed = 0
+        for v in qs:
+            if v.cmaf_playlist and not opts["force"]:
+                skipped += 1
+                continue
+            try:
+                if not os.path.exists(v.video_file.path):
+                    self.stdout.write(f"FAIL id={v.id} '{v.title}' (missing file on disk)")
+                    failed += 1
+                    continue
+                result = package_video_cmaf(v, target=opts["target"] or None)
+            except (SegmenterError, OSError) as e:
+                self.stdout.write(f"FAIL id={v.id} '{v.title}' => {e}")
+                failed += 1
+                continue
+
+            self.stdout.write(f"OK id={v.id} segments={len(result.segments)} -> {v.cmaf_playlist}")
+            packaged += 1
+
+        self.stdout.write("\n=== SUMMARY ===")
+        self.stdout.write(f"Packaged: {packaged}")
+        self.stdout.write(f"Skipped:  {skipped}")
+        self.stdout.write(f"Failed:   {failed}")
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from freestyle import prefetch
+
+
+class Command(BaseCommand):
+    help = "Warm the OS page cache for upcoming schedule items (runs until interrupted)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds between schedule checks.")
+        parser.add_argument("--lead", type=float, default=None, help="Override PREFETCH_LEAD_SECONDS.")
+        parser.add_argument("--items", type=int, default=None, help="Override PREFETCH_ITEMS.")
+        parser.add_argument("--once", action="store_true", help="Single pass, then exit.")
+
+    def handle(self, *args, **options):
+        lead = options["lead"]
+        count = options["items"]
+
+        while True:
+            for r in prefetch.warm_upcoming(lead=lead, count=count):
+                eta = r.start_epoch - time.time()
+                self.stdout.write(
+                    f"{r.channel}: warmed video {r.item_id} "
+                    f"({r.files} files, {r.bytes / 1e6:.1f} MB), airs in {eta:.0f}s"
+                )
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
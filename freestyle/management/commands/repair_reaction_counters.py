@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from freestyle import reactions, timeline
+from freestyle.models import Channel
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute ReactionCounter totals from VideoReaction and fix rows that drifted. "
+        "Votes landing mid-run can leave a row off by a few; run again to settle."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--channel", help="channel slug (default: all)")
+        parser.add_argument("--dry-run", action="store_true", help="report drift without writing")
+        parser.add_argument(
+            "--timelines", action="store_true", help="also rebuild per-second timelines (scans every vote)"
+        )
+
+    def handle(self, *args, **o):
+        channel_id = None
+        if o["channel"]:
+            channel_id = Channel.objects.filter(slug=o["channel"]).values_list("id", flat=True).first()
+            if channel_id is None:
+                raise CommandError(f"no channel {o['channel']!r}")
+
+        drift = reactions.repair(channel_id, dry_run=o["dry_run"])
+        for ch, vid, stored, actual in drift:
+            self.stdout.write(f"channel {ch} video {vid}: stored {stored} actual {actual}")
+        verb = "would fix" if o["dry_run"] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"{len(drift)} counter(s) {verb}") if drift else "counters match")
+
+        if o["timelines"] and not o["dry_run"]:
+            self.stdout.write(f"rebuilt {timeline.rebuild(channel_id)} timeline(s)")
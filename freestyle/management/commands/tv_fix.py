@@ -2,12 +2,12 @@ import os
 import json
 import subprocess
 import shutil
-import struct
 
 from django.core.management.base import BaseCommand
 from django.conf import settings
 
 from freestyle.models import Channel, ChannelEntry, FreestyleVideo
+from freestyle.mp4 import mp4_duration_seconds
 
 
 # -----------------------------
@@ -43,141 +43,6 @@ def ffprobe_duration_seconds(path: str) -> int | None:
         return None
 
 
-def _read_u32(f):
-    b = f.read(4)
-    if len(b) != 4:
-        return None
-    return struct.unpack(">I", b)[0]
-
-
-def _read_u64(f):
-    b = f.read(8)
-    if len(b) != 8:
-        return None
-    return struct.unpack(">Q", b)[0]
-
-
-def _read_atom_header(f):
-    """
-    Returns (atom_type, atom_size, header_size) or (None, None, None) on EOF.
-    """
-    start = f.tell()
-    size = _read_u32(f)
-    if size is None:
-        return None, None, None
-    atype = f.read(4)
-    if len(atype) != 4:
-        return None, None, None
-    atype = atype.decode("latin1")
-    header = 8
-
-    if size == 1:
-        size64 = _read_u64(f)
-        if size64 is None:
-            return None, None, None
-        size = size64
-        header = 16
-
-    if size < header:
-        return None, None, None
-
-    return atype, int(size), header
-
-
-def mp4_duration_seconds(path: str) -> int | None:
-    """
-    Pure-Python MP4 duration from moov/mvhd.
-    Works for standard MP4/MOV. No ffmpeg needed.
-    Returns seconds or None if not found.
-    """
-    try:
-        with open(path, "rb") as f:
-            # Walk top-level atoms until we find 'moov'
-            while True:
-                atype, size, header = _read_atom_header(f)
-                if atype is None:
-                    break
-
-                payload_start = f.tell()
-                payload_size = size - header
-
-                if atype == "moov":
-                    # Read moov payload into memory (usually small)
-                    moov = f.read(payload_size)
-                    return _mvhd_duration_from_moov_bytes(moov)
-
-                # Skip this atom
-                f.seek(payload_start + payload_size)
-    except Exception:
-        return None
-
-    return None
-
-
-def _mvhd_duration_from_moov_bytes(moov: bytes) -> int | None:
-    """
-    Parse nested atoms inside moov to find mvhd and compute seconds.
-    """
-    i = 0
-    n = len(moov)
-
-    def read_u32(buf, off):
-        if off + 4 > len(buf):
-            return None
-        return struct.unpack(">I", buf[off:off+4])[0]
-
-    def read_u64(buf, off):
-        if off + 8 > len(buf):
-            return None
-        return struct.unpack(">Q", buf[off:off+8])[0]
-
-    while i + 8 <= n:
-        size = read_u32(moov, i)
-        if size is None:
-            return None
-        atype = moov[i+4:i+8].decode("latin1")
-        header = 8
-        if size == 1:
-            size64 = read_u64(moov, i+8)
-            if size64 is None:
-                return None
-            size = size64
-            header = 16
-
-        if size < header or i + size > n:
-            return None
-
-        if atype == "mvhd":
-            mvhd = moov[i+header:i+size]
-            if len(mvhd) < 16:
-                return None
-
-            version = mvhd[0]
-            # flags = mvhd[1:4]
-
-            if version == 0:
-                # creation(4) mod(4) timescale(4) duration(4)
-                if len(mvhd) < 4 + 4 + 4 + 4 + 4:
-                    return None
-                timescale = struct.unpack(">I", mvhd[12:16])[0]
-                duration = struct.unpack(">I", mvhd[16:20])[0]
-            else:
-                # version 1: creation(8) mod(8) timescale(4) duration(8)
-                if len(mvhd) < 4 + 8 + 8 + 4 + 8:
-                    return None
-                timescale = struct.unpack(">I", mvhd[20:24])[0]
-                duration = struct.unpack(">Q", mvhd[24:32])[0]
-
-            if timescale <= 0:
-                return None
-            sec = int(round(duration / timescale))
-            return max(1, sec)
-
-        i += int(size)
-
-    return None
-
-
 def best_duration_seconds(path: str) -> tuple[int | None, str]:
     """
     Try ffprobe first (if available), otherwise MP4 parser.
@@ -0,0 +1,236 @@
+import bisect
+import math
+import random
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from freestyle import polling
+from freestyle.models import Channel
+from freestyle.schedule import compiled_schedule, preload_at
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a swarm of TVs across schedule boundaries and compare per-second "
+        "request load: poll-and-discover (old tv.js) vs next/prefetch handoff. "
+        "With --requests, replay one viewer-minute of tv.js polling against the real views instead: "
+        "separate now/reactions/presence/chat timers vs one tick.json. "
+        "With --adaptive, compare tick.json QPS at the fixed interval vs the server's next_poll_ms hints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--channel", default="", help="Channel slug (default: is_default / first).")
+        parser.add_argument("--viewers", type=int, default=2000)
+        parser.add_argument("--seconds", type=float, default=0, help="Simulated span (default: one rotation, min 60s).")
+        parser.add_argument("--poll-ms", type=int, default=2500, help="tv.js now.json interval.")
+        parser.add_argument("--media-requests", type=int, default=2,
+                            help="Range requests a player makes to start an item (head + first data).")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--requests", action="store_true",
+                            help="Measure requests, queries and server time per viewer-minute, timers vs tick.json.")
+        parser.add_argument("--chat-per-minute", type=float, default=6,
+                            help="Messages a minute (each one ends a parked chat long-poll).")
+        parser.add_argument("--adaptive", action="store_true",
+                            help="Compare fixed --poll-ms ticks with next_poll_ms hints across chat/load scenarios.")
+
+    def handle(self, *args, **o):
+        slug = o["channel"].strip()
+        ch = (
+            Channel.objects.filter(slug=slug).first() if slug
+            else Channel.objects.filter(is_default=True).first() or Channel.objects.first()
+        )
+        if not ch:
+            raise CommandError("no channel")
+        sched = compiled_schedule(ch)
+        if not sched.items:
+            raise CommandError(f"{ch.slug}: nothing with a duration to schedule")
+        if o["requests"]:
+            self._requests(ch, sched, o)
+            return
+        if o["adaptive"]:
+            self._adaptive(ch, sched, o)
+            return
+
+        rng = random.Random(o["seed"])
+        poll = o["poll_ms"] / 1000.0
+        span = o["seconds"] or max(60.0, float(sched.total))
+        t0 = time.time()
+        t1 = t0 + span
+
+        window = float(getattr(settings, "NEXT_PRELOAD_WINDOW_SECONDS", 20))
+        min_lead = float(getattr(settings, "NEXT_PRELOAD_MIN_LEAD_SECONDS", 3))
+
+        # every (current slot, next slot) boundary inside the span
+        boundaries = []
+        slot = sched.at(t0)
+        while slot:
+            nxt = sched.following(slot)
+            if nxt.start_epoch > t1:
+                break
+            boundaries.append((slot, nxt))
+            slot = nxt
+
+        old = Counter()
+        new = Counter()
+        old_media = Counter()
+        new_media = Counter()
+        m = o["media_requests"]
+
+        for _ in range(o["viewers"]):
+            sid = uuid.UUID(int=rng.getrandbits(128)).hex
+            phase = rng.uniform(0, poll)
+
+            # now.json polls: identical in both modes
+            t = t0 + phase
+            while t < t1:
+                sec = int(t - t0)
+                old[sec] += 1
+                new[sec] += 1
+                t += poll
+
+            for cur, nxt in boundaries:
+                # old: the first poll after the boundary discovers it and fetches ranges
+                k = -(-(nxt.start_epoch - t0 - phase) // poll)
+                sec = int(phase + k * poll)
+                old_media[sec] += m
+                old[sec] += m
+
+                # new: ranges fetched at the jittered preload moment, switch is local
+                sec = int(preload_at(cur, nxt, sid, window, min_lead) - t0)
+                new_media[sec] += m
+                new[sec] += m
+
+        def peak(c):
+            return max(c.values(), default=0)
+
+        def mean(c):
+            return sum(c.values()) / max(1, int(span))
+
+        self.stdout.write(
+            f"{ch.slug}: {o['viewers']} viewers, {span:.0f}s simulated, {len(boundaries)} boundaries, "
+            f"poll {poll:.1f}s, preload window {window:.0f}s (min lead {min_lead:.0f}s)"
+        )
+        self.stdout.write(f"{'':14}{'peak rps':>10}{'mean rps':>10}{'peak media':>12}")
+        for label, total, media in (("poll+discover", old, old_media), ("next/prefetch", new, new_media)):
+            self.stdout.write(f"{label:14}{peak(total):>10}{mean(total):>10.0f}{peak(media):>12}")
+
+        if peak(old_media):
+            self.stdout.write(self.style.SUCCESS(
+                f"media peak reduced {peak(old_media) / max(1, peak(new_media)):.1f}x, "
+                f"total peak {peak(old) / max(1, peak(new)):.1f}x"
+            ))
+
+    def _requests(self, ch, sched, o):
+        """One viewer-minute of tv.js polling, without a chat socket, old timers vs tick.json."""
+        poll = o["poll_ms"] / 1000.0
+        polls = math.ceil(60 / poll)
+        # long-polls return on each message or after 25 s, and are re-issued at once
+        longpolls = math.ceil(60 / 25 + o["chat_per_minute"])
+        sid = uuid.uuid4().hex
+        vid = sched.at().item.id
+        base = f"/api/freestyle/channel/{ch.slug}"
+        headers = {"HTTP_X_CLIENT_ID": f"swarm-{sid}"}
+
+        timers = (
+            [f"{base}/now.json?sid={sid}"] * polls
+            + [f"{base}/reactions/state.json?video_id={vid}"] * polls
+            + [f"/api/freestyle/presence/ping.json?sid={sid}&channel={ch.slug}"] * math.ceil(60 / 10)
+            + [f"{base}/chat/messages.json?after_id=0"] * longpolls  # parked part not timed
+        )
+        tick = [f"{base}/tick.json?sid={sid}&after_id=0&video_id={vid}"] * polls
+
+        client = Client()
+        self.stdout.write(
+            f"{ch.slug}: one viewer-minute, poll {poll:.1f}s, {o['chat_per_minute']:g} chat msgs/min, no socket"
+        )
+        self.stdout.write(f"{'':10}{'requests':>10}{'queries':>10}{'server ms':>11}")
+        rows = {}
+        for label, urls in (("timers", timers), ("tick", tick)):
+            for url in urls[:3]:  # warm caches / compiled schedule
+                client.get(url, **headers)
+            queries = 0
+
+            def count(execute, sql, params, many, context):
+                nonlocal queries
+                queries += 1
+                return execute(sql, params, many, context)
+
+            t0 = time.perf_counter()
+            with connection.execute_wrapper(count):
+                for url in urls:
+                    resp = client.get(url, **headers)
+                    if resp.status_code != 200:
+                        raise CommandError(f"{url}: {resp.status_code}")
+            ms = (time.perf_counter() - t0) * 1000
+            rows[label] = (len(urls), queries, ms)
+            self.stdout.write(f"{label:10}{len(urls):>10}{queries:>10}{ms:>11.1f}")
+
+        (r0, q0, m0), (r1, q1, m1) = rows["timers"], rows["tick"]
+        self.stdout.write(self.style.SUCCESS(
+            f"requests {r0 / r1:.1f}x fewer, queries {q0 / max(1, q1):.1f}x fewer, server time {m0 / max(m1, 1e-9):.1f}x less"
+        ))
+
+    def _adaptive(self, ch, sched, o):
+        """tick.json QPS for the swarm: fixed interval vs polling.compute() hints, per scenario."""
+        rng = random.Random(o["seed"])
+        poll = o["poll_ms"] / 1000.0
+        span = o["seconds"] or max(600.0, float(sched.total))
+        t0 = time.time()
+        t1 = t0 + span
+        starts = []
+        slot = sched.at(t0)
+        while slot and slot.end_epoch < t1:
+            slot = sched.following(slot)
+            starts.append(slot.start_epoch)
+        sids = [uuid.UUID(int=rng.getrandbits(128)).hex for _ in range(o["viewers"])]
+
+        # (label, chat msgs/min, clients read chat by polling, worker p95 ms)
+        scenarios = (
+            ("quiet chat", 0, False, 40),
+            ("chatty, socket", o["chat_per_minute"], False, 40),
+            ("busy, no socket", 40, True, 40),
+            ("quiet, p95 400ms", 0, False, 400),
+            ("chatty, p95 800ms", o["chat_per_minute"], False, 800),
+        )
+
+        def run(hint):
+            """(mean rps, peak rps, mean seconds from a boundary to each viewer's next poll)."""
+            per_sec = Counter()
+            lag, lags = 0.0, 0
+            for sid in sids:
+                t = t0 + rng.uniform(0, poll)
+                seen = bisect.bisect_right(starts, t)
+                while t < t1:
+                    per_sec[int(t - t0)] += 1
+                    i = bisect.bisect_right(starts, t)
+                    for b in starts[seen:i]:
+                        lag += t - b
+                        lags += 1
+                    seen = i
+                    boundary_in = starts[i] - t if i < len(starts) else None
+                    t += hint(sid, boundary_in) / 1000.0
+            return sum(per_sec.values()) / span, max(per_sec.values(), default=0), lag / max(1, lags)
+
+        self.stdout.write(
+            f"{ch.slug}: {o['viewers']} viewers, {span:.0f}s simulated, {len(starts)} boundaries, "
+            f"fixed poll {poll:.1f}s vs next_poll_ms (+0-15% client jitter)"
+        )
+        self.stdout.write(f"{'':18}{'mean rps':>10}{'peak rps':>10}{'boundary lag s':>16}")
+        fixed = run(lambda sid, boundary_in: poll * 1000)
+        self.stdout.write(f"{'fixed':18}{fixed[0]:>10.0f}{fixed[1]:>10}{fixed[2]:>16.2f}")
+        for label, per_minute, chat_polling, p95 in scenarios:
+            per_minute = per_minute if chat_polling or not per_minute else None
+
+            def hint(sid, boundary_in):
+                ms = polling.compute(chat_per_minute=per_minute, p95_ms=p95, boundary_in=boundary_in, sid=sid)
+                return ms * (1 + rng.random() * 0.15)
+
+            mean, peak, lag = run(hint)
+            self.stdout.write(f"{label:18}{mean:>10.0f}{peak:>10}{lag:>16.2f}   {mean / fixed[0] - 1:+.0%} qps")
+
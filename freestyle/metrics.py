@@ -0,0 +1,116 @@
+# freestyle/metrics.py
+"""
+Tiny metrics registry backed by the Django cache.
+
+Counters and fixed-bucket latency histograms are plain cache integers, so
+every process (web workers, management commands) adds into the same
+numbers when CACHES points at a shared backend. With the default LocMem
+cache they are per-process, which is still fine for local debugging, except
+for metrics only another process writes (OTHER_PROCESS): the snapshot marks
+those "unavailable" instead of reporting a misleading 0.
+
+Every metric is declared in METRICS so the snapshot (metrics.json) knows
+what to read without scanning the cache.
+"""
+from __future__ import annotations
+
+from django.core.cache import cache
+
+from . import caches
+
+
+PREFIX = "freestyle:metrics:"
+TIMEOUT = None  # never expire; counters are monotonic
+
+# Upper bounds (ms) of latency buckets; the last bucket is "+Inf".
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+
+METRICS: dict[str, tuple[str, str]] = {
+    # prefetch.py
+    "prefetch.warmed_bytes": (COUNTER, "Bytes hinted into the page cache ahead of airings"),
+    "prefetch.warmed_items": (COUNTER, "Upcoming airings warmed"),
+    # config/range_media.py
+    "media.first_byte_ms": (HISTOGRAM, "Time to first media byte for reads at the head of a file"),
+}
+
+# written outside the web workers (manage.py prefetch_warmer)
+OTHER_PROCESS = {"prefetch.warmed_bytes", "prefetch.warmed_items"}
+
+
+def _key(name: str, suffix: str = "") -> str:
+    return f"{PREFIX}{name}{(':' + suffix) if suffix else ''}"
+
+
+def incr(name: str, amount: int = 1) -> None:
+    if amount <= 0:
+        return
+    key = _key(name)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # first write: add() so two racing processes don't both reset it
+        if not cache.add(key, amount, timeout=TIMEOUT):
+            cache.incr(key, amount)
+
+
+def observe(name: str, value_ms: float) -> None:
+    for bound in BUCKETS_MS:
+        if value_ms <= bound:
+            _bucket_incr(name, str(bound))
+            break
+    else:
+        _bucket_incr(name, "inf")
+
+
+def _bucket_incr(name: str, bucket: str) -> None:
+    key = _key(name, bucket)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=TIMEOUT):
+            cache.incr(key)
+
+
+def _histogram(name: str) -> dict:
+    labels = [str(b) for b in BUCKETS_MS] + ["inf"]
+    raw = cache.get_many([_key(name, b) for b in labels])
+    counts = [int(raw.get(_key(name, b)) or 0) for b in labels]
+    total = sum(counts)
+
+    def quantile(q: float):
+        if not total:
+            return None
+        need = q * total
+        seen = 0
+        for label, c in zip(labels, counts):
+            seen += c
+            if seen >= need:
+                return None if label == "inf" else int(label)
+        return None
+
+    return {
+        "count": total,
+        "buckets": dict(zip(labels, counts)),
+        "p50_ms_le": quantile(0.50),
+        "p95_ms_le": quantile(0.95),
+        "p99_ms_le": quantile(0.99),
+    }
+
+
+def snapshot() -> dict:
+    counters = [n for n, (kind, _) in METRICS.items() if kind == COUNTER]
+    raw = cache.get_many([_key(n) for n in counters])
+
+    shared = caches.is_shared()
+    out = {}
+    for name, (kind, help_text) in METRICS.items():
+        if not shared and name in OTHER_PROCESS:
+            out[name] = {"type": kind, "help": help_text, "unavailable": "needs a shared cache (REDIS_URL)"}
+        elif kind == COUNTER:
+            out[name] = {"type": kind, "help": help_text, "value": int(raw.get(_key(name)) or 0)}
+        else:
+            out[name] = {"type": kind, "help": help_text, **_histogram(name)}
+    return out
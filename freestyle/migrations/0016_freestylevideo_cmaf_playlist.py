@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freestyle', '0015_autofix_missing_db_schema'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='freestylevideo',
+            name='cmaf_playlist',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freestyle', '0016_freestylevideo_cmaf_playlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewerSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour'), ('day', 'Day')], max_length=6)),
+                ('bucket_start', models.DateTimeField(db_index=True)),
+                ('registers', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='viewer_sketches', to='freestyle.channel')),
+                ('video', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='viewer_sketches', to='freestyle.freestylevideo')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('video__isnull', True)), fields=('channel', 'resolution', 'bucket_start'), name='uniq_channel_viewer_sketch'), models.UniqueConstraint(condition=models.Q(('video__isnull', False)), fields=('channel', 'video', 'resolution', 'bucket_start'), name='uniq_video_viewer_sketch')],
+            },
+        ),
+    ]
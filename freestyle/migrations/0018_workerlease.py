@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freestyle', '0017_viewersketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=80, unique=True)),
+                ('owner', models.CharField(blank=True, default='', max_length=120)),
+                ('expires_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freestyle', '0018_workerlease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoAiring',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(db_index=True)),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('peak_viewers', models.PositiveIntegerField(default=0)),
+                ('avg_viewers', models.FloatField(default=0)),
+                ('unique_viewers', models.PositiveIntegerField(default=0)),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='airings', to='freestyle.channel')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='airings', to='freestyle.freestylevideo')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'unique_together': {('channel', 'video', 'started_at')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ViewerRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('peak', models.BinaryField()),
+                ('avg', models.BinaryField()),
+                ('day_peak', models.PositiveIntegerField(default=0)),
+                ('day_avg', models.FloatField(default=0)),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='viewer_rollups', to='freestyle.channel')),
+            ],
+            options={
+                'unique_together': {('channel', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freestyle', '0019_viewerrollup_videoairing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='seq',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['channel', 'seq'], name='freestyle_c_channel_7966d3_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freestyle', '0020_chatmessage_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='channel',
+            name='chat_retention_days',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
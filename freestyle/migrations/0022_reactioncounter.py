@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill(apps, schema_editor):
+    VideoReaction = apps.get_model("freestyle", "VideoReaction")
+    ReactionCounter = apps.get_model("freestyle", "ReactionCounter")
+    rows = VideoReaction.objects.values("channel_id", "video_id").annotate(
+        fire=Count("id", filter=Q(reaction="fire")),
+        nah=Count("id", filter=Q(reaction="nah")),
+    )
+    ReactionCounter.objects.bulk_create(
+        [ReactionCounter(**r) for r in rows.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freestyle', '0021_channel_chat_retention_days'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactionCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fire', models.PositiveIntegerField(default=0)),
+                ('nah', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reaction_counters', to='freestyle.channel')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reaction_counters', to='freestyle.freestylevideo')),
+            ],
+            options={
+                'unique_together': {('channel', 'video')},
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freestyle', '0022_reactioncounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videoreaction',
+            name='offset_seconds',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ReactionTimeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fire', models.BinaryField(default=b'')),
+                ('nah', models.BinaryField(default=b'')),
+                ('seconds', models.PositiveIntegerField(default=0)),
+                ('fire_total', models.PositiveIntegerField(default=0)),
+                ('nah_total', models.PositiveIntegerField(default=0)),
+                ('peak_fire', models.PositiveIntegerField(default=0)),
+                ('peak_at', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reaction_timelines', to='freestyle.channel')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reaction_timelines', to='freestyle.freestylevideo')),
+            ],
+            options={
+                'unique_together': {('channel', 'video')},
+            },
+        ),
+    ]
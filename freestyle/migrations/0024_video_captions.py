@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freestyle', '0023_reaction_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='freestylevideo',
+            name='captions',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='freestylevideo',
+            name='captions_model',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='freestylevideo',
+            name='captions_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freestyle', '0024_video_captions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='freestylevideo',
+            name='captions_bin',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def move_captions(apps, schema_editor):
+    FreestyleVideo = apps.get_model("freestyle", "FreestyleVideo")
+    VideoCaptions = apps.get_model("freestyle", "VideoCaptions")
+    rows = FreestyleVideo.objects.filter(captions__isnull=False).values_list(
+        "id", "captions", "captions_bin", "captions_model", "captions_updated_at"
+    )
+    VideoCaptions.objects.bulk_create(
+        [
+            VideoCaptions(video_id=vid, data=data, compiled=blob, source_model=model or "", updated_at=at or timezone.now())
+            for vid, data, blob, model, at in rows.iterator()
+        ],
+        batch_size=100,
+    )
+
+
+def restore_captions(apps, schema_editor):
+    FreestyleVideo = apps.get_model("freestyle", "FreestyleVideo")
+    VideoCaptions = apps.get_model("freestyle", "VideoCaptions")
+    for c in VideoCaptions.objects.iterator():
+        FreestyleVideo.objects.filter(id=c.video_id).update(
+            captions=c.data, captions_bin=c.compiled, captions_model=c.source_model, captions_updated_at=c.updated_at
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freestyle', '0025_video_captions_bin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoCaptions',
+            fields=[
+                ('video', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='caption_track', serialize=False, to='freestyle.freestylevideo')),
+                ('data', models.JSONField()),
+                ('compiled', models.BinaryField(blank=True, null=True)),
+                ('source_model', models.CharField(blank=True, default='', max_length=50)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(move_captions, restore_captions),
+        migrations.RemoveField(
+            model_name='freestylevideo',
+            name='captions',
+        ),
+        migrations.RemoveField(
+            model_name='freestylevideo',
+            name='captions_bin',
+        ),
+        migrations.RemoveField(
+            model_name='freestylevideo',
+            name='captions_model',
+        ),
+        migrations.RemoveField(
+            model_name='freestylevideo',
+            name='captions_updated_at',
+        ),
+    ]
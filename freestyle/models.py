@@ -17,6 +17,10 @@ class Channel(models.Model):
     # All viewers share this, so refresh doesn’t restart.
     schedule_started_at = models.DateTimeField(default=timezone.now)
 
+    # Chat older than this many days moves to the gzip archive (chat_archive.py).
+    # Empty = CHAT_RETENTION_DAYS; 0 keeps everything in the table.
+    chat_retention_days = models.PositiveIntegerField(null=True, blank=True)
+
     def __str__(self):
         return self.name
 
@@ -49,6 +53,9 @@ class FreestyleVideo(models.Model):
     duration_seconds = models.PositiveIntegerField(default=0)
     is_hls = models.BooleanField(default=False)
 
+    # fMP4/CMAF rendition of video_file (set by `manage.py package_cmaf`)
+    cmaf_playlist = models.CharField(max_length=500, blank=True, default="")
+
     def __str__(self):
         return self.title
 
@@ -91,6 +98,27 @@ class FreestyleVideo(models.Model):
         super().save(*args, **kwargs)
 
 
+class VideoCaptions(models.Model):
+    """
+    Word-level captions of a video (set by `manage.py generate_captions`).
+    A side table so the schedule and now/tick queries on FreestyleVideo
+    never load transcripts; only the captions views read it.
+    """
+
+    video = models.OneToOneField(
+        FreestyleVideo, primary_key=True, on_delete=models.CASCADE, related_name="caption_track"
+    )
+    # sorted parallel arrays, see captions.py
+    data = models.JSONField()
+    # the same compiled for TVs (captions_bin.py)
+    compiled = models.BinaryField(null=True, blank=True)
+    source_model = models.CharField(max_length=50, blank=True, default="")
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"captions of {self.video_id}"
+
+
 class ChannelEntry(models.Model):
     channel = models.ForeignKey(Channel, on_delete=models.CASCADE, related_name="entries")
     video = models.ForeignKey(FreestyleVideo, on_delete=models.CASCADE, related_name="channel_entries")
@@ -114,9 +142,12 @@ class ChatMessage(models.Model):
     username = models.CharField(max_length=60)
     message = models.CharField(max_length=280)
     created_at = models.DateTimeField(auto_now_add=True)
+    # provisional order handed to the sender before the batched insert (chat_ingest.py)
+    seq = models.PositiveBigIntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ["id"]
+        indexes = [models.Index(fields=["channel", "seq"])]
 
     def __str__(self):
         return f"{self.username}: {self.message[:40]}"
@@ -142,9 +173,146 @@ class VideoReaction(models.Model):
     client_id = models.CharField(max_length=120)
     reaction = models.CharField(max_length=10, choices=REACTION_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
+    # seconds into the video when the vote was cast (timeline.py); null off-air
+    offset_seconds = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
         unique_together = [("channel", "video", "client_id")]
 
     def __str__(self):
         return f"{self.video_id} {self.client_id} {self.reaction}"
+
+
+class ReactionCounter(models.Model):
+    """
+    Vote totals per (channel, video), kept in step with VideoReaction by
+    reactions.record() so polls don't COUNT; repair_reaction_counters
+    recomputes them.
+    """
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE, related_name="reaction_counters")
+    video = models.ForeignKey(FreestyleVideo, on_delete=models.CASCADE, related_name="reaction_counters")
+    fire = models.PositiveIntegerField(default=0)
+    nah = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("channel", "video")]
+
+    def __str__(self):
+        return f"{self.channel_id}/{self.video_id} fire={self.fire} nah={self.nah}"
+
+
+class ReactionTimeline(models.Model):
+    """
+    Votes on a video per second of the video, summed over its airings on a
+    channel: little-endian uint32 arrays, index = offset_seconds
+    (timeline.py). peak_* summarize the hottest REACTION_PEAK_WINDOW seconds.
+    """
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE, related_name="reaction_timelines")
+    video = models.ForeignKey(FreestyleVideo, on_delete=models.CASCADE, related_name="reaction_timelines")
+    fire = models.BinaryField(default=b"")
+    nah = models.BinaryField(default=b"")
+    seconds = models.PositiveIntegerField(default=0)
+    fire_total = models.PositiveIntegerField(default=0)
+    nah_total = models.PositiveIntegerField(default=0)
+    peak_fire = models.PositiveIntegerField(default=0)
+    peak_at = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("channel", "video")]
+
+    def __str__(self):
+        return f"{self.channel_id}/{self.video_id} {self.seconds}s fire={self.fire_total}"
+
+
+class ViewerSketch(models.Model):
+    """
+    HyperLogLog registers (see hll.py) of the viewer sids seen on a channel
+    (video=None) or on one video aired on it, during one minute/hour/day.
+    """
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+    RESOLUTION_CHOICES = [(MINUTE, "Minute"), (HOUR, "Hour"), (DAY, "Day")]
+
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE, related_name="viewer_sketches")
+    video = models.ForeignKey(
+        FreestyleVideo, null=True, blank=True, on_delete=models.CASCADE, related_name="viewer_sketches"
+    )
+    resolution = models.CharField(max_length=6, choices=RESOLUTION_CHOICES)
+    bucket_start = models.DateTimeField(db_index=True)
+    registers = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["channel", "resolution", "bucket_start"],
+                condition=models.Q(video__isnull=True),
+                name="uniq_channel_viewer_sketch",
+            ),
+            models.UniqueConstraint(
+                fields=["channel", "video", "resolution", "bucket_start"],
+                condition=models.Q(video__isnull=False),
+                name="uniq_video_viewer_sketch",
+            ),
+        ]
+
+    def __str__(self):
+        scope = f"video {self.video_id}" if self.video_id else "channel"
+        return f"{self.channel_id} {scope} {self.resolution} {self.bucket_start:%Y-%m-%d %H:%M}"
+
+
+class WorkerLease(models.Model):
+    """
+    Lock row for freestyle_worker leader election: whoever holds an unexpired
+    lease on `name` is the only node that runs that task.
+    """
+    name = models.CharField(max_length=80, unique=True)
+    owner = models.CharField(max_length=120, blank=True, default="")
+    expires_at = models.DateTimeField(default=timezone.now)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} -> {self.owner or '-'}"
+
+
+class ViewerRollup(models.Model):
+    """
+    One channel-day of concurrent-viewer history: per-minute peak and average
+    packed as 1440 little-endian uint32s each (rollups.py reads/writes them).
+    Daily summary columns let long-range queries skip the arrays.
+    """
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE, related_name="viewer_rollups")
+    day = models.DateField()
+    peak = models.BinaryField()
+    avg = models.BinaryField()
+    day_peak = models.PositiveIntegerField(default=0)
+    day_avg = models.FloatField(default=0)
+    minutes = models.PositiveIntegerField(default=0)  # minutes with data
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("channel", "day")]
+
+    def __str__(self):
+        return f"{self.channel_id} {self.day}"
+
+
+class VideoAiring(models.Model):
+    """One airing of a video on a channel, with the audience it drew."""
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE, related_name="airings")
+    video = models.ForeignKey(FreestyleVideo, on_delete=models.CASCADE, related_name="airings")
+    started_at = models.DateTimeField(db_index=True)
+    ended_at = models.DateTimeField(null=True, blank=True)
+    peak_viewers = models.PositiveIntegerField(default=0)
+    avg_viewers = models.FloatField(default=0)
+    unique_viewers = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [("channel", "video", "started_at")]
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.channel_id}:{self.video_id} @ {self.started_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,258 @@
+# freestyle/moderation.py
+"""
+Chat moderation: banned terms matched in one pass per message.
+
+The term list (CHAT_BANNED_TERMS_FILE, one term per line, # comments, plus
+CHAT_BANNED_TERMS) is compiled into an Aho-Corasick automaton, so a
+message is scanned once however many terms there are. The compiled filter
+is rebuilt when the file's mtime/size change, checked at most every
+CHAT_MODERATION_RELOAD_SECONDS, so edits apply without a restart.
+
+Messages and terms go through the same normalization first: casefold,
+accents stripped, leetspeak folded (0->o, 1->i, 3->e, 4/@->a, 5/$->s,
+7->t), and every run of other characters collapsed to one space. So
+"B4D W0RD", "bád-word" and "bad.word" all read "bad word".
+
+Term syntax (after normalization):
+    word      whole word(s) only       "ass" doesn't hit "class"
+    word*     at the start of a word   "spam*" hits "spammer"
+    *word*    anywhere                 "*http*" hits links
+
+CHAT_MODERATION_ACTION: "reject" refuses the message, "mask" replaces the
+matched characters of the original text with '*'.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+
+from django.conf import settings
+
+
+log = logging.getLogger(__name__)
+
+# no "!" -> "i": it ends too many sentences ("bad word!")
+LEET = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "@": "a", "5": "s", "$": "s", "7": "t"})
+
+ANYWHERE, PREFIX, WORD = "anywhere", "prefix", "word"
+
+
+# -------------------------
+# Normalization
+# -------------------------
+_SEPARATORS = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_fast(text: str) -> str:
+    """normalize() without the index map; plain ASCII skips the per-char loop."""
+    if text.isascii():
+        return _SEPARATORS.sub(" ", text.lower().translate(LEET)).strip()
+    return normalize(text)[0]
+
+
+def normalize(text: str) -> tuple[str, list[int]]:
+    """
+    Normalized text plus, for each of its characters, the index in `text`
+    it came from (for masking).
+    """
+    out: list[str] = []
+    where: list[int] = []
+    space = True  # drop leading separators
+    for i, ch in enumerate(text):
+        for c in unicodedata.normalize("NFKD", ch.casefold()):
+            if unicodedata.combining(c):
+                continue
+            c = c.translate(LEET)
+            if c.isalnum():
+                out.append(c)
+                where.append(i)
+                space = False
+            elif not space:
+                out.append(" ")
+                where.append(i)
+                space = True
+    if out and out[-1] == " ":
+        out.pop()
+        where.pop()
+    return "".join(out), where
+
+
+def parse_term(raw: str) -> tuple[str, str] | None:
+    raw = raw.strip()
+    if not raw or raw.startswith("#"):
+        return None
+    if raw.startswith("*") and raw.endswith("*") and len(raw) > 2:
+        mode, raw = ANYWHERE, raw[1:-1]
+    elif raw.endswith("*"):
+        mode, raw = PREFIX, raw[:-1]
+    else:
+        mode = WORD
+    term, _ = normalize(raw)
+    return (term, mode) if term else None
+
+
+# -------------------------
+# Automaton
+# -------------------------
+@dataclass(frozen=True)
+class Match:
+    start: int  # in normalized text, inclusive
+    end: int  # exclusive
+    term: str
+
+
+class Automaton:
+    """Aho-Corasick over normalized terms; outputs are (length, term, mode)."""
+
+    def __init__(self, terms: list[tuple[str, str]]):
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[tuple[tuple[int, str, str], ...]] = [()]
+        for term, mode in terms:
+            self._add(term, mode)
+        self._link()
+        self.size = len(terms)
+
+    def _add(self, term: str, mode: str) -> None:
+        state = 0
+        for c in term:
+            nxt = self.goto[state].get(c)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][c] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(())
+            state = nxt
+        self.out[state] += ((len(term), term, mode),)
+
+    def _link(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and c not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(c, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+    def scan(self, text: str, first_only: bool = False) -> list[Match]:
+        goto, fail, out = self.goto, self.fail, self.out
+        found = []
+        state = 0
+        n = len(text)
+        for i, c in enumerate(text):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            if not out[state]:
+                continue
+            end = i + 1
+            for length, term, mode in out[state]:
+                start = end - length
+                if mode != ANYWHERE and start > 0 and text[start - 1] != " ":
+                    continue
+                if mode == WORD and end < n and text[end] != " ":
+                    continue
+                found.append(Match(start, end, term))
+                if first_only:
+                    return found
+        return found
+
+
+# -------------------------
+# Loading / hot reload
+# -------------------------
+class _Filter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.automaton = Automaton([])
+        self.signature = None
+        self.checked_at = 0.0
+
+    def _signature(self):
+        path = getattr(settings, "CHAT_BANNED_TERMS_FILE", "") or ""
+        inline = tuple(getattr(settings, "CHAT_BANNED_TERMS", ()) or ())
+        if not path:
+            return (None, inline)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return (path, inline, None)
+        return (path, inline, st.st_mtime_ns, st.st_size)
+
+    def get(self) -> Automaton:
+        now = time.monotonic()
+        if now - self.checked_at < float(getattr(settings, "CHAT_MODERATION_RELOAD_SECONDS", 5)):
+            return self.automaton
+        with self._lock:
+            self.checked_at = now
+            sig = self._signature()
+            if sig != self.signature:
+                self.automaton = self._build()
+                self.signature = sig
+        return self.automaton
+
+    def _build(self) -> Automaton:
+        lines = list(getattr(settings, "CHAT_BANNED_TERMS", ()) or ())
+        path = getattr(settings, "CHAT_BANNED_TERMS_FILE", "") or ""
+        if path:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    lines.extend(f)
+            except FileNotFoundError:
+                log.warning("moderation: %s not found, no file terms loaded", path)
+        terms = sorted({t for t in map(parse_term, lines) if t})
+        started = time.perf_counter()
+        automaton = Automaton(terms)
+        log.info("moderation: compiled %d terms in %.0f ms", len(terms), (time.perf_counter() - started) * 1000)
+        return automaton
+
+
+_filter = _Filter()
+
+
+def automaton() -> Automaton:
+    return _filter.get()
+
+
+def reload() -> Automaton:
+    _filter.checked_at = 0.0
+    _filter.signature = object()
+    return _filter.get()
+
+
+# -------------------------
+# API
+# -------------------------
+def find(text: str) -> list[Match]:
+    return automaton().scan(normalize_fast(text))
+
+
+def apply(text: str) -> str | None:
+    """The message to store: unchanged, masked, or None when it is refused."""
+    ac = automaton()
+    if not ac.size:
+        return text
+    if getattr(settings, "CHAT_MODERATION_ACTION", "reject") != "mask":
+        return None if ac.scan(normalize_fast(text), first_only=True) else text
+
+    if not ac.scan(normalize_fast(text), first_only=True):
+        return text
+    normalized, where = normalize(text)
+    matches = ac.scan(normalized)
+    chars = list(text)
+    for m in matches:
+        for i in range(where[m.start], where[m.end - 1] + 1):
+            if not chars[i].isspace():
+                chars[i] = "*"
+    return "".join(chars)
@@ -0,0 +1,461 @@
+# freestyle/mp4.py
+"""
+Pure-Python MP4 box parsing (no ffmpeg needed).
+
+Started life inside management/commands/tv_fix.py (mvhd duration probe);
+moved here so the seek index, the HLS playlist and the segmenter can share it.
+"""
+from __future__ import annotations
+
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+
+# Boxes whose payload is just more boxes
+CONTAINER_BOXES = {"moov", "trak", "mdia", "minf", "stbl", "edts", "dinf", "mvex", "moof", "traf"}
+
+
+# -----------------------------
+# Low-level readers
+# -----------------------------
+def _read_u32(f):
+    b = f.read(4)
+    if len(b) != 4:
+        return None
+    return struct.unpack(">I", b)[0]
+
+
+def _read_u64(f):
+    b = f.read(8)
+    if len(b) != 8:
+        return None
+    return struct.unpack(">Q", b)[0]
+
+
+def _read_atom_header(f):
+    """
+    Returns (atom_type, atom_size, header_size) or (None, None, None) on EOF.
+    """
+    size = _read_u32(f)
+    if size is None:
+        return None, None, None
+    atype = f.read(4)
+    if len(atype) != 4:
+        return None, None, None
+    atype = atype.decode("latin1")
+    header = 8
+
+    if size == 1:
+        size64 = _read_u64(f)
+        if size64 is None:
+            return None, None, None
+        size = size64
+        header = 16
+    elif size == 0:
+        # "box extends to end of file" (only legal for the last box, usually mdat)
+        here = f.tell()
+        f.seek(0, os.SEEK_END)
+        size = f.tell() - (here - 8)
+        f.seek(here)
+
+    if size < header:
+        return None, None, None
+
+    return atype, int(size), header
+
+
+@dataclass
+class Box:
+    type: str
+    offset: int  # absolute (file) or relative (buffer) start of the header
+    size: int    # header + payload
+    header: int
+
+    @property
+    def payload_offset(self) -> int:
+        return self.offset + self.header
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+
+def top_level_boxes(path: str) -> list[Box]:
+    """Walk the top-level boxes of a file without reading payloads."""
+    out: list[Box] = []
+    with open(path, "rb") as f:
+        while True:
+            start = f.tell()
+            atype, size, header = _read_atom_header(f)
+            if atype is None:
+                break
+            out.append(Box(atype, start, size, header))
+            f.seek(start + size)
+    return out
+
+
+def iter_boxes(buf: bytes, start: int = 0, end: int | None = None):
+    """Yield Box entries (offsets relative to buf) between start and end."""
+    i = start
+    n = len(buf) if end is None else end
+    while i + 8 <= n:
+        size = struct.unpack_from(">I", buf, i)[0]
+        atype = buf[i + 4:i + 8].decode("latin1")
+        header = 8
+        if size == 1:
+            if i + 16 > n:
+                return
+            size = struct.unpack_from(">Q", buf, i + 8)[0]
+            header = 16
+        elif size == 0:
+            size = n - i
+        if size < header or i + size > n:
+            return
+        yield Box(atype, i, size, header)
+        i += size
+
+
+def find_box(buf: bytes, *path: str, start: int = 0, end: int | None = None) -> Box | None:
+    """find_box(moov, "trak", "mdia", "mdhd") -> first match along that path."""
+    for box in iter_boxes(buf, start, end):
+        if box.type != path[0]:
+            continue
+        if len(path) == 1:
+            return box
+        found = find_box(buf, *path[1:], start=box.payload_offset, end=box.end)
+        if found:
+            return found
+    return None
+
+
+def find_all(buf: bytes, box_type: str, start: int = 0, end: int | None = None) -> list[Box]:
+    return [b for b in iter_boxes(buf, start, end) if b.type == box_type]
+
+
+# -----------------------------
+# Duration (kept for tv_fix)
+# -----------------------------
+def mp4_duration_seconds(path: str) -> int | None:
+    """
+    Pure-Python MP4 duration from moov/mvhd.
+    Works for standard MP4/MOV. No ffmpeg needed.
+    Returns seconds or None if not found.
+    """
+    try:
+        with open(path, "rb") as f:
+            # Walk top-level atoms until we find 'moov'
+            while True:
+                atype, size, header = _read_atom_header(f)
+                if atype is None:
+                    break
+
+                payload_start = f.tell()
+                payload_size = size - header
+
+                if atype == "moov":
+                    # Read moov payload into memory (usually small)
+                    moov = f.read(payload_size)
+                    return _mvhd_duration_from_moov_bytes(moov)
+
+                # Skip this atom
+                f.seek(payload_start + payload_size)
+    except Exception:
+        return None
+
+    return None
+
+
+def _mvhd_duration_from_moov_bytes(moov: bytes) -> int | None:
+    mvhd = find_box(moov, "mvhd")
+    if not mvhd:
+        return None
+    timescale, duration = _timescale_duration(moov[mvhd.payload_offset:mvhd.end], v0_skip=8, v1_skip=16)
+    if not timescale:
+        return None
+    return max(1, int(round(duration / timescale)))
+
+
+def _timescale_duration(payload: bytes, v0_skip: int, v1_skip: int) -> tuple[int, int]:
+    """mvhd/mdhd share layout: fullbox, creation, modification, timescale, duration."""
+    if len(payload) < 4:
+        return 0, 0
+    version = payload[0]
+    if version == 1:
+        off = 4 + v1_skip
+        if len(payload) < off + 12:
+            return 0, 0
+        return struct.unpack_from(">I", payload, off)[0], struct.unpack_from(">Q", payload, off + 4)[0]
+    off = 4 + v0_skip
+    if len(payload) < off + 8:
+        return 0, 0
+    return struct.unpack_from(">I", payload, off)[0], struct.unpack_from(">I", payload, off + 4)[0]
+
+
+# -----------------------------
+# Track sample tables
+# -----------------------------
+@dataclass
+class Track:
+    track_id: int
+    handler: str           # "vide", "soun", ...
+    timescale: int
+    duration: int          # in timescale units
+    trak: Box              # relative to the moov payload buffer
+    sizes: array = field(default_factory=lambda: array("q"))
+    offsets: array = field(default_factory=lambda: array("q"))    # absolute file offsets
+    dts: array = field(default_factory=lambda: array("q"))        # decode times (ticks)
+    durations: array = field(default_factory=lambda: array("q"))
+    cts_offsets: array | None = None                              # composition offsets (ticks)
+    sync: array | None = None                                     # 0-based sync sample numbers; None = all
+
+    @property
+    def sample_count(self) -> int:
+        return len(self.sizes)
+
+    def is_sync(self, i: int) -> bool:
+        if self.sync is None:
+            return True
+        j = bisect_left(self.sync, i)
+        return j < len(self.sync) and self.sync[j] == i
+
+    def sample_at(self, ticks: int) -> int:
+        """Index of the sample whose decode window contains `ticks`."""
+        return max(0, bisect_right(self.dts, ticks) - 1)
+
+
+def _fullbox_entries(payload: bytes) -> tuple[int, int]:
+    version = payload[0]
+    count = struct.unpack_from(">I", payload, 4)[0]
+    return version, count
+
+
+def _parse_track(moov: bytes, trak: Box) -> Track | None:
+    tkhd = find_box(moov, "tkhd", start=trak.payload_offset, end=trak.end)
+    mdhd = find_box(moov, "mdia", "mdhd", start=trak.payload_offset, end=trak.end)
+    hdlr = find_box(moov, "mdia", "hdlr", start=trak.payload_offset, end=trak.end)
+    stbl = find_box(moov, "mdia", "minf", "stbl", start=trak.payload_offset, end=trak.end)
+    if not (tkhd and mdhd and hdlr and stbl):
+        return None
+
+    tk = moov[tkhd.payload_offset:tkhd.end]
+    track_id = struct.unpack_from(">I", tk, 4 + (16 if tk[0] == 1 else 8))[0]
+    timescale, duration = _timescale_duration(moov[mdhd.payload_offset:mdhd.end], v0_skip=8, v1_skip=16)
+    handler = moov[hdlr.payload_offset + 8:hdlr.payload_offset + 12].decode("latin1")
+    if not timescale:
+        return None
+
+    track = Track(track_id=track_id, handler=handler, timescale=timescale, duration=duration, trak=trak)
+
+    def table(name):
+        b = find_box(moov, name, start=stbl.payload_offset, end=stbl.end)
+        return moov[b.payload_offset:b.end] if b else None
+
+    # --- sizes (stsz) ---
+    stsz = table("stsz")
+    if stsz is None:
+        return None
+    fixed, count = struct.unpack_from(">II", stsz, 4)
+    if fixed:
+        track.sizes = array("q", [fixed]) * count
+    else:
+        track.sizes = array("q", struct.unpack_from(f">{count}I", stsz, 12))
+
+    # --- decode times (stts) ---
+    stts = table("stts")
+    t = 0
+    if stts:
+        _, n = _fullbox_entries(stts)
+        for k in range(n):
+            c, delta = struct.unpack_from(">II", stts, 8 + k * 8)
+            for _ in range(c):
+                track.dts.append(t)
+                track.durations.append(delta)
+                t += delta
+    # pad if stts is shorter than stsz (broken muxers)
+    while len(track.dts) < count:
+        track.dts.append(t)
+        track.durations.append(0)
+
+    # --- composition offsets (ctts) ---
+    ctts = table("ctts")
+    if ctts:
+        version, n = _fullbox_entries(ctts)
+        fmt = ">Ii" if version == 1 else ">II"
+        offs = array("q")
+        for k in range(n):
+            c, o = struct.unpack_from(fmt, ctts, 8 + k * 8)
+            offs.extend([o] * c)
+        track.cts_offsets = offs[:count]
+
+    # --- sync samples (stss) ---
+    stss = table("stss")
+    if stss:
+        _, n = _fullbox_entries(stss)
+        track.sync = array("q", (s - 1 for s in struct.unpack_from(f">{n}I", stss, 8)))
+
+    # --- chunk offsets (stco / co64) + sample-to-chunk (stsc) ---
+    stco = table("stco")
+    if stco:
+        _, n = _fullbox_entries(stco)
+        chunk_offsets = struct.unpack_from(f">{n}I", stco, 8)
+    else:
+        co64 = table("co64")
+        if co64 is None:
+            return None
+        _, n = _fullbox_entries(co64)
+        chunk_offsets = struct.unpack_from(f">{n}Q", co64, 8)
+
+    stsc = table("stsc")
+    runs = []
+    if stsc:
+        _, n = _fullbox_entries(stsc)
+        runs = [struct.unpack_from(">III", stsc, 8 + k * 12) for k in range(n)]
+
+    sample = 0
+    for r, (first_chunk, per_chunk, _desc) in enumerate(runs):
+        last_chunk = runs[r + 1][0] - 1 if r + 1 < len(runs) else len(chunk_offsets)
+        for chunk in range(first_chunk, last_chunk + 1):
+            off = chunk_offsets[chunk - 1]
+            for _ in range(per_chunk):
+                if sample >= count:
+                    break
+                track.offsets.append(off)
+                off += track.sizes[sample]
+                sample += 1
+
+    if len(track.offsets) != count:
+        return None
+    return track
+
+
+def parse_tracks(moov: bytes) -> list[Track]:
+    """moov = the moov *payload* (without its own header)."""
+    out = []
+    for trak in find_all(moov, "trak"):
+        t = _parse_track(moov, trak)
+        if t:
+            out.append(t)
+    return out
+
+
+# -----------------------------
+# Seek index
+# -----------------------------
+@dataclass
+class SeekIndex:
+    """
+    Keyframe -> byte offset map for one progressive MP4.
+
+    `keyframes` holds (seconds, file_offset) of every video sync sample, so a
+    time can be turned into "the byte where a decoder can start" with one
+    bisect. `byte_range(t0, t1)` covers every sample (all tracks) decoded in
+    [t0, t1), e.g. the head prefetch.py warms.
+    """
+    path: str
+    size: int
+    duration: float
+    ftyp: Box | None
+    moov: Box
+    mdat: Box | None
+    keyframes: list[tuple[float, int]]
+    tracks: list[Track]
+
+    @property
+    def faststart(self) -> bool:
+        return self.mdat is None or self.moov.offset < self.mdat.offset
+
+    @property
+    def init_range(self) -> tuple[int, int]:
+        """(offset, length) of ftyp+moov when they are contiguous, else moov alone."""
+        if self.faststart and self.ftyp and self.ftyp.offset == 0:
+            return 0, self.moov.end
+        return self.moov.offset, self.moov.size
+
+    def keyframe_times(self) -> list[float]:
+        return [t for t, _ in self.keyframes]
+
+    def byte_range(self, t0: float, t1: float) -> tuple[int, int]:
+        """(offset, length) covering all samples with decode time in [t0, t1)."""
+        lo = None
+        hi = None
+        for tr in self.tracks:
+            a = bisect_left(tr.dts, int(t0 * tr.timescale))
+            b = bisect_left(tr.dts, int(t1 * tr.timescale))
+            for i in range(a, b):
+                s = tr.offsets[i]
+                e = s + tr.sizes[i]
+                lo = s if lo is None or s < lo else lo
+                hi = e if hi is None or e > hi else hi
+        if lo is None:
+            return 0, 0
+        return lo, hi - lo
+
+
+def build_seek_index(path: str) -> SeekIndex | None:
+    boxes = top_level_boxes(path)
+    moov_box = next((b for b in boxes if b.type == "moov"), None)
+    if moov_box is None:
+        return None
+
+    with open(path, "rb") as f:
+        f.seek(moov_box.payload_offset)
+        moov = f.read(moov_box.size - moov_box.header)
+
+    tracks = parse_tracks(moov)
+    if not tracks:
+        return None
+
+    video = next((t for t in tracks if t.handler == "vide"), tracks[0])
+    sync = video.sync if video.sync is not None else range(video.sample_count)
+    keyframes = [(video.dts[i] / video.timescale, video.offsets[i]) for i in sync]
+
+    duration = max((t.dts[-1] + t.durations[-1]) / t.timescale for t in tracks if t.sample_count)
+
+    return SeekIndex(
+        path=path,
+        size=os.path.getsize(path),
+        duration=duration,
+        ftyp=next((b for b in boxes if b.type == "ftyp"), None),
+        moov=moov_box,
+        mdat=next((b for b in boxes if b.type == "mdat"), None),
+        keyframes=keyframes,
+        tracks=tracks,
+    )
+
+
+_INDEX_CACHE: "OrderedDict[tuple, SeekIndex | None]" = OrderedDict()
+_INDEX_CACHE_MAX = 64
+_INDEX_LOCK = threading.Lock()
+
+
+def seek_index(path: str) -> SeekIndex | None:
+    """
+    Cached build_seek_index(), keyed by (path, size, mtime) so a re-upload
+    invalidates it. Parsing a moov is cheap but not per-request cheap.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (path, st.st_size, st.st_mtime_ns)
+
+    with _INDEX_LOCK:
+        if key in _INDEX_CACHE:
+            _INDEX_CACHE.move_to_end(key)
+            return _INDEX_CACHE[key]
+
+    try:
+        idx = build_seek_index(path)
+    except Exception:
+        idx = None
+
+    with _INDEX_LOCK:
+        _INDEX_CACHE[key] = idx
+        while len(_INDEX_CACHE) > _INDEX_CACHE_MAX:
+            _INDEX_CACHE.popitem(last=False)
+    return idx
@@ -0,0 +1,200 @@
+# freestyle/polling.py
+"""
+Server-directed poll intervals.
+
+TVs used to poll tick.json every 2.5 s no matter what. Now the server says
+when to come back. now.json and tick.json carry `next_poll_ms` in the body.
+Every JSON response carries an X-Next-Poll-Ms header (load term only, unless
+the view set it). tv.js sleeps that long plus up to 15% jitter, so a room
+that joined together doesn't stay in lockstep. Jitter only ever delays, so
+a poll aimed just past a boundary can't land before it.
+
+The hint starts at POLL_BASE_MS and is shaped by:
+  - chat activity: no message in this worker's buffer for a minute
+    multiplies it by POLL_QUIET_FACTOR. POLL_BUSY_CHAT_PER_MINUTE or more
+    (only when the client reads chat by polling) multiplies it by
+    POLL_BUSY_FACTOR.
+  - load: this worker's p95 latency over its last POLL_LOAD_SAMPLES JSON
+    requests, and its requests in flight. Above POLL_LOAD_P95_MS or
+    POLL_LOAD_INFLIGHT it backs off in proportion, up to POLL_MAX_BACKOFF.
+    Long-polls (?wait=) are left out of both, since they are parked on
+    purpose, and non-JSON responses are not sampled.
+  - the next boundary: when the next item starts before the hint would
+    fire, the poll lands just after the switch instead. A per-sid offset
+    of up to POLL_BOUNDARY_SPREAD_MS keeps the room from arriving together.
+Then it is clamped to [POLL_MIN_MS, POLL_MAX_MS].
+"""
+from __future__ import annotations
+
+import threading
+import time
+import zlib
+from collections import deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import chat_buffer
+
+
+HEADER = "X-Next-Poll-Ms"
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+# -------------------------
+# Load (per worker)
+# -------------------------
+class LoadTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: deque[float] = deque(maxlen=int(_setting("POLL_LOAD_SAMPLES", 500)))
+        self._in_flight = 0
+        self._p95 = 0.0
+        self._p95_at = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def finish(self, elapsed_ms: float | None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if elapsed_ms is not None:
+                self._samples.append(elapsed_ms)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def p95(self) -> float:
+        """p95 of the sampled latencies (ms), recomputed at most once a second."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._p95_at >= 1.0:
+                ordered = sorted(self._samples)
+                self._p95 = ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0
+                self._p95_at = now
+            return self._p95
+
+    def stats(self) -> dict:
+        return {"p95_ms": round(self.p95(), 1), "in_flight": self.in_flight, "samples": len(self._samples)}
+
+
+load = LoadTracker()
+
+
+# -------------------------
+# Hints
+# -------------------------
+def compute(
+    *,
+    chat_per_minute: float | None = None,
+    p95_ms: float = 0.0,
+    in_flight: int = 0,
+    boundary_in: float | None = None,
+    sid: str = "",
+) -> int:
+    """The poll interval (ms) for these inputs. Pure, so viewer_swarm can replay it."""
+    lo = float(_setting("POLL_MIN_MS", 1000))
+    hi = float(_setting("POLL_MAX_MS", 15000))
+    ms = float(_setting("POLL_BASE_MS", 2500))
+
+    if chat_per_minute is not None:
+        if chat_per_minute <= 0:
+            ms *= float(_setting("POLL_QUIET_FACTOR", 2.0))
+        elif chat_per_minute >= float(_setting("POLL_BUSY_CHAT_PER_MINUTE", 20)):
+            ms *= float(_setting("POLL_BUSY_FACTOR", 0.6))
+
+    target_p95 = float(_setting("POLL_LOAD_P95_MS", 200))
+    max_inflight = float(_setting("POLL_LOAD_INFLIGHT", 32))
+    backoff = max(
+        1.0,
+        p95_ms / target_p95 if target_p95 > 0 else 1.0,
+        in_flight / max_inflight if max_inflight > 0 else 1.0,
+    )
+    ms *= min(backoff, float(_setting("POLL_MAX_BACKOFF", 4.0)))
+    ms = min(max(ms, lo), hi)
+
+    if boundary_in is not None and 0 <= boundary_in * 1000 < ms:
+        spread = float(_setting("POLL_BOUNDARY_SPREAD_MS", 2500))
+        offset = (zlib.crc32(sid.encode("utf-8")) % 1000) / 1000 * spread if sid else spread / 2
+        ms = max(lo, boundary_in * 1000 + 250 + offset)
+    return int(ms)
+
+
+def hint(channel_id: int | None = None, boundary_in: float | None = None, sid: str = "", chat: bool = True) -> int:
+    """
+    next_poll_ms for a client of `channel_id`. `boundary_in`: seconds to the
+    next item. `chat`: False when the client reads chat over the websocket,
+    so busy chat doesn't speed its polls up (quiet chat still slows them).
+    """
+    per_minute = None
+    if channel_id is not None:
+        per_minute = chat_buffer.recent_count(channel_id, 60)
+        if per_minute and not chat:
+            per_minute = None
+    return compute(
+        chat_per_minute=per_minute,
+        p95_ms=load.p95(),
+        in_flight=load.in_flight,
+        boundary_in=boundary_in,
+        sid=sid,
+    )
+
+
+# -------------------------
+# Middleware
+# -------------------------
+def _parked(request) -> bool:
+    return "wait" in request.GET
+
+
+def _finish(request, response, started: float | None):
+    is_json = response.get("Content-Type", "").startswith("application/json")
+    if started is not None:
+        load.finish((time.perf_counter() - started) * 1000 if is_json else None)
+    if is_json and HEADER not in response:
+        response[HEADER] = str(compute(p95_ms=load.p95(), in_flight=load.in_flight))
+    return response
+
+
+class PollHintMiddleware:
+    """Samples JSON latency for the load term and stamps X-Next-Poll-Ms on JSON responses."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if _parked(request):
+            return _finish(request, self.get_response(request), None)
+        load.start()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            load.finish(None)
+            raise
+        return _finish(request, response, started)
+
+    async def __acall__(self, request):
+        if _parked(request):
+            return _finish(request, await self.get_response(request), None)
+        load.start()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            load.finish(None)
+            raise
+        return _finish(request, response, started)
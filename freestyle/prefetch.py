@@ -0,0 +1,198 @@
+# freestyle/prefetch.py
+"""
+Join-time prefetch: warm the OS page cache for upcoming schedule items.
+
+At a schedule boundary every viewer opens the next item within a second or
+two of each other, and on a cold disk the first Range reads (head, moov,
+first GOPs) queue behind each other. The warmer walks the compiled schedule
+and, PREFETCH_LEAD_SECONDS before an item airs, asks the kernel to read those
+ranges ahead with posix_fadvise(WILLNEED). On platforms without fadvise we
+fall back to reading the bytes once and discarding them.
+
+Run it with `manage.py prefetch_warmer`; warm_upcoming() is the single pass.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from . import metrics
+from .fmp4 import read_vod_playlist
+from .models import Channel
+from .mp4 import seek_index
+from .schedule import ScheduleItem, Slot, compiled_schedule, media_path
+
+
+log = logging.getLogger(__name__)
+
+_READ_CHUNK = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class WarmResult:
+    channel: str
+    item_id: int
+    start_epoch: float
+    files: int
+    bytes: int
+
+
+def lead_seconds() -> float:
+    return float(getattr(settings, "PREFETCH_LEAD_SECONDS", 30))
+
+
+def items_ahead() -> int:
+    return int(getattr(settings, "PREFETCH_ITEMS", 2))
+
+
+# -------------------------
+# Which bytes
+# -------------------------
+def _merge(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merge overlapping/adjacent (offset, length) ranges."""
+    out: list[list[int]] = []
+    for off, length in sorted(r for r in ranges if r[1] > 0):
+        if out and off <= out[-1][0] + out[-1][1]:
+            out[-1][1] = max(out[-1][1], off + length - out[-1][0])
+        else:
+            out.append([off, length])
+    return [(o, n) for o, n in out]
+
+
+def _cmaf_ranges(item: ScheduleItem, seconds: float) -> dict[str, list[tuple[int, int]]]:
+    playlist = media_path(item.cmaf_playlist)
+    if not playlist or not os.path.isfile(playlist):
+        return {}
+    base = os.path.dirname(playlist)
+    init, rows = read_vod_playlist(playlist)
+
+    files = [playlist] + ([os.path.join(base, init)] if init else [])
+    t = 0.0
+    for uri, dur in rows:
+        if t >= seconds:
+            break
+        files.append(os.path.join(base, uri))
+        t += dur
+
+    out = {}
+    for path in files:
+        try:
+            out[path] = [(0, os.path.getsize(path))]
+        except OSError:
+            continue
+    return out
+
+
+def _mp4_ranges(path: str, seconds: float, head_bytes: int) -> list[tuple[int, int]]:
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return []
+
+    ranges = [(0, min(size, head_bytes))]
+    idx = seek_index(path)
+    if idx:
+        # non-faststart files keep moov at the tail: the player reads it before any frame
+        ranges.append((idx.moov.offset, idx.moov.size))
+        ranges.append(idx.byte_range(0.0, seconds))
+    return _merge(ranges)
+
+
+def item_ranges(item: ScheduleItem, seconds: float | None = None, head_bytes: int | None = None) -> dict[str, list[tuple[int, int]]]:
+    """{absolute path: [(offset, length), ...]} a player touches first for `item`."""
+    seconds = float(getattr(settings, "PREFETCH_SECONDS", 10)) if seconds is None else seconds
+    head_bytes = int(getattr(settings, "PREFETCH_HEAD_BYTES", 1024 * 1024)) if head_bytes is None else head_bytes
+
+    out = _cmaf_ranges(item, seconds) if item.cmaf_playlist else {}
+    path = item.local_path
+    if path and not item.is_hls and os.path.isfile(path):
+        # tv.js still plays the progressive file, so warm it even when a CMAF rendition exists
+        out[path] = _mp4_ranges(path, seconds, head_bytes)
+    return out
+
+
+# -------------------------
+# Warming
+# -------------------------
+def _advise(fd: int, offset: int, length: int) -> int:
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+        return length
+
+    # no fadvise (macOS/Windows): a plain read leaves the pages cached just the same
+    done = 0
+    os.lseek(fd, offset, os.SEEK_SET)
+    while done < length:
+        chunk = os.read(fd, min(_READ_CHUNK, length - done))
+        if not chunk:
+            break
+        done += len(chunk)
+    return done
+
+
+def warm_file(path: str, ranges: list[tuple[int, int]]) -> int:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return 0
+    try:
+        return sum(_advise(fd, off, length) for off, length in ranges)
+    except OSError:
+        log.warning("prefetch: fadvise failed for %s", path, exc_info=True)
+        return 0
+    finally:
+        os.close(fd)
+
+
+def warm_item(item: ScheduleItem) -> tuple[int, int]:
+    """Warm one item. Returns (files, bytes)."""
+    files = 0
+    total = 0
+    for path, ranges in item_ranges(item).items():
+        n = warm_file(path, ranges)
+        if n:
+            files += 1
+            total += n
+    return files, total
+
+
+_warmed: dict[tuple[int, int, int], float] = {}  # (channel id, cycle, index) -> start_epoch
+_warmed_lock = threading.Lock()
+
+
+def _claim(channel_id: int, slot: Slot, now: float) -> bool:
+    """True the first time we see this airing; forgets airings that already started."""
+    key = (channel_id, slot.cycle, slot.index)
+    with _warmed_lock:
+        for k in [k for k, start in _warmed.items() if start < now]:
+            _warmed.pop(k, None)
+        if key in _warmed:
+            return False
+        _warmed[key] = slot.start_epoch
+        return True
+
+
+def warm_upcoming(now: float | None = None, lead: float | None = None, count: int | None = None) -> list[WarmResult]:
+    """One pass over all channels: warm each upcoming airing that starts within `lead` seconds."""
+    now = time.time() if now is None else now
+    lead = lead_seconds() if lead is None else lead
+    count = items_ahead() if count is None else count
+
+    results = []
+    for channel in Channel.objects.all():
+        sched = compiled_schedule(channel)
+        for slot in sched.upcoming(now, count):
+            if slot.start_epoch - now > lead:
+                break
+            if not _claim(channel.id, slot, now):
+                continue
+            files, n = warm_item(slot.item)
+            metrics.incr("prefetch.warmed_items")
+            metrics.incr("prefetch.warmed_bytes", n)
+            results.append(WarmResult(channel.slug, slot.item.id, slot.start_epoch, files, n))
+    return results
@@ -0,0 +1,95 @@
+# freestyle/presence.py
+"""
+Write-behind presence tracking.
+
+Pings never wait on the DB: record() coalesces them by (channel, sid) in a
+per-worker WriteBehindBuffer, and every PRESENCE_FLUSH_SECONDS the batch goes
+to the DB as one bulk upsert. Live counts come from the sliding-window
+counter in the shared cache (viewer_counter.py), so the Presence table is an
+eventually-consistent record, not the hot path.
+
+Pings also feed the HLL unique-viewer sketches (audience.py); set
+VIEWER_COUNT_SOURCE = "hll" to serve counts from those instead.
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from . import audience, viewer_counter
+from .models import Channel, Presence
+from .write_behind import WriteBehindBuffer
+
+
+def ttl_seconds() -> int:
+    return int(getattr(settings, "PRESENCE_TTL_SECONDS", 30))
+
+
+def _flush(batch: dict[tuple[int, str], float]) -> None:
+    rows = [
+        Presence(channel_id=channel_id, sid=sid, last_seen=datetime.fromtimestamp(ts, tz=dt_timezone.utc))
+        for (channel_id, sid), ts in batch.items()
+    ]
+    Presence.objects.bulk_create(
+        rows,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["channel", "sid"],
+        update_fields=["last_seen"],
+    )
+
+
+_buffer = WriteBehindBuffer(
+    "presence",
+    _flush,
+    interval=lambda: float(getattr(settings, "PRESENCE_FLUSH_SECONDS", 5)),
+    merge=max,
+)
+
+
+def _scope(channel_id: int) -> str:
+    return f"channel:{channel_id}"
+
+
+def record(channel: Channel, sid: str, now: float | None = None) -> None:
+    sid = (sid or "").strip()[:120]
+    if not sid:
+        return
+    now = time.time() if now is None else now
+    viewer_counter.touch(_scope(channel.id), sid, now)
+    audience.record(channel, sid, now)
+    _buffer.put((channel.id, sid), now)
+
+
+def flush() -> int:
+    return _buffer.flush()
+
+
+def viewer_count(channel_id: int) -> int:
+    if getattr(settings, "VIEWER_COUNT_SOURCE", "window") == "hll":
+        return audience.concurrent_viewers(channel_id)
+    return viewer_counter.count(_scope(channel_id))
+
+
+def stored_counts(now: float | None = None) -> dict[int, int]:
+    """
+    {channel_id: viewers} from Presence rows pinged within the TTL, for
+    processes that can't read the live counter (a per-process cache).
+    Lags pings by up to PRESENCE_FLUSH_SECONDS.
+    """
+    now = time.time() if now is None else now
+    cutoff = datetime.fromtimestamp(now - ttl_seconds(), tz=dt_timezone.utc)
+    rows = Presence.objects.filter(last_seen__gte=cutoff).values("channel_id").annotate(n=Count("id"))
+    return {r["channel_id"]: r["n"] for r in rows}
+
+
+def reap(older_than: int | None = None) -> int:
+    """Delete presence rows nobody has pinged for a while. Returns rows deleted."""
+    older_than = ttl_seconds() * 4 if older_than is None else older_than
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    deleted, _ = Presence.objects.filter(last_seen__lt=cutoff).delete()
+    return deleted
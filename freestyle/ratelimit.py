@@ -0,0 +1,208 @@
+# freestyle/ratelimit.py
+"""
+GCRA rate limiting for write endpoints (chat, reactions, duration repair).
+
+Each limit is "N/period" (RATE_LIMITS, e.g. "5/10s"): one request every
+T = period/N seconds, with bursts of up to N. Per key the only state is the
+theoretical arrival time (TAT) of the next conforming request:
+
+    tat = max(tat, now) + T
+    reject while tat - N*T > now, retry after (tat - N*T - now)
+
+Every request is checked against two keys: the client id (X-Client-Id, or
+?sid) at the configured rate, and the IP at RATE_LIMIT_IP_FACTOR times it,
+so a bot that rotates client ids still hits the IP bucket and a venue
+behind one NAT isn't throttled as one client.
+
+State lives in this worker's memory by default; with RATE_LIMIT_SHARED the
+TAT is an integer (µs) in the Django cache, advanced with atomic incr so
+every node shares one bucket. The shared path can over-admit by a request
+or two when an idle bucket is reset by two nodes at once.
+
+Rejections are answered before the view touches the database.
+"""
+from __future__ import annotations
+
+import functools
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+
+PREFIX = "freestyle:rl"
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_RATE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*([smhd]?)\s*$")
+
+
+@dataclass(frozen=True)
+class Limit:
+    count: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.count
+
+    @property
+    def burst_window(self) -> float:
+        return self.interval * self.count
+
+    def scaled(self, factor: float) -> "Limit":
+        return Limit(max(1, int(self.count * factor)), self.period)
+
+
+def parse(rate: str) -> Limit:
+    """ "5/10s" -> 5 per 10 s; "60/m" -> 60 per minute."""
+    m = _RATE.match(rate or "")
+    if not m:
+        raise ValueError(f"bad rate {rate!r}, expected like '5/10s'")
+    count, n, unit = int(m[1]), int(m[2] or 1), m[3] or "s"
+    if count <= 0:
+        raise ValueError(f"bad rate {rate!r}: count must be positive")
+    return Limit(count, n * _UNITS[unit])
+
+
+@functools.lru_cache(maxsize=None)
+def _limit(name: str) -> Limit | None:
+    rate = (getattr(settings, "RATE_LIMITS", {}) or {}).get(name)
+    return parse(rate) if rate else None
+
+
+# -------------------------
+# Counters
+# -------------------------
+_stats_lock = threading.Lock()
+_stats: dict[str, dict[str, int]] = {}
+
+
+def _count(name: str, outcome: str) -> None:
+    with _stats_lock:
+        row = _stats.setdefault(name, {"allowed": 0, "rejected": 0})
+        row[outcome] += 1
+
+
+def stats() -> dict[str, dict[str, int]]:
+    """Per-limit allowed/rejected counts in this worker (metrics.json)."""
+    with _stats_lock:
+        return {k: dict(v) for k, v in _stats.items()}
+
+
+# -------------------------
+# Stores
+# -------------------------
+class LocalStore:
+    def __init__(self, max_keys: int = 100_000):
+        self._lock = threading.Lock()
+        self._tat: dict[str, float] = {}
+        self.max_keys = max_keys
+
+    def hit(self, key: str, limit: Limit, now: float) -> float:
+        """Take one request; returns 0 if allowed, else seconds until it would be."""
+        with self._lock:
+            tat = max(self._tat.get(key, now), now) + limit.interval
+            wait = tat - limit.burst_window - now
+            if wait > 0:
+                return wait
+            self._tat[key] = tat
+            if len(self._tat) > self.max_keys:
+                self._prune(now)
+            return 0.0
+
+    def _prune(self, now: float) -> None:
+        # a TAT in the past is the same as no entry
+        self._tat = {k: v for k, v in self._tat.items() if v > now}
+
+
+class CacheStore:
+    def hit(self, key: str, limit: Limit, now: float) -> float:
+        key = f"{PREFIX}:{key}"
+        step = int(limit.interval * 1e6)
+        now_us = int(now * 1e6)
+        ttl = int(limit.burst_window) + 2
+
+        tat = cache.get(key)
+        if tat is None or tat < now_us:
+            cache.set(key, now_us, timeout=ttl)
+        try:
+            tat = cache.incr(key, step)
+        except ValueError:  # expired between set and incr
+            cache.set(key, now_us + step, timeout=ttl)
+            tat = now_us + step
+
+        wait = (tat - int(limit.burst_window * 1e6) - now_us) / 1e6
+        if wait > 0:
+            cache.decr(key, step)  # rejected requests don't consume
+            return wait
+        cache.touch(key, ttl)
+        return 0.0
+
+
+_local = LocalStore()
+
+
+def _store():
+    return CacheStore() if getattr(settings, "RATE_LIMIT_SHARED", False) else _local
+
+
+# -------------------------
+# API
+# -------------------------
+def client_ip(request) -> str:
+    hops = int(getattr(settings, "RATE_LIMIT_PROXY_HOPS", 0))
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    if hops > 0 and forwarded:
+        chain = [p.strip() for p in forwarded.split(",") if p.strip()]
+        if len(chain) >= hops:
+            # entries left of what our own proxies appended are client-controlled
+            return chain[-hops]
+    return request.META.get("REMOTE_ADDR") or "0.0.0.0"
+
+
+def client_key(request) -> str:
+    return (request.headers.get("X-Client-Id") or request.GET.get("sid") or "").strip()[:120]
+
+
+def check(name: str, client: str, ip: str, now: float | None = None) -> float:
+    """0 if the request may proceed, else seconds to wait. Counts the request."""
+    limit = _limit(name)
+    if limit is None or not getattr(settings, "RATE_LIMIT_ENABLED", True):
+        return 0.0
+    now = time.time() if now is None else now
+    store = _store()
+
+    wait = store.hit(f"{name}:c:{client}", limit, now) if client else 0.0
+    if not wait:
+        ip_limit = limit.scaled(float(getattr(settings, "RATE_LIMIT_IP_FACTOR", 10)))
+        wait = store.hit(f"{name}:ip:{ip}", ip_limit, now)
+
+    _count(name, "rejected" if wait else "allowed")
+    return wait
+
+
+def too_many(wait: float) -> JsonResponse:
+    retry = max(1, math.ceil(wait))
+    resp = JsonResponse({"ok": False, "error": "rate_limited", "retry_after": retry}, status=429)
+    resp["Retry-After"] = str(retry)
+    return resp
+
+
+def rate_limited(name: str):
+    """View decorator: 429 + Retry-After once the caller exceeds RATE_LIMITS[name]."""
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            wait = check(name, client_key(request), client_ip(request))
+            if wait:
+                return too_many(wait)
+            return view(request, *args, **kwargs)
+
+        return wrapped
+
+    return decorator
@@ -0,0 +1,322 @@
+# freestyle/reactions.py
+"""
+Reaction totals without COUNT queries.
+
+ReactionCounter holds the fire/nah totals of each (channel, video). A vote
+that creates a VideoReaction bumps its counter in the same transaction with
+an F() update, so concurrent votes can't lose increments. Polls read the
+totals from the cache (REACTION_COUNTS_CACHE_SECONDS), falling back to one
+primary-key-indexed counter row. A committed vote drops the cached entry.
+
+Votes are buffered (REACTION_FLUSH_MS > 0). record() dedupes a vote
+against this worker's pending and in-flight batches, then against the voter Bloom filter
+(vote_receipts.py), confirming a Bloom hit with one exists(). It acks at
+once. Every REACTION_FLUSH_MS, or sooner once REACTION_MAX_BATCH votes
+are waiting, one flush does this:
+  - one SELECT drops votes whose rows already exist
+  - one INSERT ... ON CONFLICT DO NOTHING RETURNING writes the rest and
+    reports which rows it actually inserted (on backends without
+    RETURNING, bulk_create(ignore_conflicts=True) plus a re-read of the
+    keys in the same transaction)
+  - one UPDATE bumps every touched counter (a CASE per counter row) by
+    the inserted rows only, after a bulk_create that creates missing
+    counter rows
+  - the per-second timelines of the touched videos are folded in
+    (timeline.py)
+So a burst on one verse costs a few statements per flush instead of a
+SELECT + INSERT per vote on the unique index. Votes for a video or channel
+deleted since they were taken are dropped before the insert. If a batch
+still violates a constraint, it is retried one vote at a time and the votes
+that fail alone are logged and discarded, so one bad row can't wedge the
+buffer. Flushes are serialized per
+worker, and only inserted rows are counted, so two workers flushing the
+same client's vote at once count it once. REACTION_FLUSH_MS = 0 writes
+each vote inline.
+
+VideoReaction stays the source of truth: `manage.py repair_reaction_counters`
+recomputes the counters from it.
+"""
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DataError, IntegrityError, connection, transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils import timezone
+
+from . import timeline
+from .models import Channel, FreestyleVideo, ReactionCounter, VideoReaction
+from .vote_receipts import index as voter_index
+from .write_behind import WriteBehindBuffer
+
+
+log = logging.getLogger(__name__)
+
+REACTIONS = ("fire", "nah")
+CLIENT_ID_MAX = VideoReaction._meta.get_field("client_id").max_length
+
+
+def _key(channel_id: int, video_id: int) -> str:
+    return f"freestyle:reactions:{channel_id}:{video_id}"
+
+
+def _ttl() -> float:
+    return float(getattr(settings, "REACTION_COUNTS_CACHE_SECONDS", 10))
+
+
+def counts(channel_id: int, video_id: int) -> dict[str, int]:
+    key = _key(channel_id, video_id)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+    row = (
+        ReactionCounter.objects.filter(channel_id=channel_id, video_id=video_id)
+        .values(*REACTIONS)
+        .first()
+    )
+    out = row or dict.fromkeys(REACTIONS, 0)
+    cache.set(key, out, timeout=_ttl())
+    return out
+
+
+def add(channel_id: int, video_id: int, deltas: dict[str, int]) -> None:
+    """Increment counters by `deltas` ({"fire": n, ...}); call inside the vote's transaction."""
+    deltas = {r: n for r, n in deltas.items() if n}
+    if not deltas:
+        return
+    updates = {r: F(r) + n for r, n in deltas.items()}
+    qs = ReactionCounter.objects.filter(channel_id=channel_id, video_id=video_id)
+    if not qs.update(**updates, updated_at=timezone.now()):
+        try:
+            with transaction.atomic():
+                ReactionCounter.objects.create(channel_id=channel_id, video_id=video_id, **deltas)
+        except IntegrityError:  # another vote created it first
+            qs.update(**updates, updated_at=timezone.now())
+    transaction.on_commit(lambda: cache.delete(_key(channel_id, video_id)))
+
+
+def _record_inline(channel_id: int, video_id: int, client_id: str, reaction: str, offset: int | None) -> bool:
+    with transaction.atomic():
+        _, created = VideoReaction.objects.get_or_create(
+            channel_id=channel_id,
+            video_id=video_id,
+            client_id=client_id,
+            defaults={"reaction": reaction, "offset_seconds": offset},
+        )
+        if created:
+            add(channel_id, video_id, {reaction: 1})
+            timeline.add([(channel_id, video_id, reaction, offset)])
+    return created
+
+
+# -------------------------
+# Buffered votes
+# -------------------------
+def flush_ms() -> float:
+    return float(getattr(settings, "REACTION_FLUSH_MS", 250))
+
+
+def _add_many(totals: dict[tuple[int, int], dict[str, int]]) -> None:
+    """add() for many counters: missing rows created, then one UPDATE with a CASE per row."""
+    ReactionCounter.objects.bulk_create(
+        [ReactionCounter(channel_id=ch, video_id=vid) for ch, vid in totals],
+        ignore_conflicts=True,
+    )
+    match = Q()
+    for ch, vid in totals:
+        match |= Q(channel_id=ch, video_id=vid)
+    updates = {}
+    for r in REACTIONS:
+        whens = [When(channel_id=ch, video_id=vid, then=Value(d[r])) for (ch, vid), d in totals.items() if d.get(r)]
+        if whens:
+            updates[r] = F(r) + Case(*whens, default=Value(0))
+    ReactionCounter.objects.filter(match).update(**updates, updated_at=timezone.now())
+    transaction.on_commit(lambda: cache.delete_many([_key(ch, vid) for ch, vid in totals]))
+
+
+# keys of the batch being written: not pending any more, not committed yet
+_inflight: frozenset = frozenset()
+
+
+def _swap(batch: dict) -> None:
+    global _inflight
+    _inflight = frozenset(batch)
+
+
+def _flush(batch: dict[tuple[int, int, str], tuple[str, int | None]]) -> None:
+    global _inflight
+    try:
+        _write(batch)
+    finally:
+        _inflight = frozenset()
+
+
+def _live(batch: dict) -> dict:
+    """The votes whose channel and video still exist."""
+    videos = set(FreestyleVideo.objects.filter(id__in={vid for _, vid, _ in batch}).values_list("id", flat=True))
+    channels = set(Channel.objects.filter(id__in={ch for ch, _, _ in batch}).values_list("id", flat=True))
+    live = {k: v for k, v in batch.items() if k[0] in channels and k[1] in videos}
+    if len(live) < len(batch):
+        log.warning("reactions: dropped %d votes for deleted videos/channels", len(batch) - len(live))
+    return live
+
+
+def _write(batch: dict[tuple[int, int, str], tuple[str, int | None]]) -> None:
+    batch = _live(batch)
+    try:
+        _write_rows(batch)
+    except (IntegrityError, DataError):
+        # a batch that can never commit must not go back to the buffer whole;
+        # other errors (connection lost, ...) propagate and the buffer retries
+        log.exception("reactions: batch of %d votes failed, retrying one at a time", len(batch))
+        for key, value in batch.items():
+            try:
+                _write_rows({key: value})
+            except (IntegrityError, DataError):
+                log.exception("reactions: discarding vote %s", key)
+
+
+def _write_rows(batch: dict[tuple[int, int, str], tuple[str, int | None]]) -> None:
+    if not batch:
+        return
+    pairs = {(ch, vid) for ch, vid, _ in batch}
+    with transaction.atomic():
+        existing = set(
+            VideoReaction.objects.filter(
+                channel_id__in={ch for ch, _ in pairs},
+                video_id__in={vid for _, vid in pairs},
+                client_id__in={cid for _, _, cid in batch},
+            ).values_list("channel_id", "video_id", "client_id")
+        )
+        fresh = {k: r for k, r in batch.items() if k not in existing}
+        if not fresh:
+            return
+        # a concurrent flush in another worker may have won some keys since the SELECT
+        fresh = _insert(fresh)
+        totals: dict[tuple[int, int], dict[str, int]] = {}
+        for (ch, vid, _), (r, _) in fresh.items():
+            row = totals.setdefault((ch, vid), dict.fromkeys(REACTIONS, 0))
+            row[r] += 1
+        _add_many(totals)
+        timeline.add((ch, vid, r, off) for (ch, vid, _), (r, off) in fresh.items())
+
+
+_INSERT_FIELDS = ("channel", "video", "client_id", "reaction", "offset_seconds", "created_at")
+
+
+def _insert(fresh: dict[tuple[int, int, str], tuple[str, int | None]]) -> dict:
+    """Insert `fresh`, skipping keys that exist by now; returns the votes actually inserted."""
+    objs = [
+        VideoReaction(channel_id=ch, video_id=vid, client_id=cid, reaction=r, offset_seconds=off)
+        for (ch, vid, cid), (r, off) in fresh.items()
+    ]
+    if connection.vendor in ("postgresql", "sqlite") and connection.features.can_return_rows_from_bulk_insert:
+        meta = VideoReaction._meta
+        fields = [meta.get_field(name) for name in _INSERT_FIELDS]
+        qn = connection.ops.quote_name
+        head = (
+            f"INSERT INTO {qn(meta.db_table)} ({', '.join(qn(f.column) for f in fields)}) VALUES "
+        )
+        tail = (
+            " ON CONFLICT DO NOTHING RETURNING "
+            + ", ".join(qn(meta.get_field(n).column) for n in ("channel", "video", "client_id"))
+        )
+        row_sql = "(" + ", ".join(["%s"] * len(fields)) + ")"
+        size = connection.ops.bulk_batch_size(fields, objs) or len(objs)
+        inserted = set()
+        with connection.cursor() as cursor:
+            for i in range(0, len(objs), size):
+                chunk = objs[i:i + size]
+                params = [f.get_db_prep_save(f.pre_save(o, True), connection) for o in chunk for f in fields]
+                cursor.execute(head + ", ".join([row_sql] * len(chunk)) + tail, params)
+                inserted.update(tuple(row) for row in cursor.fetchall())
+    else:
+        VideoReaction.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
+        # inside the flush's transaction, under REPEATABLE READ (MySQL's
+        # default) rows another worker committed after our SELECT stay invisible
+        inserted = set(
+            VideoReaction.objects.filter(
+                channel_id__in={ch for ch, _, _ in fresh},
+                video_id__in={vid for _, vid, _ in fresh},
+                client_id__in={cid for _, _, cid in fresh},
+            ).values_list("channel_id", "video_id", "client_id")
+        )
+    return {k: v for k, v in fresh.items() if k in inserted}
+
+
+def _keep_first(old, new):
+    return old
+
+
+_buffer = WriteBehindBuffer(
+    "reactions",
+    _flush,
+    interval=lambda: flush_ms() / 1000.0,
+    max_items=int(getattr(settings, "REACTION_MAX_BATCH", 2000)),
+    merge=_keep_first,
+    on_swap=_swap,
+)
+
+
+def record(channel_id: int, video_id: int, client_id: str, reaction: str, offset: int | None = None) -> bool:
+    """Take one vote (`offset`: seconds into the video, see timeline.py); False if already voted."""
+    client_id = client_id[:CLIENT_ID_MAX]
+    if flush_ms() <= 0:
+        created = _record_inline(channel_id, video_id, client_id, reaction, offset)
+    else:
+        key = (channel_id, video_id, client_id)
+        created = key not in _inflight and not (
+            voter_index.maybe_voted(channel_id, video_id, client_id)
+            and VideoReaction.objects.filter(channel_id=channel_id, video_id=video_id, client_id=client_id).exists()
+        ) and _buffer.add(key, (reaction, offset))
+    if created:
+        voter_index.note(channel_id, video_id, client_id)
+    return created
+
+
+def flush() -> int:
+    return _buffer.flush()
+
+
+def recount(channel_id: int | None = None) -> dict[tuple[int, int], dict[str, int]]:
+    """True totals from VideoReaction, {(channel_id, video_id): {"fire": n, "nah": n}}."""
+    qs = VideoReaction.objects.all()
+    if channel_id is not None:
+        qs = qs.filter(channel_id=channel_id)
+    rows = qs.values("channel_id", "video_id").annotate(
+        **{r: Count("id", filter=Q(reaction=r)) for r in REACTIONS}
+    )
+    return {(r["channel_id"], r["video_id"]): {k: r[k] for k in REACTIONS} for r in rows}
+
+
+def repair(channel_id: int | None = None, dry_run: bool = False) -> list[tuple[int, int, dict, dict]]:
+    """
+    Make ReactionCounter match VideoReaction. Returns the rows that were off
+    as (channel_id, video_id, stored, actual).
+    """
+    actual = recount(channel_id)
+    stored_qs = ReactionCounter.objects.all()
+    if channel_id is not None:
+        stored_qs = stored_qs.filter(channel_id=channel_id)
+    stored = {
+        (r["channel_id"], r["video_id"]): {k: r[k] for k in REACTIONS}
+        for r in stored_qs.values("channel_id", "video_id", *REACTIONS)
+    }
+
+    zero = dict.fromkeys(REACTIONS, 0)
+    drift = [
+        (ch, vid, stored.get((ch, vid), zero), actual.get((ch, vid), zero))
+        for ch, vid in sorted(stored.keys() | actual.keys())
+        if stored.get((ch, vid), zero) != actual.get((ch, vid), zero)
+    ]
+    if dry_run or not drift:
+        return drift
+
+    with transaction.atomic():
+        for ch, vid, _, right in drift:
+            ReactionCounter.objects.update_or_create(channel_id=ch, video_id=vid, defaults=right)
+    for ch, vid, _, _ in drift:
+        cache.delete(_key(ch, vid))
+    return drift
@@ -0,0 +1,251 @@
+# freestyle/schedule.py
+"""
+Compiled channel schedule.
+
+Every viewer-facing endpoint asks the same question: "what is on channel X at
+time T?". Instead of re-querying ChannelEntry + FreestyleVideo on every poll,
+we compile the rotation once into a flat tuple of items with cumulative start
+offsets and answer with a bisect.
+
+Compiled schedules are memoized per process and dropped when:
+  - a Channel / ChannelEntry / FreestyleVideo is saved or deleted (signals.py
+    bumps a shared version key), or
+  - SCHEDULE_CACHE_SECONDS pass (covers edits made by another process when
+    the cache backend is per-process LocMem).
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Channel, ChannelEntry
+
+
+VERSION_KEY = "freestyle:schedule:version"
+
+
+@dataclass(frozen=True)
+class ScheduleItem:
+    entry_id: int
+    id: int  # video id (matches _video_payload / now.json "id")
+    title: str
+    play_url: str
+    is_hls: bool
+    duration_seconds: int
+    storage_name: str
+    start: int  # seconds from the start of a rotation cycle
+    cmaf_playlist: str = ""
+
+    @property
+    def local_path(self) -> str | None:
+        """Absolute path on disk when the item is a local /media/ file."""
+        if self.storage_name:
+            return os.path.join(str(settings.MEDIA_ROOT), self.storage_name)
+        return media_path(self.play_url)
+
+
+def media_path(url: str) -> str | None:
+    """/media/x/y.mp4 -> MEDIA_ROOT/x/y.mp4 (None for remote / non-media URLs)."""
+    media_url = settings.MEDIA_URL
+    if url and url.startswith(media_url):
+        rel = url[len(media_url):].lstrip("/")
+        return os.path.join(str(settings.MEDIA_ROOT), rel)
+    return None
+
+
+@dataclass(frozen=True)
+class Slot:
+    """One airing of an item: which cycle, and when it starts/ends (epoch seconds)."""
+    item: ScheduleItem
+    index: int
+    cycle: int
+    start_epoch: float
+    offset_seconds: int  # seconds into the item at the requested time
+
+    @property
+    def end_epoch(self) -> float:
+        return self.start_epoch + self.item.duration_seconds
+
+
+@dataclass(frozen=True)
+class CompiledSchedule:
+    channel_id: int
+    slug: str
+    anchor_epoch: float
+    items: tuple[ScheduleItem, ...]   # only items that take part in rotation (duration > 0)
+    starts: tuple[int, ...]           # items[i].start, kept separately for bisect
+    playlist_ids: tuple[int, ...]     # every active entry's video id, in order
+    first_video_id: int | None        # fallback "now" when nothing has a duration
+    total: int                        # rotation length in seconds
+    compiled_at: float
+
+    def at(self, epoch: float | None = None) -> Slot | None:
+        if not self.items or self.total <= 0:
+            return None
+        epoch = time.time() if epoch is None else epoch
+        elapsed = int(epoch - self.anchor_epoch)
+        cycle, pos = divmod(elapsed, self.total)
+        i = bisect_right(self.starts, pos) - 1
+        item = self.items[i]
+        cycle_start = self.anchor_epoch + cycle * self.total
+        return Slot(
+            item=item,
+            index=i,
+            cycle=cycle,
+            start_epoch=cycle_start + item.start,
+            offset_seconds=pos - item.start,
+        )
+
+    def station_offset(self, epoch: float | None = None) -> int:
+        if self.total <= 0:
+            return 0
+        epoch = time.time() if epoch is None else epoch
+        return int(epoch - self.anchor_epoch) % self.total
+
+    def following(self, slot: Slot) -> Slot:
+        """The slot that airs right after `slot` (wraps into the next cycle)."""
+        i = slot.index + 1
+        cycle = slot.cycle
+        if i >= len(self.items):
+            i = 0
+            cycle += 1
+        item = self.items[i]
+        return Slot(
+            item=item,
+            index=i,
+            cycle=cycle,
+            start_epoch=self.anchor_epoch + cycle * self.total + item.start,
+            offset_seconds=0,
+        )
+
+    def airing_after(self, index: int, epoch: float) -> Slot:
+        """The first airing of items[index] that starts at or after `epoch`."""
+        item = self.items[index]
+        cycle = max(0, math.ceil((epoch - self.anchor_epoch - item.start) / self.total))
+        return Slot(
+            item=item,
+            index=index,
+            cycle=cycle,
+            start_epoch=self.anchor_epoch + cycle * self.total + item.start,
+            offset_seconds=0,
+        )
+
+    def upcoming(self, epoch: float | None = None, count: int = 1) -> list[Slot]:
+        """The next `count` airings after the one on now (not including it)."""
+        slot = self.at(epoch)
+        out = []
+        if not slot:
+            return out
+        for _ in range(max(0, count)):
+            slot = self.following(slot)
+            out.append(slot)
+        return out
+
+
+def preload_at(current: Slot, nxt: Slot, key: str, window: float, min_lead: float) -> float:
+    """
+    When a client should start preloading `nxt` (epoch seconds).
+
+    Spread uniformly over [nxt.start - window, nxt.start - min_lead] (clipped to
+    the current airing) by hashing the client key, so a swarm of viewers fetches
+    the next item's first bytes over `window` seconds instead of all at once at
+    the boundary. Stable for a given client and airing, so polls agree.
+    """
+    lo = max(current.start_epoch, nxt.start_epoch - window)
+    hi = nxt.start_epoch - min_lead
+    if hi <= lo:
+        return lo
+    digest = hashlib.blake2b(f"{key}:{nxt.start_epoch}".encode(), digest_size=8).digest()
+    frac = int.from_bytes(digest, "big") / 2**64
+    return lo + frac * (hi - lo)
+
+
+def compile_schedule(channel: Channel) -> CompiledSchedule:
+    entries = list(
+        ChannelEntry.objects.filter(channel=channel, is_active=True)
+        .select_related("video")
+        .order_by("sort_order", "id")
+    )
+
+    items = []
+    acc = 0
+    for e in entries:
+        v = e.video
+        d = int(getattr(v, "duration_seconds", 0) or 0)
+        if d <= 0:
+            continue
+        video_file = getattr(v, "video_file", None)
+        items.append(
+            ScheduleItem(
+                entry_id=e.id,
+                id=v.id,
+                title=getattr(v, "title", "") or "",
+                play_url=getattr(v, "play_url", "") or "",
+                is_hls=bool(getattr(v, "is_hls", False)),
+                duration_seconds=d,
+                storage_name=(video_file.name if video_file and getattr(video_file, "name", None) else ""),
+                start=acc,
+                cmaf_playlist=getattr(v, "cmaf_playlist", "") or "",
+            )
+        )
+        acc += d
+
+    anchor = getattr(channel, "schedule_started_at", None)
+    return CompiledSchedule(
+        channel_id=channel.id,
+        slug=channel.slug,
+        anchor_epoch=anchor.timestamp() if anchor else time.time(),
+        items=tuple(items),
+        starts=tuple(it.start for it in items),
+        playlist_ids=tuple(e.video_id for e in entries),
+        first_video_id=entries[0].video_id if entries else None,
+        total=acc,
+        compiled_at=time.time(),
+    )
+
+
+# -------------------------
+# Per-process memo
+# -------------------------
+_memo: dict[int, tuple[int, CompiledSchedule]] = {}
+_memo_lock = threading.Lock()
+
+
+def _version() -> int:
+    return int(cache.get(VERSION_KEY) or 0)
+
+
+def compiled_schedule(channel: Channel) -> CompiledSchedule:
+    ttl = float(getattr(settings, "SCHEDULE_CACHE_SECONDS", 30))
+    version = _version()
+    now = time.time()
+
+    with _memo_lock:
+        hit = _memo.get(channel.id)
+    if hit:
+        v, sched = hit
+        if v == version and now - sched.compiled_at < ttl:
+            return sched
+
+    sched = compile_schedule(channel)
+    with _memo_lock:
+        _memo[channel.id] = (version, sched)
+    return sched
+
+
+def invalidate() -> None:
+    """Drop compiled schedules here and (via the shared cache) in other workers."""
+    with _memo_lock:
+        _memo.clear()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
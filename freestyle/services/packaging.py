@@ -0,0 +1,24 @@
+import os
+
+from django.conf import settings
+
+from freestyle.fmp4 import package_mp4
+from freestyle.models import FreestyleVideo
+
+
+def package_video_cmaf(video: FreestyleVideo, target: float | None = None):
+    """
+    Ingest stage: repackage an uploaded MP4 into fMP4 segments next to it and
+    point video.cmaf_playlist at the VOD playlist (a /media/... URL).
+    """
+    if video.is_hls or not video.video_file:
+        return None
+
+    target = float(target or getattr(settings, "HLS_SEGMENT_SECONDS", 4))
+    src = video.video_file.path
+    result = package_mp4(src, target=target)
+
+    rel_dir = os.path.relpath(result.out_dir, str(settings.MEDIA_ROOT)).replace(os.sep, "/")
+    video.cmaf_playlist = f"{settings.MEDIA_URL}{rel_dir}/{result.playlist_name}"
+    video.save(update_fields=["cmaf_playlist"])
+    return result
@@ -1,8 +1,11 @@
+import time
+
 from django.db import transaction
 from django.db.models import Max
 from django.utils import timezone
 
 from freestyle.models import Channel, ChannelEntry, FreestyleVideo
+from freestyle.schedule import compiled_schedule
 
 
 @transaction.atomic
@@ -36,21 +39,34 @@ def publish_append_to_end(video: FreestyleVideo, channel_slug="main") -> Channel
     return entry
 
 
+def _has_played_once(channel: Channel, entry: ChannelEntry, now: float) -> bool:
+    """True once a full airing of `entry` has finished since it was added (started_at)."""
+    sched = compiled_schedule(channel)
+    index = next((i for i, it in enumerate(sched.items) if it.entry_id == entry.id), None)
+    if index is None:
+        return False  # not in rotation (no duration): it can't have played
+    slot = sched.airing_after(index, entry.started_at.timestamp())
+    return slot.end_epoch <= now
+
+
 @transaction.atomic
-def cleanup_oldest_if_played_once(channel: Channel):
-    oldest = (
-        ChannelEntry.objects
-        .select_for_update()
-        .filter(channel=channel, active=True)
-        .order_by("position", "added_at")
-        .first()
-    )
+def cleanup_oldest_if_played_once(channel: Channel, max_entries: int | None = None):
+    """
+    Deactivate the channel's oldest active entry, but only after it has aired
+    in full at least once. With `max_entries`, only while the rotation is
+    longer than that.
+    """
+    active = ChannelEntry.objects.select_for_update().filter(channel=channel, is_active=True)
+    if max_entries is not None and active.count() <= max_entries:
+        return None
+
+    oldest = active.order_by("started_at", "id").first()
     if not oldest:
         return None
 
-    if oldest.has_played_once:
-        oldest.active = False
-        oldest.save(update_fields=["active"])
+    if _has_played_once(channel, oldest, time.time()):
+        oldest.is_active = False
+        oldest.save(update_fields=["is_active"])
         return oldest
 
     return None
@@ -0,0 +1,16 @@
+# freestyle/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import schedule
+from .models import Channel, ChannelEntry, FreestyleVideo
+
+
+@receiver(post_save, sender=Channel)
+@receiver(post_delete, sender=Channel)
+@receiver(post_save, sender=ChannelEntry)
+@receiver(post_delete, sender=ChannelEntry)
+@receiver(post_save, sender=FreestyleVideo)
+@receiver(post_delete, sender=FreestyleVideo)
+def _schedule_changed(sender, **kwargs):
+    schedule.invalidate()
@@ -0,0 +1,53 @@
+// static/freestyle/captions_bin.js
+// Decoder for /api/freestyle/video/<id>/captions.bin (format: freestyle/captions_bin.py).
+// FSCaptions.decode(arrayBuffer) -> { words: [{ w, s, e }] } with s/e in seconds,
+// the same shape captions.json returns.
+(() => {
+  "use strict";
+
+  const MAGIC = [0x46, 0x53, 0x43, 0x01];   // "FSC" + version 1
+
+  function decode(buf){
+    const b = new Uint8Array(buf);
+    for (let i = 0; i < MAGIC.length; i++){
+      if (b[i] !== MAGIC[i]) throw new Error("not a captions.bin");
+    }
+    let p = MAGIC.length;
+
+    // LEB128; multiply instead of shift so values past 2^31 stay exact
+    const varint = () => {
+      let n = 0, mul = 1, byte;
+      do {
+        if (p >= b.length) throw new Error("truncated captions.bin");
+        byte = b[p++];
+        n += (byte & 0x7f) * mul;
+        mul *= 128;
+      } while (byte & 0x80);
+      return n;
+    };
+
+    const text = new TextDecoder("utf-8");
+    const table = new Array(varint());
+    for (let i = 0; i < table.length; i++){
+      const len = varint();
+      table[i] = text.decode(b.subarray(p, p + len));
+      p += len;
+    }
+
+    const n = varint();
+    const ids = new Uint32Array(n);
+    for (let i = 0; i < n; i++) ids[i] = varint();
+
+    const start = new Float64Array(n);   // ms, so s/e divide once and match captions.json
+    let at = 0;
+    for (let i = 0; i < n; i++){ at += varint(); start[i] = at; }
+
+    const words = new Array(n);
+    for (let i = 0; i < n; i++){
+      words[i] = { w: table[ids[i]], s: start[i] / 1000, e: (start[i] + varint()) / 1000 };
+    }
+    return { words };
+  }
+
+  window.FSCaptions = { decode };
+})();
@@ -41,7 +41,8 @@
 
   // URLs
   const nowUrlBase      = `/api/freestyle/channel/${channelSlug}/now.json`;
-  const captionsUrlFor  = (videoId) => `/api/freestyle/video/${videoId}/captions.json`;
+  const captionsUrlFor  = (videoId, from, to) => `/api/freestyle/video/${videoId}/captions.json?from=${from}&to=${to}`;
+  const captionsBinUrl  = (videoId) => `/api/freestyle/video/${videoId}/captions.bin`;
 
   const chatPollUrl = (afterId) => `/api/freestyle/channel/${channelSlug}/chat/messages.json?after_id=${afterId||0}`;
   const chatSendUrl = `/api/freestyle/channel/${channelSlug}/chat/send.json`;
@@ -59,10 +60,14 @@
   let currentSrc = null;
   let switching = false;
 
-  // Captions state
-  let capWords = [];
+  // Captions state: aligned windows fetched as playback advances
+  const CAP_WINDOW_SEC = 60;
+  const CAP_PREFETCH_SEC = 10;    // fetch the next window this close to the edge
+  let capWords = [];              // words of the windows held, sorted by start
+  let capWindows = new Map();     // window index -> words (null while loading)
   let capIndex = 0;
   let capLastVideoId = null;
+  let capWhole = false;           // the whole track came from captions.bin: no windows
 
   // Chat state
   let lastChatId = 0;
@@ -238,22 +243,72 @@
 
     capLastVideoId = videoId;
     capWords = []; capIndex = 0;
+    capWindows = new Map();
+    capWhole = false;
     captionsEl.style.display = "none";
     captionsEl.textContent = "";
 
+    // compact binary track when captions_bin.js is on the page, JSON windows otherwise
+    if (window.FSCaptions){
+      capWhole = true;
+      try {
+        const res = await fetch(captionsBinUrl(videoId));
+        if (!res.ok) throw new Error("no captions.bin");
+        const { words } = window.FSCaptions.decode(await res.arrayBuffer());
+        if (capLastVideoId !== videoId) return;
+        capWords = words;
+        capIndex = findIndexForTime(videoEl.currentTime || 0);
+        return;
+      } catch(e) {
+        if (capLastVideoId !== videoId) return;
+        capWhole = false;
+      }
+    }
+    ensureCaptionWindows(videoEl.currentTime || 0);
+  }
+
+  // Plain fetch (no "no-store"): windows revalidate by ETag and come back 304.
+  async function fetchCaptionWindow(videoId, k){
+    capWindows.set(k, null);
     try {
-      const res = await fetch(captionsUrlFor(videoId), { cache:"no-store" });
+      const from = k * CAP_WINDOW_SEC;
+      const res = await fetch(captionsUrlFor(videoId, from, from + CAP_WINDOW_SEC));
       if (!res.ok) throw new Error("no captions");
       const data = await res.json();
+      if (capLastVideoId !== videoId) return;
+      capWindows.set(k, Array.isArray(data.words) ? data.words : []);
+      mergeCaptionWindows();
+    } catch(e) {
+      if (capLastVideoId === videoId) capWindows.set(k, []);   // no retry every frame
+    }
+  }
 
-      capWords = Array.isArray(data.words) ? data.words : [];
-      capIndex = 0;
+  function ensureCaptionWindows(t){
+    const videoId = capLastVideoId;
+    if (!videoId || capWhole) return;
+    const k = Math.floor(Math.max(0, t) / CAP_WINDOW_SEC);
+    // a seek leaves old windows behind: keep the current one and its neighbours
+    for (const held of capWindows.keys()){
+      if (held < k - 1 || held > k + 1){ capWindows.delete(held); mergeCaptionWindows(); }
+    }
+    if (!capWindows.has(k)) fetchCaptionWindow(videoId, k);
+    if (t > (k + 1) * CAP_WINDOW_SEC - CAP_PREFETCH_SEC && !capWindows.has(k + 1)) fetchCaptionWindow(videoId, k + 1);
+  }
 
-      if (capWords.length) captionsEl.style.display = "block";
-    } catch(e) {
-      capWords = []; capIndex = 0;
-      captionsEl.style.display = "none";
+  function mergeCaptionWindows(){
+    // a word that straddles a window edge comes back in both windows
+    const seen = new Set();
+    const words = [];
+    for (const k of [...capWindows.keys()].sort((a, b) => a - b)){
+      for (const w of capWindows.get(k) || []){
+        const key = `${w.s}|${w.w}`;
+        if (seen.has(key)) continue;
+        seen.add(key);
+        words.push(w);
+      }
     }
+    capWords = words;
+    capIndex = capWords.length ? findIndexForTime(videoEl.currentTime || 0) : 0;
   }
 
   function findIndexForTime(t){
@@ -269,9 +324,9 @@
 
   function renderCaptions(){
     if (!captionsEl) return;
-    if (!capWords.length) return;
-
     const t = videoEl.currentTime || 0;
+    ensureCaptionWindows(t);
+    if (!capWords.length) return;
 
     if (capIndex >= capWords.length || (capWords[capIndex] && (capWords[capIndex].s || 0) > t + 0.4)){
       capIndex = findIndexForTime(t);
@@ -19,10 +19,12 @@
   const CHANNEL = (document.documentElement.dataset.channel || "main").trim();
 
   // IMPORTANT: these MUST match freestyle/urls.py
-  const NOW_URL = `/api/freestyle/channel/${encodeURIComponent(CHANNEL)}/now.json`;
-  const PRESENCE_URL = `/api/freestyle/presence/ping.json`;
+  // one poll for now + presence + chat delta + reactions (tick.json)
+  const TICK_URL = `/api/freestyle/channel/${encodeURIComponent(CHANNEL)}/tick.json`;
   const CHAT_POLL_URL = (afterId) =>
-    `/api/freestyle/channel/${encodeURIComponent(CHANNEL)}/chat/messages.json?after_id=${afterId || 0}`;
+    `/api/freestyle/channel/${encodeURIComponent(CHANNEL)}/chat/messages.json?after_id=${afterId || 0}&wait=${CHAT_WAIT_S}`;
+  const CHAT_WS_URL = () =>
+    `${location.protocol === "https:" ? "wss" : "ws"}://${location.host}/ws/freestyle/channel/${encodeURIComponent(CHANNEL)}/chat/?cid=${encodeURIComponent(CLIENT_ID)}`;
   const CHAT_SEND_URL =
     `/api/freestyle/channel/${encodeURIComponent(CHANNEL)}/chat/send.json`;
 
@@ -34,20 +36,32 @@
   const DURATION_SAVE_URL = (videoId) =>
     `/api/freestyle/video/${encodeURIComponent(videoId)}/duration.json`;
 
+  const CAPTIONS_URL = (videoId, from, to) =>
+    `/api/freestyle/video/${encodeURIComponent(videoId)}/captions.json?from=${from}&to=${to}`;
+  const CAPTIONS_BIN_URL = (videoId) =>
+    `/api/freestyle/video/${encodeURIComponent(videoId)}/captions.bin`;
+
   const CSRF_TOKEN = getCookie("csrftoken");
 
-  const POLL_MS = 2500;
-  const CHAT_POLL_MS = 1200;
-  const PRESENCE_MS = 10000;
+  const POLL_MS = 2500;       // until the server says otherwise (next_poll_ms)
+  const POLL_MIN_MS = 1000;
+  const POLL_MAX_MS = 30000;   // also caps the backoff after failed polls
+  const POLL_JITTER = 0.15;    // each wait is stretched by up to this much, never shortened
+  const CHAT_POLL_MS = 1200;   // back-off between long-polls after an error
+  const CHAT_WAIT_S = 25;      // server parks the poll until a message arrives
+  const CHAT_WS_RETRY_MS = 60000;  // long-poll this long before retrying a socket that never opened
 
   const VIEW_BASE = 1100;
 
+  const CAP_WINDOW_SEC = 60;      // captions.json window when captions.bin can't be used
+  const CAP_PREFETCH_SEC = 10;    // fetch the next window this close to the edge
+
   // Sync policy (NO rewind ever)
   const SEEK_FORWARD_IF_BEHIND_SEC = 6;   // only jump forward if badly behind
   const DRIFT_OK_SEC = 1.25;              // do nothing if within this window
 
   // ---------- elements ----------
-  const videoEl = document.getElementById("player");
+  let videoEl = document.getElementById("player");  // swapped at boundaries, see handoff
   const qualityHud = document.getElementById("qualityHud");
 
   const muteBtn = document.getElementById("muteBtn");
@@ -55,6 +69,7 @@
   const fsBtn = document.getElementById("fsBtn");
 
   const viewerCountEl = document.getElementById("viewerCount");
+  const captionsEl = document.getElementById("captions");
 
   const chatDock = document.getElementById("chatDock");
   const chatOpenBtn = document.getElementById("chatOpenBtn");
@@ -184,6 +199,7 @@
 
   let currentVideoId = null;
 
+  // between ticks (video switch, refused vote): ask state.json directly
   async function refreshReactions(){
     if (!currentVideoId) return;
     try{
@@ -193,24 +209,26 @@
       });
       if (!res.ok) return;
       const data = await res.json();
-      if (!data.ok) return;
+      if (data.ok) renderReactions(data);
+    }catch(e){}
+  }
 
-      fireCount.textContent = data.counts?.fire ?? 0;
-      nahCount.textContent  = data.counts?.nah  ?? 0;
+  function renderReactions(data){
+    fireCount.textContent = data.counts?.fire ?? 0;
+    nahCount.textContent  = data.counts?.nah  ?? 0;
 
-      const votedLocal = localStorage.getItem(votedKey(currentVideoId));
-      const voted = data.voted || votedLocal;
+    const votedLocal = localStorage.getItem(votedKey(currentVideoId));
+    const voted = data.voted || votedLocal;
 
-      if (voted){
-        fireBtn.disabled = true;
-        nahBtn.disabled = true;
-        rxNote.textContent = "voted";
-      } else {
-        fireBtn.disabled = false;
-        nahBtn.disabled = false;
-        rxNote.textContent = "Vote once per video";
-      }
-    }catch(e){}
+    if (voted){
+      fireBtn.disabled = true;
+      nahBtn.disabled = true;
+      rxNote.textContent = "voted";
+    } else {
+      fireBtn.disabled = false;
+      nahBtn.disabled = false;
+      rxNote.textContent = "Vote once per video";
+    }
   }
 
   async function vote(reaction){
@@ -222,22 +240,32 @@
         method:"POST",
         headers: {
           "Content-Type":"application/json",
-          "X-CSRFToken": CSRF_TOKEN
+          "X-CSRFToken": CSRF_TOKEN,
+          "X-Client-Id": CLIENT_ID
         },
-        body: JSON.stringify({ video_id: currentVideoId, reaction, client_id: CLIENT_ID })
+        // position in the video for the reaction timeline (HLS time isn't one)
+        body: JSON.stringify({
+          video_id: currentVideoId, reaction, client_id: CLIENT_ID,
+          offset: currentIsHls ? null : Math.floor(videoEl.currentTime || 0)
+        })
       });
       const data = await res.json();
       if (!data.ok && !data.already_voted) return;
 
       localStorage.setItem(votedKey(currentVideoId), reaction);
       bubble(reaction === "fire" ? "🔥" : "🚫");
-      await refreshReactions();
+      if (!data.ok) return refreshReactions();
+      // votes are written in batches: count ours now, a later poll catches up
+      const el = reaction === "fire" ? fireCount : nahCount;
+      el.textContent = (parseInt(el.textContent, 10) || 0) + 1;
+      fireBtn.disabled = true;
+      nahBtn.disabled = true;
+      rxNote.textContent = "voted";
     }catch(e){}
   }
 
   fireBtn.addEventListener("click", () => vote("fire"));
   nahBtn.addEventListener("click", () => vote("nah"));
-  setInterval(refreshReactions, 2500);
 
   // ---------- duration repair ----------
   async function trySaveDuration(videoId){
@@ -254,7 +282,8 @@
         method: "POST",
         headers: {
           "Content-Type": "application/json",
-          "X-CSRFToken": CSRF_TOKEN
+          "X-CSRFToken": CSRF_TOKEN,
+          "X-Client-Id": CLIENT_ID
         },
         body: JSON.stringify({ duration_seconds: dur })
       });
@@ -357,29 +386,160 @@
 
   // If MP4 ends, we do NOT loop.
   // We pause and wait for scheduler to move to next content.
-  videoEl.addEventListener("ended", () => {
-    if (!currentIsHls) {
-      mp4Ended = true;
-      try { videoEl.pause(); } catch(e) {}
+  function bindPlayer(el){
+    el.addEventListener("ended", () => {
+      if (el !== videoEl) return;
+      if (!currentIsHls) {
+        mp4Ended = true;
+        try { el.pause(); } catch(e) {}
+      }
+    });
+  }
+  bindPlayer(videoEl);
+
+  // ---------- boundary handoff ----------
+  // now.json publishes what airs next and when THIS client should preload it
+  // (jittered server-side per sid). We preload into a hidden <video> and swap
+  // it in locally at the boundary, so TVs don't all hit now.json and the new
+  // file's first ranges in the same second.
+  let clockSkew = 0;          // server epoch - local epoch (seconds)
+  let preloadEl = null;
+  let preloadSrc = null;
+  let preloadTimer = null;
+  let switchTimer = null;
+  let plannedHandoff = null;  // `${src}@${switch_epoch}`
+  let handoffAt = 0;          // server epoch of our last local switch
+
+  function serverNow(){ return Date.now() / 1000 + clockSkew; }
+
+  function dropPreload(){
+    if (preloadEl) {
+      preloadEl.removeAttribute("src");
+      try { preloadEl.load(); } catch(e) {}
+      preloadEl.remove();
     }
-  });
+    preloadEl = null;
+    preloadSrc = null;
+  }
+
+  function preloadNext(item){
+    // HLS items buffer through hls.js; only progressive files are preloaded
+    if (!item?.play_url || item.is_hls) return;
+    const src = String(item.play_url);
+    if (preloadSrc === src) return;
+    dropPreload();
+
+    const el = videoEl.cloneNode(false);
+    el.removeAttribute("id");
+    el.removeAttribute("src");
+    el.preload = "auto";
+    el.muted = true;
+    el.loop = false;
+    el.style.display = "none";
+    el.src = src;
+    videoEl.insertAdjacentElement("afterend", el);
+    preloadEl = el;
+    preloadSrc = src;
+  }
+
+  function takePreloaded(src){
+    // Swap the preloaded element in for the live player; false if we don't have it.
+    if (!preloadEl || preloadSrc !== src) return false;
+    const el = preloadEl;
+    const old = videoEl;
+    preloadEl = null;
+    preloadSrc = null;
+
+    destroyHls();
+    el.muted = old.muted;
+    el.volume = old.volume;
+    el.style.display = "";
+    el.id = old.id;
+    old.removeAttribute("id");
+    try { old.pause(); } catch(e) {}
+    old.removeAttribute("src");
+    try { old.load(); } catch(e) {}
+    old.remove();
+
+    videoEl = el;
+    bindPlayer(el);
+    mp4Ended = false;
+    const h = el.videoHeight || 0;
+    setQuality(h ? `Quality: ${h}p (MP4)` : "Quality: MP4");
+    return true;
+  }
+
+  async function switchTo(item){
+    const src = String(item.play_url || "");
+    if (!src || src === currentSrc) return;
+    // no preload (HLS, or it failed): the next poll attaches it the old way
+    if (!takePreloaded(src)) return;
+
+    currentSrc = src;
+    currentIsHls = false;
+    currentVideoId = String(item.id || "");
+    handoffAt = serverNow();
+    try { videoEl.currentTime = 0; } catch(e) {}
+    try { await videoEl.play(); } catch(e) {}
+    trySaveDuration(currentVideoId);
+    refreshReactions();
+  }
+
+  function planHandoff(data){
+    const next = data?.next;
+    const pf = data?.prefetch;
+    if (!next?.play_url || !pf) return;
+
+    const key = `${next.play_url}@${pf.switch_epoch}`;
+    if (key === plannedHandoff) return;
+    plannedHandoff = key;
+
+    clearTimeout(preloadTimer);
+    clearTimeout(switchTimer);
+    const now = serverNow();
+    preloadTimer = setTimeout(() => preloadNext(next), Math.max(0, (Number(pf.at_epoch) - now) * 1000));
+    switchTimer = setTimeout(() => switchTo(next), Math.max(0, (Number(pf.switch_epoch) - now) * 1000));
+  }
 
   // ---------- NOW sync (NO rewind) ----------
+  function tickUrl(){
+    const q = new URLSearchParams({ sid: SID });
+    // chat rides the tick only while neither the socket nor a long-poll carries it
+    if (!chatWs && !chatLongPoll) q.set("after_id", String(lastChatId));
+    if (currentVideoId) q.set("video_id", currentVideoId);
+    return `${TICK_URL}?${q}`;
+  }
+
   async function fetchNow(){
-    const res = await fetch(NOW_URL, { cache:"no-store" });
-    if (!res.ok) throw new Error(`now.json ${res.status}`);
+    const res = await fetch(tickUrl(), { cache:"no-store", headers: { "X-Client-Id": CLIENT_ID } });
+    if (!res.ok) throw new Error(`tick.json ${res.status}`);
     return await res.json();
   }
 
+  function applyTick(data){
+    appendNew(data?.chat?.items);
+    const rx = data?.reactions;
+    if (rx && String(rx.video_id) === currentVideoId) renderReactions(rx);
+  }
+
   async function syncNow(){
     const data = await fetchNow();
+    if (data?.next_poll_ms) pollMs = clamp(Number(data.next_poll_ms), POLL_MIN_MS, POLL_MAX_MS);
+    applyTick(data);
     const item = data?.item;
     if (!item?.play_url) return;
 
+    if (data.server_epoch) clockSkew = Number(data.server_epoch) - Date.now() / 1000;
+    // a poll that left before our local switch still describes the old item
+    if (data.server_epoch && Number(data.server_epoch) < handoffAt) return;
+    planHandoff(data);
+
     const nextSrc = String(item.play_url);
     const nextIsHls = !!item.is_hls;
-    const nextId = String(item.video_id || "");
+    const nextId = String(item.video_id || item.id || "");
     const offset = Number(data.offset_seconds || 0);
+    capOffset = offset;
+    capOffsetAt = Number(data.server_epoch) || serverNow();
 
     // update viewers (backend returns REAL count, we add base)
     const viewersReal = Number(data.viewers || 0) || 0;
@@ -393,6 +553,14 @@
       currentSrc = nextSrc;
       currentIsHls = nextIsHls;
 
+      // joined late / missed the timer, but the preload is ready: use it
+      if (!nextIsHls && takePreloaded(nextSrc)) {
+        try { videoEl.currentTime = Math.max(0, Math.floor(offset)); } catch(e) {}
+        try { await videoEl.play(); } catch(e) {}
+        refreshReactions();
+        return;
+      }
+
       attachSource(nextSrc, nextIsHls);
 
       videoEl.addEventListener("loadedmetadata", async () => {
@@ -443,53 +611,264 @@
     }
   }
 
+  // ---------- Captions ----------
+  // The whole track from captions.bin (captions_bin.js), or captions.json a
+  // window at a time when the decoder or the blob is missing.
+  let capVideoId = null;
+  let capWords = [];              // {w, s, e} (seconds), sorted by start
+  let capWindows = new Map();     // window index -> words (null while loading)
+  let capWhole = false;           // capWords is the whole track: no windows
+  let capIndex = 0;
+  let capOffset = 0;              // position in the video at capOffsetAt (server epoch)
+  let capOffsetAt = 0;
+
+  function playhead(){
+    // the live HLS stream's currentTime is stream time, not the video's
+    if (!currentIsHls) return Number(videoEl.currentTime || 0);
+    return capOffset + Math.max(0, serverNow() - capOffsetAt);
+  }
+
+  async function loadCaptions(videoId){
+    capVideoId = videoId;
+    capWords = []; capIndex = 0;
+    capWindows = new Map();
+    capWhole = false;
+    captionsEl.style.display = "none";
+    captionsEl.textContent = "";
+    if (!videoId || !window.FSCaptions) return;
+
+    capWhole = true;
+    try{
+      const res = await fetch(CAPTIONS_BIN_URL(videoId));
+      if (!res.ok) throw new Error(`captions.bin ${res.status}`);
+      const { words } = window.FSCaptions.decode(await res.arrayBuffer());
+      if (capVideoId !== videoId) return;
+      capWords = words;
+      capIndex = findCaption(playhead());
+    }catch(e){
+      if (capVideoId === videoId) capWhole = false;
+    }
+  }
+
+  // Plain fetch (no "no-store"): windows revalidate by ETag and come back 304.
+  async function fetchCaptionWindow(videoId, k){
+    capWindows.set(k, null);
+    try{
+      const from = k * CAP_WINDOW_SEC;
+      const res = await fetch(CAPTIONS_URL(videoId, from, from + CAP_WINDOW_SEC));
+      if (!res.ok) throw new Error(`captions.json ${res.status}`);
+      const data = await res.json();
+      if (capVideoId !== videoId) return;
+      capWindows.set(k, Array.isArray(data.words) ? data.words : []);
+      mergeCaptionWindows();
+    }catch(e){
+      if (capVideoId === videoId) capWindows.set(k, []);   // no retry every frame
+    }
+  }
+
+  function ensureCaptionWindows(t){
+    if (!capVideoId || capWhole) return;
+    const k = Math.floor(Math.max(0, t) / CAP_WINDOW_SEC);
+    // a seek leaves old windows behind: keep the current one and its neighbours
+    for (const held of [...capWindows.keys()]){
+      if (held < k - 1 || held > k + 1){ capWindows.delete(held); mergeCaptionWindows(); }
+    }
+    if (!capWindows.has(k)) fetchCaptionWindow(capVideoId, k);
+    if (t > (k + 1) * CAP_WINDOW_SEC - CAP_PREFETCH_SEC && !capWindows.has(k + 1)) fetchCaptionWindow(capVideoId, k + 1);
+  }
+
+  function mergeCaptionWindows(){
+    // a word that straddles a window edge comes back in both windows
+    const seen = new Set();
+    const words = [];
+    for (const k of [...capWindows.keys()].sort((a, b) => a - b)){
+      for (const w of capWindows.get(k) || []){
+        const key = `${w.s}|${w.w}`;
+        if (seen.has(key)) continue;
+        seen.add(key);
+        words.push(w);
+      }
+    }
+    capWords = words;
+    capIndex = findCaption(playhead());
+  }
+
+  function findCaption(t){
+    // last word starting at or before t
+    let lo = 0, hi = capWords.length - 1, ans = 0;
+    while (lo <= hi){
+      const mid = (lo + hi) >> 1;
+      if ((capWords[mid].s || 0) <= t){ ans = mid; lo = mid + 1; }
+      else hi = mid - 1;
+    }
+    return ans;
+  }
+
+  function renderCaptions(){
+    if (currentVideoId !== capVideoId) loadCaptions(currentVideoId);
+    const t = playhead();
+    ensureCaptionWindows(t);
+    if (!capWords.length) return;
+
+    if (capIndex >= capWords.length || (capWords[capIndex].s || 0) > t + 0.4) capIndex = findCaption(t);
+    while (capIndex < capWords.length && (capWords[capIndex].e || 0) < t) capIndex++;
+
+    const parts = [];
+    for (let i = Math.max(0, capIndex - 3); i < Math.min(capWords.length, capIndex + 6); i++){
+      const w = (capWords[i].w || "").trim();
+      if (!w) continue;
+      const hot = t >= (capWords[i].s || 0) - 0.02 && t <= (capWords[i].e || 0) + 0.02;
+      parts.push(`<span class="cw${hot ? " hot" : ""}">${escapeHtml(w)}</span>`);
+    }
+    captionsEl.innerHTML = parts.join(" ");
+    captionsEl.style.display = parts.length ? "block" : "none";
+  }
+
+  function captionLoop(){
+    renderCaptions();
+    requestAnimationFrame(captionLoop);
+  }
+
   // ---------- Chat ----------
   let lastChatId = 0;
 
-  function appendMsg(m){
+  // Own messages are shown as soon as send.json hands back their provisional
+  // seq (the insert is batched server-side); the polled copy with the same seq
+  // then confirms the placeholder instead of appending a duplicate.
+  const pendingBySeq = new Map();
+  const seenSeqs = new Set();
+  const seqKey = (m) => `${m.seq}|${m.username}|${m.message}`;
+
+  function appendMsg(m, pending = false){
+    const key = m.seq != null ? seqKey(m) : null;
+    if (key && pending && seenSeqs.has(key)) return;   // polled copy beat the send response
+    if (key && !pending){
+      const held = pendingBySeq.get(key);
+      if (held){
+        pendingBySeq.delete(key);
+        held.classList.remove("pending");
+        return;
+      }
+      seenSeqs.add(key);
+      if (seenSeqs.size > 200) seenSeqs.delete(seenSeqs.values().next().value);
+    }
     const div = document.createElement("div");
-    div.className = "msg";
+    div.className = pending ? "msg pending" : "msg";
     div.innerHTML = `<span class="u">${escapeHtml(m.username)}</span><span class="t">${escapeHtml(m.message)}</span>`;
     chatList.appendChild(div);
     chatList.scrollTop = chatList.scrollHeight;
+    if (pending) pendingBySeq.set(key, div);
   }
 
+  function appendNew(items){
+    for (const m of items || []){
+      if ((m.id || 0) <= lastChatId) continue;
+      lastChatId = m.id;
+      appendMsg(m);
+    }
+  }
+
+  let chatLongPoll = false;   // a long-poll is parked for chat: the tick leaves after_id off
+
   async function pollChat(){
-    try{
-      const res = await fetch(CHAT_POLL_URL(lastChatId), { cache:"no-store" });
-      if (!res.ok) return;
-      const data = await res.json();
-      const items = Array.isArray(data.items) ? data.items : [];
-      for (const m of items){
-        lastChatId = Math.max(lastChatId, m.id || 0);
-        appendMsg(m);
+    const res = await fetch(CHAT_POLL_URL(lastChatId), { cache:"no-store" });
+    if (!res.ok) throw new Error(`chat ${res.status}`);
+    const data = await res.json();
+    appendNew(Array.isArray(data.items) ? data.items : []);
+  }
+
+  const sleep = (ms) => new Promise((r) => setTimeout(r, ms));
+  const jitter = (ms) => ms + Math.random() * ms;
+
+  // WebSocket first (ws_chat.py pushes each committed batch); resolves when
+  // the socket closes, with whether it ever opened.
+  let chatWs = null;
+  let wsSent = [];   // sends awaiting their ack, in order
+
+  function chatSocket(){
+    return new Promise((resolve) => {
+      let opened = false;
+      let ws;
+      try{ ws = new WebSocket(CHAT_WS_URL()); }catch(e){ resolve(false); return; }
+
+      ws.onopen = () => {
+        opened = true;
+        chatWs = ws;
+        ws.send(JSON.stringify({ type:"hello", after_id: lastChatId }));
+      };
+      ws.onmessage = (ev) => {
+        let data;
+        try{ data = JSON.parse(ev.data); }catch(e){ return; }
+        if (data.type === "messages"){
+          appendNew(data.items);
+        } else if (data.type === "ack"){
+          const sent = wsSent.shift();
+          if (sent) appendMsg({ ...sent, seq: data.seq, message: data.message ?? sent.message }, true);
+        } else if (data.type === "error"){
+          const sent = wsSent.shift();
+          if (sent && data.error === "rate_limited") restoreDraft(sent.message);
+        }
+      };
+      ws.onclose = () => {
+        if (chatWs === ws) chatWs = null;
+        wsSent = [];
+        resolve(opened);
+      };
+    });
+  }
+
+  // Fallback: long-poll, where each request returns as soon as there is a new
+  // message (or after CHAT_WAIT_S), so re-issue immediately; back off on errors.
+  // While a long-poll is failing, the tick carries the chat delta instead.
+  async function chatLoop(){
+    for (;;){
+      if ("WebSocket" in window && await chatSocket()){
+        await sleep(jitter(1000));   // dropped: reconnect; hello catches up
+        continue;
       }
-    }catch(e){}
+      const until = Date.now() + CHAT_WS_RETRY_MS;
+      while (Date.now() < until){
+        try{
+          chatLongPoll = true;
+          await pollChat();
+        }catch(e){
+          chatLongPoll = false;
+          await sleep(jitter(CHAT_POLL_MS));
+        }
+      }
+      chatLongPoll = false;
+    }
+  }
+
+  // rate limited (429 / ws error): hand the text back instead of losing it
+  function restoreDraft(msg){
+    if (!chatInput.value) chatInput.value = msg;
   }
 
   async function sendChat(){
     const msg = (chatInput.value || "").trim();
     if (!msg) return;
     chatInput.value = "";
+    if (chatWs && chatWs.readyState === WebSocket.OPEN){
+      wsSent.push({ username: GUEST, message: msg });
+      chatWs.send(JSON.stringify({ type:"send", username: GUEST, message: msg }));
+      return;
+    }
     try{
-      await fetch(CHAT_SEND_URL, {
+      const res = await fetch(CHAT_SEND_URL, {
         method:"POST",
-        headers: { "Content-Type":"application/json", "X-CSRFToken": CSRF_TOKEN },
+        headers: { "Content-Type":"application/json", "X-CSRFToken": CSRF_TOKEN, "X-Client-Id": CLIENT_ID },
         body: JSON.stringify({ username: GUEST, message: msg })
       });
+      const data = await res.json();
+      if (res.status === 429) restoreDraft(msg);
+      if (data.ok && data.seq != null) appendMsg({ username: GUEST, message: data.message ?? msg, seq: data.seq }, true);
     }catch(e){}
   }
 
   sendBtn.addEventListener("click", sendChat);
   chatInput.addEventListener("keydown", (e) => { if (e.key === "Enter") sendChat(); });
 
-  // ---------- Presence ----------
-  async function pingPresence(){
-    try{
-      await fetch(`${PRESENCE_URL}?sid=${encodeURIComponent(SID)}&channel=${encodeURIComponent(CHANNEL)}`, { cache:"no-store" });
-    }catch(e){}
-  }
-
   // resync when tab returns
   document.addEventListener("visibilitychange", () => {
     if (document.visibilityState === "visible") {
@@ -498,13 +877,22 @@
     }
   });
 
-  // ---------- start ----------
-  syncNow().catch(()=>{});
-  pollChat().catch(()=>{});
-  pingPresence().catch(()=>{});
+  // presence, now, chat (only when neither socket nor long-poll is up) and
+  // reactions: one request per tick, next one after the server's next_poll_ms. Jitter only delays, so a
+  // poll aimed just past a boundary never lands before it.
+  let pollMs = POLL_MS;
+
+  async function pollLoop(){
+    for (;;){
+      try { await syncNow(); }
+      catch(e){ pollMs = Math.min(pollMs * 2, POLL_MAX_MS); }
+      await sleep(pollMs * (1 + Math.random() * POLL_JITTER));
+    }
+  }
 
-  setInterval(() => syncNow().catch(()=>{}), POLL_MS);
-  setInterval(() => pollChat().catch(()=>{}), CHAT_POLL_MS);
-  setInterval(() => pingPresence().catch(()=>{}), PRESENCE_MS);
+  // ---------- start ----------
+  pollLoop();
+  chatLoop();
+  if (captionsEl) captionLoop();
 
 })();
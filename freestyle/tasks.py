@@ -0,0 +1,51 @@
+# freestyle/tasks.py
+"""
+Housekeeping run by `manage.py freestyle_worker` (see worker.py), instead of
+inline in requests. Every task is exclusive: one node runs it at a time.
+"""
+from __future__ import annotations
+
+from django.conf import settings
+
+from . import audience, chat_archive, presence, rollups
+from .models import Channel
+from .services.publishing import cleanup_oldest_if_played_once
+from .worker import task
+
+
+@task(every=60)
+def presence_reap():
+    return presence.reap()
+
+
+_sampler = rollups.Sampler()
+
+
+@task(every=float(getattr(settings, "VIEWER_SAMPLE_SECONDS", 5)))
+def viewer_rollup():
+    return _sampler.sample()
+
+
+@task(every=3600)
+def audience_prune():
+    return audience.prune()
+
+
+@task(every=60)
+def rotation_cleanup():
+    """Keep each rotation at CHANNEL_MAX_ENTRIES, retiring the oldest entry once it has aired."""
+    max_entries = int(getattr(settings, "CHANNEL_MAX_ENTRIES", 0))
+    if max_entries <= 0:
+        return None
+    removed = []
+    for ch in Channel.objects.all():
+        entry = cleanup_oldest_if_played_once(ch, max_entries=max_entries)
+        if entry:
+            removed.append(entry.id)
+    return removed
+
+
+@task(every=3600)
+def chat_retention(batch_size: int = 1000):
+    """Move chat older than each channel's retention into the gzip archive (chat_archive.py)."""
+    return chat_archive.run(batch_size=batch_size)
@@ -1,3 +1,62 @@
-from django.test import TestCase
+import math
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .hll import HyperLogLog
+
+
+def _sketch(values, p: int = 12) -> HyperLogLog:
+    h = HyperLogLog(p)
+    for v in values:
+        h.add(v)
+    return h
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def test_empty(self):
+        h = HyperLogLog()
+        self.assertEqual(h.count(), 0)
+        self.assertEqual(HyperLogLog.from_bytes(h.to_bytes()).count(), 0)
+
+    def test_small_counts_are_exact(self):
+        # well under m/32 distinct values the estimator returns n itself
+        h = HyperLogLog(12)
+        for n in range(1, 51):
+            h.add(f"viewer-{n}")
+            h.add(f"viewer-{n}")  # repeats never count twice
+            self.assertEqual(h.count(), n)
+
+    def test_standard_error_bound(self):
+        # RMS relative error over independent sketches stays near 1.04/sqrt(m);
+        # the inputs are fixed, so this is deterministic
+        p, trials = 10, 12
+        se = 1.04 / math.sqrt(1 << p)
+        self.assertAlmostEqual(HyperLogLog(p).standard_error, se)
+        for n in (1_000, 10_000, 30_000):
+            with self.subTest(n=n):
+                errors = []
+                for t in range(trials):
+                    errors.append((_sketch((f"t{t}-{i}" for i in range(n)), p).count() - n) / n)
+                rms = math.sqrt(sum(e * e for e in errors) / trials)
+                self.assertLessEqual(rms, 1.5 * se)
+                self.assertLessEqual(max(abs(e) for e in errors), 4 * se)
+
+    def test_merge_equals_union(self):
+        a_values = [f"a{i}" for i in range(3_000)]
+        b_values = [f"a{i}" for i in range(2_000, 6_000)]  # overlaps a by 1000
+        a, b = _sketch(a_values), _sketch(b_values)
+        union = _sketch(a_values + b_values)
+
+        merged = a.copy().merge(b)
+        self.assertEqual(merged.registers, union.registers)
+        self.assertEqual(merged.count(), union.count())
+        self.assertEqual(a.count(), _sketch(a_values).count())  # copy() left a alone
+        self.assertEqual(b.copy().merge(a).registers, merged.registers)
+
+    def test_merge_rejects_other_precision(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+    def test_round_trip(self):
+        h = _sketch(f"v{i}" for i in range(500))
+        self.assertEqual(HyperLogLog.from_bytes(h.to_bytes()).registers, h.registers)
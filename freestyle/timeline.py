@@ -0,0 +1,178 @@
+# freestyle/timeline.py
+"""
+When in a video people react: per-second vote counts.
+
+Each vote carries offset_seconds, its position in the video. It is the
+viewer's player position (MP4 playback sends it) when that is within
+REACTION_OFFSET_SLACK_SECONDS behind the schedule, else the schedule's own
+offset for the airing on now. Votes on a video that isn't on air get no
+offset and stay out of the timeline.
+
+ReactionTimeline keeps one row per (channel, video): fire and nah as
+packed uint32 arrays indexed by second, summed over all airings. The arrays
+grow to the highest offset seen, capped at MAX_SECONDS. Vote flushes
+(reactions.py) fold each batch into its rows in the same transaction, so
+aggregation is incremental: one locked read-modify-write per touched video
+per flush, never a scan of VideoReaction. rebuild() is the exception, the
+repair path.
+
+The summary columns (totals, and the hottest REACTION_PEAK_WINDOW seconds
+of fire) let rank() order a channel's videos without unpacking arrays.
+"""
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Channel, ReactionTimeline, VideoReaction
+from .schedule import compiled_schedule
+
+
+MAX_SECONDS = 6 * 3600
+_TYPECODE = "I" if array("I").itemsize == 4 else "L"
+
+
+def _unpack(data) -> array:
+    a = array(_TYPECODE)
+    if data:
+        a.frombytes(bytes(data))
+        if sys.byteorder == "big":
+            a.byteswap()
+    return a
+
+
+def _pack(a: array) -> bytes:
+    if sys.byteorder == "big":
+        a = array(_TYPECODE, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def peak_window() -> int:
+    return max(1, int(getattr(settings, "REACTION_PEAK_WINDOW", 5)))
+
+
+def _peak(fire: array, window: int) -> tuple[int, int]:
+    """(largest fire sum over `window` consecutive seconds, its first second)."""
+    best = best_at = run = 0
+    for i, n in enumerate(fire):
+        run += n
+        if i >= window:
+            run -= fire[i - window]
+        if run > best:
+            best, best_at = run, max(0, i - window + 1)
+    return best, best_at
+
+
+# -------------------------
+# Offsets
+# -------------------------
+def offset_for(channel: Channel, video_id: int, client_offset=None, now: float | None = None) -> int | None:
+    """Seconds into `video_id` for a vote cast now, or None when it isn't on air."""
+    slot = compiled_schedule(channel).at(now)
+    if slot is None or slot.item.id != video_id:
+        return None
+    scheduled = slot.offset_seconds
+    try:
+        player = int(float(client_offset))
+    except (TypeError, ValueError):
+        return scheduled
+    slack = float(getattr(settings, "REACTION_OFFSET_SLACK_SECONDS", 60))
+    # players lag the schedule (buffering, late joins), never run far ahead of it
+    if scheduled - slack <= player <= scheduled + 5 and player >= 0:
+        return player
+    return scheduled
+
+
+# -------------------------
+# Incremental aggregation
+# -------------------------
+def add(votes: Iterable[tuple[int, int, str, int | None]]) -> int:
+    """
+    Fold newly stored votes (channel_id, video_id, reaction, offset_seconds)
+    into their timelines. Call inside the transaction that stored them.
+    Returns the number of timelines touched.
+    """
+    grouped: dict[tuple[int, int], list[tuple[str, int]]] = {}
+    for ch, vid, reaction, offset in votes:
+        if offset is not None and 0 <= offset < MAX_SECONDS:
+            grouped.setdefault((ch, vid), []).append((reaction, int(offset)))
+
+    window = peak_window()
+    for (ch, vid), items in grouped.items():
+        row, _ = ReactionTimeline.objects.select_for_update().get_or_create(channel_id=ch, video_id=vid)
+        arrays = {"fire": _unpack(row.fire), "nah": _unpack(row.nah)}
+        size = max(len(arrays["fire"]), len(arrays["nah"]), 1 + max(off for _, off in items))
+        for a in arrays.values():
+            if len(a) < size:
+                a.extend([0] * (size - len(a)))
+        for reaction, off in items:
+            arrays[reaction][off] += 1
+
+        row.fire = _pack(arrays["fire"])
+        row.nah = _pack(arrays["nah"])
+        row.seconds = size
+        row.fire_total += sum(1 for r, _ in items if r == "fire")
+        row.nah_total += sum(1 for r, _ in items if r == "nah")
+        row.peak_fire, row.peak_at = _peak(arrays["fire"], window)
+        row.save()
+    return len(grouped)
+
+
+def rebuild(channel_id: int | None = None) -> int:
+    """Recompute timelines from VideoReaction.offset_seconds (repair only: scans every vote)."""
+    qs = VideoReaction.objects.filter(offset_seconds__isnull=False)
+    stale = ReactionTimeline.objects.all()
+    if channel_id is not None:
+        qs = qs.filter(channel_id=channel_id)
+        stale = stale.filter(channel_id=channel_id)
+    with transaction.atomic():
+        stale.delete()
+        return add(qs.values_list("channel_id", "video_id", "reaction", "offset_seconds").iterator(chunk_size=5000))
+
+
+# -------------------------
+# Reads
+# -------------------------
+def heatmap(channel_id: int, video_id: int, bucket: int = 1) -> dict:
+    """Per-`bucket`-second fire/nah counts for one video on one channel."""
+    bucket = max(1, int(bucket))
+    row = ReactionTimeline.objects.filter(channel_id=channel_id, video_id=video_id).first()
+    out = {
+        "video_id": video_id,
+        "bucket": bucket,
+        "seconds": 0,
+        "fire": [],
+        "nah": [],
+        "totals": {"fire": 0, "nah": 0},
+        "peak": None,
+    }
+    if row is None:
+        return out
+    for name in ("fire", "nah"):
+        a = _unpack(getattr(row, name))
+        out[name] = [sum(a[i:i + bucket]) for i in range(0, len(a), bucket)] if bucket > 1 else a.tolist()
+    out["seconds"] = row.seconds
+    out["totals"] = {"fire": row.fire_total, "nah": row.nah_total}
+    out["peak"] = {"at": row.peak_at, "fire": row.peak_fire, "window": peak_window()}
+    return out
+
+
+def rank(channel_id: int, limit: int | None = None) -> list[dict]:
+    """
+    A channel's videos by how the room took them: net fire per minute of
+    timeline, then the hottest window. For scheduling decisions.
+    """
+    rows = ReactionTimeline.objects.filter(channel_id=channel_id).values(
+        "video_id", "seconds", "fire_total", "nah_total", "peak_fire", "peak_at"
+    )
+    ranked = []
+    for r in rows:
+        minutes = max(r["seconds"], 60) / 60
+        ranked.append({**r, "net_per_minute": round((r["fire_total"] - r["nah_total"]) / minutes, 3)})
+    ranked.sort(key=lambda r: (r["net_per_minute"], r["peak_fire"]), reverse=True)
+    return ranked[:limit] if limit else ranked
@@ -1,22 +1,25 @@
 # freestyle/tv_api_views.py
 from __future__ import annotations
 
-from datetime import timedelta
+import random
+import time
+from datetime import date
 
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.views.decorators.http import require_GET
 
-from .models import Channel, ChannelEntry, ChatMessage, Presence, SponsorAd
+from . import captions, captions_bin, chat_archive, chat_buffer, chat_notify, hls, metrics, polling, presence, ratelimit, reactions, rollups, timeline, vote_receipts
+from .models import Channel, ChannelEntry, FreestyleVideo, SponsorAd, VideoAiring, VideoCaptions
+from .schedule import compiled_schedule, preload_at
 
 
 # -------------------------
 # Helpers
 # -------------------------
 
-PRESENCE_TTL_SECONDS = 90  # viewers considered "watching" if pinged recently
-
-
 def _get_channel(request, channel_slug: str | None = None) -> Channel | None:
     """
     Resolve channel by:
@@ -38,23 +41,17 @@ def _get_channel(request, channel_slug: str | None = None) -> Channel | None:
     return Channel.objects.first()
 
 
-def _prune_presence(channel_obj: Channel) -> int:
-    cutoff = timezone.now() - timedelta(seconds=PRESENCE_TTL_SECONDS)
-    Presence.objects.filter(channel=channel_obj, last_seen__lt=cutoff).delete()
-    return Presence.objects.filter(channel=channel_obj).count()
-
-
 def _video_payload(v) -> dict:
     """
     IMPORTANT: Use play_url that points to /media/... (or HLS)
     We include a few alias keys so whatever JS you have will work.
     """
     play_url = getattr(v, "play_url", "") or ""
-    storage_name = ""
+    storage_name = getattr(v, "storage_name", "") or ""
 
     # If you have a FileField (video_file) we expose its name too
     video_file = getattr(v, "video_file", None)
-    if video_file and getattr(video_file, "name", None):
+    if not storage_name and video_file and getattr(video_file, "name", None):
         storage_name = video_file.name
 
     return {
@@ -64,6 +61,7 @@ def _video_payload(v) -> dict:
         "is_hls": bool(getattr(v, "is_hls", False)),
         "storage_name": storage_name,
         "play_url": play_url,
+        "cmaf_playlist": getattr(v, "cmaf_playlist", "") or "",
 
         # Back-compat aliases some frontends expect:
         "src": play_url,
@@ -73,44 +71,67 @@ def _video_payload(v) -> dict:
 
 def _pick_now_from_entries(channel_obj: Channel):
     """
-    Build the channel playlist from active entries and pick the
-    currently-playing video based on Channel.schedule_started_at.
+    Pick the currently-playing item from the channel's compiled schedule
+    (see schedule.py) based on Channel.schedule_started_at.
 
-    Returns: (current_video_or_None, seconds_into_current, playlist_video_ids, station_offset_seconds)
+    Returns: (current_item_or_None, seconds_into_current, playlist_video_ids, station_offset_seconds)
     """
-    qs = (
-        ChannelEntry.objects.filter(channel=channel_obj, is_active=True)
-        .select_related("video")
-        .order_by("sort_order", "id")
-    )
-    entries = list(qs)
-    if not entries:
+    sched = compiled_schedule(channel_obj)
+    playlist_ids = list(sched.playlist_ids)
+    if not playlist_ids:
         return None, 0, [], 0
 
-    videos = [e.video for e in entries]
-    durations = [int(getattr(v, "duration_seconds", 0) or 0) for v in videos]
+    now = time.time()
+    slot = sched.at(now)
+    if not slot:
+        # If durations are missing, we still return the first item with offset 0
+        first = (
+            ChannelEntry.objects.filter(channel=channel_obj, is_active=True)
+            .select_related("video")
+            .order_by("sort_order", "id")
+            .first()
+        )
+        return (first.video if first else None), 0, playlist_ids, 0
+
+    return slot.item, slot.offset_seconds, playlist_ids, sched.station_offset(now)
+
 
-    # If durations are missing, we still return the first item with offset 0
-    total = sum(d for d in durations if d > 0)
-    if total <= 0:
-        return videos[0], 0, [v.id for v in videos], 0
+def _next_up(channel_obj: Channel, key: str, now: float):
+    """
+    What airs after the current item, and when this client should preload it.
 
-    anchor = getattr(channel_obj, "schedule_started_at", None) or timezone.now()
-    station_offset = int((timezone.now() - anchor).total_seconds()) % total
+    Returns (next_payload_or_None, prefetch_payload_or_None). `key` (the sid)
+    pins the jittered preload moment so repeated polls agree.
+    """
+    sched = compiled_schedule(channel_obj)
+    slot = sched.at(now)
+    if not slot:
+        return None, None
+    nxt = sched.following(slot)
+
+    window = float(getattr(settings, "NEXT_PRELOAD_WINDOW_SECONDS", 20))
+    min_lead = float(getattr(settings, "NEXT_PRELOAD_MIN_LEAD_SECONDS", 3))
+    at = preload_at(slot, nxt, key or str(random.random()), window, min_lead)
+
+    next_payload = {
+        **_video_payload(nxt.item),
+        "start_epoch": nxt.start_epoch,
+        "starts_in_seconds": round(max(0.0, nxt.start_epoch - now), 3),
+    }
+    prefetch = {
+        "at_epoch": round(at, 3),
+        "switch_epoch": nxt.start_epoch,
+        "window_seconds": window,
+    }
+    return next_payload, prefetch
 
-    # Walk the rotation to find the current video
-    acc = 0
-    for v, d in zip(videos, durations):
-        d = max(0, int(d))
-        if d <= 0:
-            continue
-        if station_offset < acc + d:
-            seconds_into = station_offset - acc
-            return v, seconds_into, [vv.id for vv in videos], station_offset
-        acc += d
 
-    # Fallback (shouldn't happen)
-    return videos[0], 0, [v.id for v in videos], station_offset
+def _polled_response(body: dict) -> JsonResponse:
+    """JsonResponse with the body's next_poll_ms mirrored into X-Next-Poll-Ms."""
+    resp = JsonResponse(body)
+    if body.get("next_poll_ms"):
+        resp[polling.HEADER] = str(body["next_poll_ms"])
+    return resp
 
 
 # -------------------------
@@ -124,14 +145,20 @@ def now_json(request, channel: str | None = None):
       /now.json
       /api/freestyle/channel/<channel>/now.json
 
-    Returns keys: now + (aliases item/current), offset_seconds, station_offset_seconds
+    Returns keys: now + (aliases item/current), offset_seconds, station_offset_seconds,
+    next (+ start_epoch), prefetch (when to preload `next`, jittered per ?sid=)
+    and next_poll_ms (see polling.py).
     """
     ch = _get_channel(request, channel_slug=channel)
     if not ch:
         return JsonResponse({"ok": True, "now": None, "item": None, "current": None, "offset_seconds": 0})
+    return _polled_response(_now_payload(ch, (request.GET.get("sid") or "").strip()))
 
+
+def _now_payload(ch: Channel, sid: str, chat_polling: bool = False) -> dict:
+    """now.json's body (also the "now" part of tick.json); `chat_polling` feeds the poll hint."""
     current, seconds_into, playlist_ids, station_offset = _pick_now_from_entries(ch)
-    viewers = _prune_presence(ch)
+    viewers = presence.viewer_count(ch.id)
 
     sponsor = SponsorAd.objects.filter(is_active=True).order_by("-id").first()
     sponsor_payload = None
@@ -144,22 +171,23 @@ def now_json(request, channel: str | None = None):
         }
 
     if not current:
-        return JsonResponse(
-            {
-                "ok": True,
-                "channel": ch.slug,
-                "offset_seconds": 0,
-                "station_offset_seconds": 0,
-                "viewers": viewers,
-                "sponsor": sponsor_payload,
-                "playlist": playlist_ids,
-                "now": None,
-                "item": None,
-                "current": None,
-            }
-        )
+        return {
+            "ok": True,
+            "channel": ch.slug,
+            "offset_seconds": 0,
+            "station_offset_seconds": 0,
+            "viewers": viewers,
+            "sponsor": sponsor_payload,
+            "playlist": playlist_ids,
+            "now": None,
+            "item": None,
+            "current": None,
+            "next_poll_ms": polling.hint(ch.id, None, sid, chat=chat_polling),
+        }
 
     payload = _video_payload(current)
+    now = time.time()
+    next_payload, prefetch = _next_up(ch, sid, now)
 
     # Make sure offset_seconds is always valid for the current item if duration exists
     dur = int(payload.get("duration_seconds") or 0)
@@ -168,77 +196,415 @@ def now_json(request, channel: str | None = None):
     else:
         seconds_into = 0
 
+    return {
+        "ok": True,
+        "channel": ch.slug,
+        "offset_seconds": int(seconds_into),
+        "station_offset_seconds": int(station_offset),
+        "viewers": viewers,
+        "sponsor": sponsor_payload,
+        "playlist": playlist_ids,
+
+        # Primary key the TV should use:
+        "now": payload,
+
+        # Compatibility aliases (some JS expects item/current):
+        "item": payload,
+        "current": payload,
+
+        # Boundary handoff: preload `next` at prefetch.at_epoch, switch at next.start_epoch
+        "server_epoch": now,
+        "next": next_payload,
+        "prefetch": prefetch,
+        "next_poll_ms": polling.hint(
+            ch.id, next_payload["starts_in_seconds"] if next_payload else None, sid, chat=chat_polling
+        ),
+    }
+
+
+@require_GET
+def tick_json(request, channel: str | None = None):
+    """
+    /api/freestyle/channel/<channel>/tick.json?sid=&after_id=&video_id=
+    /tick.json?channel=main&...
+
+    One poll for the TV: presence ping (with sid), everything now.json
+    returns, and, when asked for, the chat delta after after_id (ring
+    buffer, no wait) and the reaction state of video_id (default: the video
+    on now; voted needs X-Client-Id). One channel lookup, cached reads only.
+    Come back after next_poll_ms (polling.py).
+    """
+    ch = _get_channel(request, channel_slug=channel)
+    if not ch:
+        return JsonResponse({"ok": True, "now": None, "item": None, "current": None, "offset_seconds": 0})
+
+    sid = (request.GET.get("sid") or "").strip()
+    if sid:
+        presence.record(ch, sid)
+    after_id = request.GET.get("after_id")
+    body = _now_payload(ch, sid, chat_polling=after_id is not None)
+
+    if after_id is not None:
+        try:
+            body["chat"] = {"items": chat_buffer.read(ch.id, int(after_id or 0), 60)}
+        except ValueError:
+            body["chat"] = {"items": []}
+
+    video_id = (request.GET.get("video_id") or "").strip() or str((body.get("now") or {}).get("id") or "")
+    if video_id.isdigit():
+        vid = int(video_id)
+        client_id = request.headers.get("X-Client-Id") or ""
+        body["reactions"] = {
+            "video_id": vid,
+            "counts": reactions.counts(ch.id, vid),
+            "voted": vote_receipts.voted(request, ch.id, vid, client_id),
+        }
+    return _polled_response(body)
+
+
+def _wait_seconds(request) -> float:
+    """?wait=N (seconds) for long-polling; 0 / missing answers immediately."""
+    try:
+        wait = float(request.GET.get("wait") or 0)
+    except ValueError:
+        return 0.0
+    return max(0.0, min(wait, chat_notify.max_wait_seconds()))
+
+
+@require_GET
+async def messages_json(request, channel: str | None = None):
+    """
+    /messages.json?after_id=0&channel=main[&wait=25]
+
+    With wait, the request parks (chat_notify.py) until a message newer than
+    after_id arrives or `wait` seconds pass, then answers as usual.
+    """
+    ch = await sync_to_async(_get_channel)(request, channel_slug=channel)
+    if not ch:
+        return JsonResponse({"ok": True, "messages": []})
+
+    try:
+        after_id = int(request.GET.get("after_id", "0") or 0)
+    except ValueError:
+        after_id = 0
+
+    wait = _wait_seconds(request)
+    if wait and not await chat_notify.wait_for(ch.id, after_id, wait):
+        return JsonResponse({"ok": True, "messages": []})
+
+    messages = await sync_to_async(chat_buffer.read)(ch.id, after_id, 200)
+    return JsonResponse({"ok": True, "messages": messages})
+
+
+@require_GET
+def ping_json(request, channel: str | None = None):
+    """
+    /ping.json?sid=<uuid>&channel=main
+    """
+    ch = _get_channel(request, channel_slug=channel)
+    if not ch:
+        return JsonResponse({"ok": True, "channel": None, "server_time": timezone.now().isoformat(), "watching": None})
+
+    # buffered; lands in Presence on the next write-behind flush (presence.py)
+    presence.record(ch, request.GET.get("sid") or "")
+
     return JsonResponse(
         {
             "ok": True,
             "channel": ch.slug,
-            "offset_seconds": int(seconds_into),
-            "station_offset_seconds": int(station_offset),
-            "viewers": viewers,
-            "sponsor": sponsor_payload,
-            "playlist": playlist_ids,
+            "server_time": timezone.now().isoformat(),
+            "watching": None,
+            "viewers": presence.viewer_count(ch.id),
+        }
+    )
+
 
-            # Primary key the TV should use:
-            "now": payload,
+@require_GET
+def live_m3u8(request, channel: str | None = None):
+    """
+    /live.m3u8?channel=main
+    /api/freestyle/channel/<channel>/live.m3u8
 
-            # Compatibility aliases (some JS expects item/current):
-            "item": payload,
-            "current": payload,
+    The whole channel as one continuous HLS stream (see hls.py). Depends only
+    on the clock, so it is safe to cache for a fraction of a segment.
+    """
+    ch = _get_channel(request, channel_slug=channel)
+    text = hls.live_playlist(compiled_schedule(ch)) if ch else None
+    if not text:
+        return HttpResponse("no schedule", status=404, content_type="text/plain")
+
+    resp = HttpResponse(text, content_type="application/vnd.apple.mpegurl")
+    resp["Cache-Control"] = f"public, max-age={max(1, int(hls.segment_seconds() // 2))}"
+    return resp
+
+
+@require_GET
+def metrics_json(request):
+    """
+    /metrics.json
+
+    Counters + latency histograms from metrics.py. Staff only outside DEBUG.
+    """
+    if not (settings.DEBUG or (request.user.is_authenticated and request.user.is_staff)):
+        return JsonResponse({"ok": False, "error": "forbidden"}, status=403)
+    return JsonResponse(
+        {
+            "ok": True,
+            "server_time": timezone.now().isoformat(),
+            "metrics": metrics.snapshot(),
+            # per worker: this process only
+            "ratelimit": ratelimit.stats(),
+            "vote_lookup": vote_receipts.stats(),
+            "poll_load": polling.load.stats(),
         }
     )
 
 
 @require_GET
-def messages_json(request, channel: str | None = None):
+def viewers_history_json(request, channel: str | None = None):
     """
-    /messages.json?after_id=0&channel=main
+    /api/freestyle/channel/<channel>/viewers/history.json?days=30&resolution=hour
+
+    Concurrent-viewer history from the per-day rollups (rollups.py):
+    points = [[epoch, peak, avg], ...], resolution minute|hour|day.
     """
     ch = _get_channel(request, channel_slug=channel)
     if not ch:
-        return JsonResponse({"ok": True, "messages": []})
+        return JsonResponse({"ok": False, "error": "no channel"}, status=404)
 
     try:
-        after_id = int(request.GET.get("after_id", "0") or 0)
+        days = max(1, min(400, int(request.GET.get("days", "1") or 1)))
     except ValueError:
-        after_id = 0
+        days = 1
+    resolution = request.GET.get("resolution") or ("minute" if days <= 1 else "hour" if days <= 14 else "day")
+    if resolution not in ("minute", "hour", "day"):
+        return JsonResponse({"ok": False, "error": "resolution must be minute, hour or day"}, status=400)
 
-    qs = ChatMessage.objects.filter(channel=ch, id__gt=after_id).order_by("id")[:200]
-    messages = [
+    start, end = rollups.default_range(days)
+    return JsonResponse(
         {
-            "id": m.id,
-            "username": m.username,
-            "message": m.message,
-            "created_at": m.created_at.isoformat(),
+            "ok": True,
+            "channel": ch.slug,
+            "resolution": resolution,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "points": rollups.series(ch.id, start, end, resolution),
         }
-        for m in qs
-    ]
-    return JsonResponse({"ok": True, "messages": messages})
+    )
+
+
+def _archive_day(day: str):
+    try:
+        return date.fromisoformat(day)
+    except ValueError:
+        return None
 
 
 @require_GET
-def ping_json(request, channel: str | None = None):
+def reactions_heatmap_json(request, channel: str):
     """
-    /ping.json?sid=<uuid>&channel=main
+    /api/freestyle/channel/<channel>/reactions/heatmap.json?video_id=N&bucket=1
+
+    fire/nah votes per `bucket` seconds of the video, summed over its
+    airings on the channel (timeline.py).
     """
     ch = _get_channel(request, channel_slug=channel)
     if not ch:
-        return JsonResponse({"ok": True, "channel": None, "server_time": timezone.now().isoformat(), "watching": None})
+        return JsonResponse({"ok": False, "error": "no channel"}, status=404)
+    try:
+        video_id = int(request.GET.get("video_id", ""))
+        bucket = max(1, min(600, int(request.GET.get("bucket", "1") or 1)))
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "bad video_id/bucket"}, status=400)
+    resp = JsonResponse({"ok": True, "channel": ch.slug, **timeline.heatmap(ch.id, video_id, bucket)})
+    resp["Cache-Control"] = "public, max-age=10"
+    return resp
 
-    sid = (request.GET.get("sid") or "").strip()
-    if sid:
-        Presence.objects.update_or_create(
-            channel=ch,
-            sid=sid,
-            defaults={"last_seen": timezone.now()},
+
+def _seconds_ms(value, default: int) -> int:
+    try:
+        return max(0, round(float(value) * 1000)) if value not in (None, "") else default
+    except (ValueError, OverflowError):  # "x", "nan", "inf"
+        raise ValueError("bad from/to") from None
+
+
+@require_GET
+def captions_json(request, video_id: int):
+    """
+    /api/freestyle/video/<id>/captions.json?from=120&to=180
+
+    The caption words overlapping [from, to) seconds (default: the first
+    CAPTIONS_WINDOW_SECONDS), as {w, s, e}, plus `next`, the start of the
+    first word after the window (null at the end). Players fetch aligned
+    windows as playback advances; each slice carries an ETag, so a repeat
+    is a 304. See captions.py. `version` keys the immutable
+    captions.bin/.vtt URLs.
+    """
+    window = int(float(getattr(settings, "CAPTIONS_WINDOW_SECONDS", 60)) * 1000)
+    longest = int(float(getattr(settings, "CAPTIONS_MAX_WINDOW_SECONDS", 300)) * 1000)
+    try:
+        from_ms = _seconds_ms(request.GET.get("from"), 0)
+        to_ms = _seconds_ms(request.GET.get("to"), from_ms + window)
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "bad from/to"}, status=400)
+    to_ms = min(max(to_ms, from_ms), from_ms + longest)
+
+    ver = captions.version(video_id)
+    if ver is None:
+        return JsonResponse({"ok": False, "error": "no video"}, status=404)
+    tag = captions.etag(video_id, ver, from_ms, to_ms)
+    if _etag_matches(request, tag):
+        resp = HttpResponseNotModified()
+    else:
+        idx = captions.index(video_id, ver)
+        resp = JsonResponse(
+            {
+                "ok": True,
+                "video_id": video_id,
+                "version": ver,
+                "from": from_ms / 1000,
+                "to": to_ms / 1000,
+                "count": len(idx),
+                "duration": idx.duration_ms / 1000,
+                **idx.slice(from_ms, to_ms),
+            }
         )
+    resp["ETag"] = tag
+    resp["Cache-Control"] = f"public, max-age={int(getattr(settings, 'CAPTIONS_MAX_AGE', 300))}"
+    return resp
+
+
+def _etag_matches(request, tag: str) -> bool:
+    return tag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]
+
+
+def _compiled_captions(request, video_id: int, kind: str, content_type: str, render):
+    """captions.bin / captions.vtt: immutable under ?v=<current version>, else ETag-revalidated."""
+    ver = captions.version(video_id)
+    if ver is None:
+        return HttpResponse("no video", status=404, content_type="text/plain")
+    tag = f'"cap{kind}-{video_id}-{ver}"'
+    if _etag_matches(request, tag):
+        resp = HttpResponseNotModified()
+    else:
+        blob = VideoCaptions.objects.filter(video_id=video_id).values_list("compiled", flat=True).first()
+        if not blob:
+            return HttpResponse("no captions", status=404, content_type="text/plain")
+        resp = HttpResponse(render(bytes(blob)), content_type=content_type)
+    resp["ETag"] = tag
+    if request.GET.get("v") == ver:
+        resp["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        resp["Cache-Control"] = f"public, max-age={int(getattr(settings, 'CAPTIONS_MAX_AGE', 300))}"
+    return resp
+
+
+@require_GET
+def captions_bin_view(request, video_id: int):
+    """
+    /api/freestyle/video/<id>/captions.bin[?v=<version>]
+
+    The whole caption track in the compact format (captions_bin.py).
+    """
+    return _compiled_captions(request, video_id, "bin", "application/octet-stream", lambda blob: blob)
 
-    _prune_presence(ch)
 
+@require_GET
+def captions_vtt(request, video_id: int):
+    """
+    /api/freestyle/video/<id>/captions.vtt[?v=<version>]
+
+    WebVTT derived from captions.bin, for <track> elements and native players.
+    """
+    return _compiled_captions(request, video_id, "vtt", "text/vtt; charset=utf-8", captions_bin.to_vtt)
+
+
+@require_GET
+def chat_archive_index_json(request, channel: str):
+    """
+    /api/freestyle/channel/<channel>/chat/archive/index.json
+
+    Days whose chat has moved to the archive (chat_archive.py).
+    """
+    ch = _get_channel(request, channel_slug=channel)
+    if not ch:
+        return JsonResponse({"ok": False, "error": "no channel"}, status=404)
+    days = [d.isoformat() for d in chat_archive.days(ch.id)]
+    return JsonResponse({"ok": True, "channel": ch.slug, "days": days})
+
+
+@require_GET
+def chat_archive_day_json(request, channel: str, day: str):
+    """
+    /api/freestyle/channel/<channel>/chat/archive/<YYYY-MM-DD>.json?after_id=0&limit=200
+    """
+    ch = _get_channel(request, channel_slug=channel)
+    d = _archive_day(day)
+    if not ch or d is None:
+        return JsonResponse({"ok": False, "error": "not found"}, status=404)
+    try:
+        after_id = int(request.GET.get("after_id", "0") or 0)
+        limit = max(1, min(1000, int(request.GET.get("limit", "200") or 200)))
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "bad after_id/limit"}, status=400)
+
+    messages = chat_archive.read_day(ch.id, d, after_id=after_id, limit=limit + 1)
     return JsonResponse(
         {
             "ok": True,
             "channel": ch.slug,
-            "server_time": timezone.now().isoformat(),
-            "watching": None,
+            "day": d.isoformat(),
+            "messages": messages[:limit],
+            "more": len(messages) > limit,
         }
     )
+
+
+@require_GET
+def chat_archive_export(request, channel: str, day: str):
+    """
+    /api/freestyle/channel/<channel>/chat/archive/<YYYY-MM-DD>.jsonl.gz
+
+    The archived day as stored: gzip'd JSONL, one message per line.
+    """
+    ch = _get_channel(request, channel_slug=channel)
+    d = _archive_day(day)
+    if not ch or d is None or d not in chat_archive.parts(ch.id):
+        return JsonResponse({"ok": False, "error": "not found"}, status=404)
+    resp = StreamingHttpResponse(chat_archive.open_export(ch.id, d), content_type="application/gzip")
+    resp["Content-Disposition"] = f'attachment; filename="chat-{ch.slug}-{d.isoformat()}.jsonl.gz"'
+    return resp
+
+
+@require_GET
+def airings_json(request, channel: str | None = None):
+    """
+    /api/freestyle/channel/<channel>/airings.json?limit=50[&video_id=]
+    """
+    ch = _get_channel(request, channel_slug=channel)
+    if not ch:
+        return JsonResponse({"ok": False, "error": "no channel"}, status=404)
+
+    try:
+        limit = max(1, min(500, int(request.GET.get("limit", "50") or 50)))
+    except ValueError:
+        limit = 50
+
+    qs = VideoAiring.objects.filter(channel=ch).select_related("video")
+    video_id = request.GET.get("video_id")
+    if video_id and video_id.isdigit():
+        qs = qs.filter(video_id=int(video_id))
+
+    airings = [
+        {
+            "video_id": a.video_id,
+            "title": a.video.title,
+            "started_at": a.started_at.isoformat(),
+            "ended_at": a.ended_at.isoformat() if a.ended_at else None,
+            "peak_viewers": a.peak_viewers,
+            "avg_viewers": a.avg_viewers,
+            "unique_viewers": a.unique_viewers,
+        }
+        for a in qs[:limit]
+    ]
+    return JsonResponse({"ok": True, "channel": ch.slug, "airings": airings})
@@ -8,8 +8,11 @@ urlpatterns = [
     # Simple endpoints (what your TV page / JS likely expects)
     # -------------------------
     path("now.json", tv_api_views.now_json, name="tv_now_json"),
+    path("tick.json", tv_api_views.tick_json, name="tv_tick_json"),
     path("messages.json", tv_api_views.messages_json, name="tv_messages_json"),
     path("ping.json", tv_api_views.ping_json, name="tv_ping_json"),
+    path("live.m3u8", tv_api_views.live_m3u8, name="tv_live_m3u8"),
+    path("metrics.json", tv_api_views.metrics_json, name="tv_metrics_json"),
 
     # -------------------------
     # Pages
@@ -29,6 +32,26 @@ urlpatterns = [
         tv_api_views.now_json,
         name="api_now_json",
     ),
+    path(
+        "api/freestyle/channel/<slug:channel>/tick.json",
+        tv_api_views.tick_json,
+        name="api_tick_json",
+    ),
+    path(
+        "api/freestyle/channel/<slug:channel>/live.m3u8",
+        tv_api_views.live_m3u8,
+        name="api_live_m3u8",
+    ),
+    path(
+        "api/freestyle/channel/<slug:channel>/viewers/history.json",
+        tv_api_views.viewers_history_json,
+        name="api_viewers_history",
+    ),
+    path(
+        "api/freestyle/channel/<slug:channel>/airings.json",
+        tv_api_views.airings_json,
+        name="api_airings",
+    ),
 
     path("api/freestyle/presence/ping.json", views.presence_ping, name="presence_ping"),
     path(
@@ -41,6 +64,21 @@ urlpatterns = [
         views.chat_send,
         name="chat_send",
     ),
+    path(
+        "api/freestyle/channel/<slug:channel>/chat/archive/index.json",
+        tv_api_views.chat_archive_index_json,
+        name="chat_archive_index",
+    ),
+    path(
+        "api/freestyle/channel/<slug:channel>/chat/archive/<str:day>.jsonl.gz",
+        tv_api_views.chat_archive_export,
+        name="chat_archive_export",
+    ),
+    path(
+        "api/freestyle/channel/<slug:channel>/chat/archive/<str:day>.json",
+        tv_api_views.chat_archive_day_json,
+        name="chat_archive_day",
+    ),
 
     path(
         "api/freestyle/channel/<slug:channel>/reactions/state.json",
@@ -52,7 +90,27 @@ urlpatterns = [
         views.reaction_vote,
         name="reaction_vote",
     ),
+    path(
+        "api/freestyle/channel/<slug:channel>/reactions/heatmap.json",
+        tv_api_views.reactions_heatmap_json,
+        name="reactions_heatmap",
+    ),
 
+    path(
+        "api/freestyle/video/<int:video_id>/captions.json",
+        tv_api_views.captions_json,
+        name="captions_json",
+    ),
+    path(
+        "api/freestyle/video/<int:video_id>/captions.bin",
+        tv_api_views.captions_bin_view,
+        name="captions_bin",
+    ),
+    path(
+        "api/freestyle/video/<int:video_id>/captions.vtt",
+        tv_api_views.captions_vtt,
+        name="captions_vtt",
+    ),
     path(
         "api/freestyle/video/<int:video_id>/duration.json",
         views.save_duration_seconds,
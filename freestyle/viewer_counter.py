@@ -0,0 +1,87 @@
+# freestyle/viewer_counter.py
+"""
+Sliding-window "who pinged in the last N seconds" counter in the Django cache.
+
+Layout per scope (e.g. "channel:3"):
+  {prefix}:b:{bucket}     int   viewers whose latest ping fell in this bucket
+  {prefix}:last:{viewer}  int   bucket of that viewer's latest ping
+
+A ping moves the viewer from its previous bucket to the current one
+(incr new, decr old), so each viewer is counted once, in the bucket of its
+latest ping. The live count is the sum of the buckets inside the window:
+one get_many over window/bucket keys. Pings are O(1) cache ops and only
+use atomic incr/decr on shared keys, so concurrent workers never overwrite
+each other's updates.
+
+Needs a shared cache backend (REDIS_URL) to be shared across workers; with
+LocMem each worker only sees its own pings.
+"""
+from __future__ import annotations
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+PREFIX = "freestyle:vc"
+
+
+def window_seconds() -> int:
+    return int(getattr(settings, "PRESENCE_TTL_SECONDS", 30))
+
+
+def bucket_seconds() -> int:
+    return max(1, int(getattr(settings, "VIEWER_BUCKET_SECONDS", 1)))
+
+
+def _bucket_key(scope: str, bucket: int) -> str:
+    return f"{PREFIX}:{scope}:b:{bucket}"
+
+
+def _last_key(scope: str, viewer: str) -> str:
+    return f"{PREFIX}:{scope}:last:{viewer}"
+
+
+def _incr(key: str, timeout: int) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=timeout):
+            cache.incr(key)
+
+
+def _decr(key: str) -> None:
+    try:
+        cache.decr(key)
+    except ValueError:
+        pass  # bucket already expired: nothing to move out of
+
+
+def touch(scope: str, viewer: str, now: float | None = None) -> None:
+    """Record a ping from `viewer` in `scope`."""
+    now = time.time() if now is None else now
+    width = bucket_seconds()
+    window = window_seconds()
+    bucket = int(now) // width
+    # buckets must outlive the window so the decr on a later ping finds them
+    timeout = window + 2 * width
+
+    last_key = _last_key(scope, viewer)
+    last = cache.get(last_key)
+    if last == bucket:
+        return
+
+    cache.set(last_key, bucket, timeout=timeout)
+    _incr(_bucket_key(scope, bucket), timeout)
+    if last is not None and bucket - int(last) < -(-window // width):
+        _decr(_bucket_key(scope, int(last)))
+
+
+def count(scope: str, now: float | None = None) -> int:
+    now = time.time() if now is None else now
+    width = bucket_seconds()
+    current = int(now) // width
+    n_buckets = -(-window_seconds() // width)
+    keys = [_bucket_key(scope, b) for b in range(current - n_buckets + 1, current + 1)]
+    return max(0, sum(int(v or 0) for v in cache.get_many(keys).values()))
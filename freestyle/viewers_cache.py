@@ -1,32 +1,12 @@
 import json
-import time
+
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.core.cache import cache
-
-# Keep viewers alive if they ping within this many seconds
-TTL_SECONDS = 30
-CACHE_KEY = "freestyle_viewers_map_v1"
-
-
-def _load_map():
-    data = cache.get(CACHE_KEY) or {}
-    # data: { viewer_id: last_seen_epoch }
-    if not isinstance(data, dict):
-        data = {}
-    return data
 
+from . import viewer_counter
 
-def _save_map(m):
-    cache.set(CACHE_KEY, m, timeout=TTL_SECONDS * 3)
-
-
-def _prune(m):
-    now = time.time()
-    dead = [k for k, t in m.items() if (now - float(t)) > TTL_SECONDS]
-    for k in dead:
-        m.pop(k, None)
-    return m
+# Site-wide viewers (not per channel); see viewer_counter.py for the layout
+SCOPE = "site"
 
 
 @csrf_exempt
@@ -48,20 +28,13 @@ def viewers_ping_json(request):
     else:
         viewer_id = request.GET.get("viewer_id")
 
-    viewer_id = (viewer_id or "").strip()
+    viewer_id = str(viewer_id or "").strip()  # JSON may send a number
     if not viewer_id:
         return JsonResponse({"ok": False, "error": "missing_viewer_id"}, status=400)
 
-    m = _load_map()
-    m = _prune(m)
-    m[str(viewer_id)] = time.time()
-    _save_map(m)
-
+    viewer_counter.touch(SCOPE, viewer_id[:120])
     return JsonResponse({"ok": True})
 
 
 def viewers_count_json(request):
-    m = _load_map()
-    m = _prune(m)
-    _save_map(m)
-    return JsonResponse({"ok": True, "count": len(m)})
+    return JsonResponse({"ok": True, "count": viewer_counter.count(SCOPE)})
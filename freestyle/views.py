@@ -2,11 +2,11 @@
 import json
 import os
 import uuid
-from datetime import timedelta
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.http import JsonResponse
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import ensure_csrf_cookie
@@ -15,15 +15,14 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 
+from . import audience, chat_buffer, chat_ingest, chat_notify, moderation, presence, reactions, timeline, vote_receipts
 from .models import (
     Channel,
     ChannelEntry,
-    ChatMessage,
-    Presence,
-    VideoReaction,
     SponsorAd,
     FreestyleVideo,
 )
+from .ratelimit import rate_limited
 
 
 # -----------------------
@@ -69,8 +68,15 @@ def submit_page(request):
 
 @login_required
 def creator_dashboard(request):
-    published = FreestyleVideo.objects.filter(uploaded_by=request.user).order_by("-id")
-    return render(request, "freestyle/creator_dashboard.html", {"published": published})
+    published = list(FreestyleVideo.objects.filter(uploaded_by=request.user).order_by("-id"))
+    uniques = audience.unique_by_video(v.id for v in published)
+    for v in published:
+        v.unique_viewers = uniques.get(v.id, 0)
+    return render(
+        request,
+        "freestyle/creator_dashboard.html",
+        {"published": published, "viewers_error_pct": round(audience.standard_error() * 100, 1)},
+    )
 
 
 @login_required
@@ -82,8 +88,7 @@ def creator_upload(request):
 # Presence / viewers
 # -----------------------
 def _active_viewers(channel: Channel) -> int:
-    cutoff = timezone.now() - timedelta(seconds=20)
-    return Presence.objects.filter(channel=channel, last_seen__gte=cutoff).count()
+    return presence.viewer_count(channel.id)
 
 
 @require_http_methods(["GET"])
@@ -94,11 +99,7 @@ def presence_ping(request):
         slug=channel_slug, defaults={"name": channel_slug.title()}
     )
 
-    Presence.objects.update_or_create(
-        channel=ch,
-        sid=sid,
-        defaults={"last_seen": timezone.now()},
-    )
+    presence.record(ch, sid)
 
     return JsonResponse({
         "ok": True,
@@ -234,6 +235,7 @@ def now_json(request, channel):
 # Duration repair endpoint
 # -----------------------
 @require_http_methods(["POST"])
+@rate_limited("save_duration")
 def save_duration_seconds(request, video_id: int):
     v = get_object_or_404(FreestyleVideo, id=video_id)
     try:
@@ -256,20 +258,26 @@ def save_duration_seconds(request, video_id: int):
 # Chat
 # -----------------------
 @require_http_methods(["GET"])
-def chat_messages(request, channel):
-    ch = get_object_or_404(Channel, slug=channel)
+async def chat_messages(request, channel):
+    """
+    ?after_id=N[&wait=25]: with wait, park until a newer message arrives or
+    the wait runs out (chat_notify.py) instead of querying on every poll.
+    """
+    ch = await aget_object_or_404(Channel, slug=channel)
     after_id = int(request.GET.get("after_id") or 0)
-    msgs = ChatMessage.objects.filter(channel=ch, id__gt=after_id).order_by("id")[:60]
-    items = [{
-        "id": m.id,
-        "username": m.username,
-        "message": m.message,
-        "created_at": m.created_at.isoformat()
-    } for m in msgs]
+    try:
+        wait = min(float(request.GET.get("wait") or 0), chat_notify.max_wait_seconds())
+    except ValueError:
+        wait = 0
+    if wait > 0 and not await chat_notify.wait_for(ch.id, after_id, wait):
+        return JsonResponse({"ok": True, "items": []})
+
+    items = await sync_to_async(chat_buffer.read)(ch.id, after_id, 60)
     return JsonResponse({"ok": True, "items": items})
 
 
 @require_http_methods(["POST"])
+@rate_limited("chat_send")
 def chat_send(request, channel):
     ch = get_object_or_404(Channel, slug=channel)
     try:
@@ -281,9 +289,14 @@ def chat_send(request, channel):
     message = (payload.get("message") or "").strip()[:280]
     if not message:
         return JsonResponse({"ok": False, "error": "empty"}, status=400)
+    message = moderation.apply(message)
+    if message is None:
+        return JsonResponse({"ok": False, "error": "blocked"}, status=400)
 
-    ChatMessage.objects.create(channel=ch, username=username, message=message)
-    return JsonResponse({"ok": True})
+    # batched insert (chat_ingest.py); seq lets the client place its message now,
+    # as stored (moderation may have masked it)
+    seq = chat_ingest.submit(ch.id, username, message)
+    return JsonResponse({"ok": True, "seq": seq, "message": message})
 
 
 # -----------------------
@@ -295,24 +308,24 @@ def reaction_state(request, channel):
     video_id = request.GET.get("video_id")
     client_id = request.headers.get("X-Client-Id") or ""
 
-    if not video_id:
+    if not (video_id and video_id.isdigit()):
         return JsonResponse({"ok": False}, status=400)
 
-    fire_count = VideoReaction.objects.filter(channel=ch, video_id=video_id, reaction="fire").count()
-    nah_count = VideoReaction.objects.filter(channel=ch, video_id=video_id, reaction="nah").count()
+    # denormalized totals (reactions.py), usually straight from the cache
+    counts = reactions.counts(ch.id, int(video_id))
 
-    voted = False
-    if client_id:
-        voted = VideoReaction.objects.filter(channel=ch, video_id=video_id, client_id=client_id).exists()
+    # signed receipt, then this worker's Bloom filter, then the DB (vote_receipts.py)
+    voted = vote_receipts.voted(request, ch.id, int(video_id), client_id)
 
     return JsonResponse({
         "ok": True,
-        "counts": {"fire": fire_count, "nah": nah_count},
+        "counts": {"fire": counts["fire"], "nah": counts["nah"]},
         "voted": voted,
     })
 
 
 @require_http_methods(["POST"])
+@rate_limited("reaction_vote")
 def reaction_vote(request, channel):
     ch = get_object_or_404(Channel, slug=channel)
     try:
@@ -322,18 +335,21 @@ def reaction_vote(request, channel):
 
     video_id = str(payload.get("video_id") or "").strip()
     reaction = str(payload.get("reaction") or "").strip()
-    client_id = str(payload.get("client_id") or "").strip()
+    client_id = str(payload.get("client_id") or "").strip()[:reactions.CLIENT_ID_MAX]
 
-    if not (video_id and reaction in ("fire", "nah") and client_id):
+    if not (video_id.isdigit() and reaction in reactions.REACTIONS and client_id):
         return JsonResponse({"ok": False, "error": "bad_request"}, status=400)
-
-    _, created = VideoReaction.objects.get_or_create(
-        channel=ch,
-        video_id=video_id,
-        client_id=client_id,
-        defaults={"reaction": reaction},
-    )
-    if not created:
-        return JsonResponse({"ok": False, "already_voted": True})
-
-    return JsonResponse({"ok": True})
+    # a vote for a missing video would only fail later, at flush time
+    get_object_or_404(FreestyleVideo, id=int(video_id))
+
+    # position in the video for the per-second timeline (timeline.py)
+    offset = timeline.offset_for(ch, int(video_id), payload.get("offset"))
+    # buffered (reactions.py): acked now, written with the next batch
+    created = reactions.record(ch.id, int(video_id), client_id, reaction, offset)
+    receipt = vote_receipts.extend(request, client_id, ch.id, int(video_id))
+    if created:
+        resp = JsonResponse({"ok": True, "receipt": receipt})
+    else:
+        resp = JsonResponse({"ok": False, "already_voted": True, "receipt": receipt})
+    vote_receipts.set_cookie(resp, request, receipt)
+    return resp
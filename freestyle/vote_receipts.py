@@ -0,0 +1,208 @@
+# freestyle/vote_receipts.py
+"""
+Answer reaction polls' `voted` without a per-poll VideoReaction lookup.
+
+1. Receipt. reaction_vote hands the client an HMAC-signed token
+   (django.core.signing, SECRET_KEY, compressed) that lists the
+   (channel, video) pairs that client id has voted on, newest
+   REACTION_RECEIPT_MAX kept. It is set as a cookie
+   (REACTION_RECEIPT_COOKIE) and returned as "receipt" for clients that
+   prefer to send it back in X-Vote-Receipt. A valid receipt for the
+   polling client id that lists the video means voted, no query.
+
+2. Bloom filter. Otherwise (no or expired receipt, another device, an
+   entry trimmed off) each worker keeps a Bloom filter of the client ids
+   that voted per (channel, video). It is built once from VideoReaction
+   and topped up incrementally (rows with a higher id) at most every
+   REACTION_BLOOM_REFRESH_SECONDS. A miss means not voted, no query.
+
+3. Only a Bloom hit (a real voter or a ~1% false positive) runs exists().
+
+VideoReaction's unique_together stays the source of truth; receipts and
+filters only ever save reads, a vote is still refused by the database.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Max
+
+from .bloom import BloomFilter
+from .models import VideoReaction
+
+
+SALT = "freestyle.vote-receipt"
+HEADER = "X-Vote-Receipt"
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+# -------------------------
+# Receipts
+# -------------------------
+def cookie_name() -> str:
+    return _setting("REACTION_RECEIPT_COOKIE", "fs_votes")
+
+
+def _max_age() -> int:
+    return int(float(_setting("REACTION_RECEIPT_DAYS", 30)) * 86400)
+
+
+def load(token: str, client_id: str) -> list[tuple[int, int]] | None:
+    """The receipt's (channel_id, video_id) pairs, or None if it isn't a valid receipt for client_id."""
+    if not token or not client_id:
+        return None
+    try:
+        data = signing.loads(token, salt=SALT, max_age=_max_age())
+    except signing.BadSignature:
+        return None
+    if not isinstance(data, dict) or data.get("c") != client_id:
+        return None
+    return [(int(ch), int(vid)) for ch, vid in data.get("v", ())]
+
+
+def issue(client_id: str, voted: list[tuple[int, int]]) -> str:
+    keep = int(_setting("REACTION_RECEIPT_MAX", 200))
+    return signing.dumps({"c": client_id, "v": [list(p) for p in voted[-keep:]]}, salt=SALT, compress=True)
+
+
+def from_request(request) -> str:
+    return request.headers.get(HEADER) or request.COOKIES.get(cookie_name(), "")
+
+
+def extend(request, client_id: str, channel_id: int, video_id: int) -> str:
+    """The request's receipt plus this vote, re-signed."""
+    voted = load(from_request(request), client_id) or []
+    pair = (channel_id, video_id)
+    if pair in voted:
+        voted.remove(pair)
+    voted.append(pair)
+    return issue(client_id, voted)
+
+
+def set_cookie(response, request, token: str) -> None:
+    response.set_cookie(
+        cookie_name(),
+        token,
+        max_age=_max_age(),
+        httponly=True,
+        samesite="Lax",
+        secure=request.is_secure(),
+    )
+
+
+# -------------------------
+# Bloom fallback
+# -------------------------
+@dataclass
+class _Voters:
+    bloom: BloomFilter
+    last_id: int
+    refreshed_at: float
+
+
+class VoterIndex:
+    """Per-worker Bloom filters of voter client ids, LRU over (channel, video)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._videos: OrderedDict[tuple[int, int], _Voters] = OrderedDict()
+
+    def _build(self, channel_id: int, video_id: int) -> _Voters:
+        qs = VideoReaction.objects.filter(channel_id=channel_id, video_id=video_id)
+        last_id = qs.aggregate(m=Max("id"))["m"] or 0
+        n = qs.filter(id__lte=last_id).count()
+        bloom = BloomFilter(max(1024, 2 * n), float(_setting("REACTION_BLOOM_ERROR_RATE", 0.01)))
+        for cid in qs.filter(id__lte=last_id).values_list("client_id", flat=True).iterator(chunk_size=5000):
+            bloom.add(cid)
+        return _Voters(bloom, last_id, time.monotonic())
+
+    def _refresh(self, channel_id: int, video_id: int, voters: _Voters) -> _Voters:
+        rows = list(
+            VideoReaction.objects.filter(channel_id=channel_id, video_id=video_id, id__gt=voters.last_id)
+            .order_by("id")
+            .values_list("id", "client_id")
+        )
+        if voters.bloom.count + len(rows) > voters.bloom.capacity:
+            return self._build(channel_id, video_id)
+        for rid, cid in rows:
+            voters.bloom.add(cid)
+            voters.last_id = rid
+        voters.refreshed_at = time.monotonic()
+        return voters
+
+    def _get(self, channel_id: int, video_id: int) -> _Voters:
+        key = (channel_id, video_id)
+        with self._lock:
+            voters = self._videos.get(key)
+            if voters is not None:
+                self._videos.move_to_end(key)
+        refresh = float(_setting("REACTION_BLOOM_REFRESH_SECONDS", 5))
+        if voters is None:
+            voters = self._build(channel_id, video_id)
+        elif time.monotonic() - voters.refreshed_at >= refresh:
+            voters = self._refresh(channel_id, video_id, voters)
+        else:
+            return voters
+        with self._lock:
+            self._videos[key] = voters
+            self._videos.move_to_end(key)
+            while len(self._videos) > int(_setting("REACTION_BLOOM_VIDEOS", 256)):
+                self._videos.popitem(last=False)
+        return voters
+
+    def maybe_voted(self, channel_id: int, video_id: int, client_id: str) -> bool:
+        return client_id in self._get(channel_id, video_id).bloom
+
+    def note(self, channel_id: int, video_id: int, client_id: str) -> None:
+        """A vote taken by this worker: visible to its filter before the next refresh."""
+        with self._lock:
+            voters = self._videos.get((channel_id, video_id))
+        if voters is not None and not voters.bloom.full:
+            voters.bloom.add(client_id)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._videos.clear()
+
+
+index = VoterIndex()
+
+
+# -------------------------
+# API
+# -------------------------
+_stats_lock = threading.Lock()
+_stats = {"receipt": 0, "bloom": 0, "db": 0}
+
+
+def _count(source: str) -> None:
+    with _stats_lock:
+        _stats[source] += 1
+
+
+def stats() -> dict[str, int]:
+    """How `voted` was answered in this worker (metrics.json)."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def voted(request, channel_id: int, video_id: int, client_id: str) -> bool:
+    if not client_id:
+        return False
+    receipt = load(from_request(request), client_id)
+    if receipt and (channel_id, video_id) in receipt:
+        _count("receipt")
+        return True
+    if not index.maybe_voted(channel_id, video_id, client_id):
+        _count("bloom")
+        return False
+    _count("db")
+    return VideoReaction.objects.filter(channel_id=channel_id, video_id=video_id, client_id=client_id).exists()
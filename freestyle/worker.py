@@ -0,0 +1,115 @@
+# freestyle/worker.py
+"""
+Tiny periodic task scheduler for `manage.py freestyle_worker`.
+
+Tasks register with @task(every=seconds). Each tick the scheduler runs the
+tasks that are due; an exclusive task (the default) first takes its DB lease
+(leases.py), so with several worker nodes exactly one of them runs it. The
+holder renews the lease every run; if it dies the lease lapses and another
+node picks the task up.
+
+Task bodies live in tasks.py.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from django.db import close_old_connections
+
+from . import leases
+
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class Task:
+    name: str
+    every: float
+    fn: Callable[[], object]
+    exclusive: bool = True
+    next_run: float = 0.0
+
+    @property
+    def lease_name(self) -> str:
+        return f"task:{self.name}"
+
+    @property
+    def lease_ttl(self) -> float:
+        # outlive one period comfortably so the holder renews before it lapses
+        return self.every * 1.5 + 30
+
+
+_registry: dict[str, Task] = {}
+
+
+def task(every: float, name: str | None = None, exclusive: bool = True):
+    def decorator(fn):
+        key = name or fn.__name__
+        _registry[key] = Task(key, float(every), fn, exclusive)
+        return fn
+    return decorator
+
+
+def registered() -> dict[str, Task]:
+    from . import tasks  # noqa: F401  (registers on import)
+    return dict(_registry)
+
+
+@dataclass
+class RunResult:
+    name: str
+    ok: bool
+    result: object
+    seconds: float
+
+
+class Scheduler:
+    def __init__(self, tasks: list[Task], owner: str | None = None):
+        self.tasks = tasks
+        self.owner = owner or leases.make_owner_id()
+
+    def run_pending(self, now: float | None = None) -> list[RunResult]:
+        now = time.time() if now is None else now
+        out = []
+        for t in self.tasks:
+            if now < t.next_run:
+                continue
+            t.next_run = now + t.every
+
+            close_old_connections()
+            if t.exclusive and not leases.acquire(t.lease_name, self.owner, t.lease_ttl):
+                continue
+
+            started = time.monotonic()
+            try:
+                result = t.fn()
+                ok = True
+            except Exception as exc:
+                log.exception("worker task %s failed", t.name)
+                result = exc
+                ok = False
+            if t.exclusive:
+                leases.mark_run(t.lease_name, self.owner)
+            out.append(RunResult(t.name, ok, result, time.monotonic() - started))
+        return out
+
+    def run_forever(self, stop: threading.Event, tick: float = 1.0, on_result=None) -> None:
+        try:
+            while not stop.is_set():
+                for r in self.run_pending():
+                    if on_result:
+                        on_result(r)
+                stop.wait(tick)
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        close_old_connections()
+        for t in self.tasks:
+            if t.exclusive:
+                leases.release(t.lease_name, self.owner)
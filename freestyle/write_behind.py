@@ -0,0 +1,164 @@
+# freestyle/write_behind.py
+"""
+Per-process write-behind buffer.
+
+Hot endpoints put() small keyed records here instead of writing the DB
+inline. Records with the same key coalesce (a merge function decides how),
+and a daemon thread hands the whole batch to `flush_fn` every `interval`
+seconds, or sooner once `max_items` keys are pending. Whatever is left is
+flushed at interpreter exit.
+
+If flush_fn raises, the batch is merged back in front of anything that
+arrived meanwhile and retried on the next tick.
+
+`on_swap`, if given, runs under the buffer lock at the moment a batch is
+taken, i.e. atomically with respect to put()/update(); chat_ingest uses it
+to rotate its journal in step with the batches.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+from typing import Callable, Hashable
+
+
+log = logging.getLogger(__name__)
+
+_buffers: list["WriteBehindBuffer"] = []
+
+
+def _keep_newer(old, new):
+    return new
+
+
+class WriteBehindBuffer:
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[dict], None],
+        interval: float | Callable[[], float] = 5.0,
+        max_items: int = 5000,
+        merge: Callable[[object, object], object] = _keep_newer,
+        on_swap: Callable[[dict], None] | None = None,
+    ):
+        self.name = name
+        self.flush_fn = flush_fn
+        self._interval = interval
+        self.max_items = max_items
+        self.merge = merge
+        self.on_swap = on_swap
+
+        self._pending: dict[Hashable, object] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid = None
+        _buffers.append(self)
+
+    @property
+    def interval(self) -> float:
+        return float(self._interval() if callable(self._interval) else self._interval)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, key: Hashable, value) -> None:
+        self._ensure_thread()
+        with self._lock:
+            if key in self._pending:
+                value = self.merge(self._pending[key], value)
+            self._pending[key] = value
+            full = len(self._pending) >= self.max_items
+        if full:
+            self._wake.set()
+
+    def add(self, key: Hashable, value) -> bool:
+        """put() unless `key` is already pending; False if it was."""
+        self._ensure_thread()
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending[key] = value
+            full = len(self._pending) >= self.max_items
+        if full:
+            self._wake.set()
+        return True
+
+    def update(self, key: Hashable, fn: Callable[[object], None], default: Callable[[], object]) -> None:
+        """Mutate the pending value for `key` in place (created by default() first)."""
+        self._ensure_thread()
+        with self._lock:
+            value = self._pending.get(key)
+            if value is None:
+                value = self._pending[key] = default()
+            fn(value)
+            full = len(self._pending) >= self.max_items
+        if full:
+            self._wake.set()
+
+    def pending(self) -> dict:
+        """Snapshot of what hasn't been flushed yet (for read-your-writes)."""
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> int:
+        # one flush at a time, so a retry can't reorder with a newer batch
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                if batch and self.on_swap:
+                    self.on_swap(batch)
+            if not batch:
+                return 0
+            try:
+                self.flush_fn(batch)
+            except Exception:
+                log.exception("write-behind %s: flush of %d records failed, will retry", self.name, len(batch))
+                with self._lock:
+                    for key, value in self._pending.items():
+                        batch[key] = self.merge(batch[key], value) if key in batch else value
+                    self._pending = batch
+                return 0
+            return len(batch)
+
+    # -------------------------
+    # Flusher thread
+    # -------------------------
+    def _ensure_thread(self) -> None:
+        # started lazily, and again after a fork (gunicorn preload)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=f"write-behind:{self.name}", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._flush_in_thread()
+
+    def _flush_in_thread(self) -> None:
+        from django.db import close_old_connections
+
+        close_old_connections()
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+
+@atexit.register
+def _flush_all() -> None:
+    for buf in _buffers:
+        if buf._pending and buf._pid == os.getpid():
+            try:
+                buf.flush()
+            except Exception:
+                log.exception("write-behind %s: final flush failed", buf.name)
@@ -0,0 +1,146 @@
+# freestyle/ws_chat.py
+"""
+WebSocket chat gateway: ws[s]://<host>/ws/freestyle/channel/<slug>/chat/
+
+Plain ASGI (config/asgi.py routes websocket scopes here), no extra
+framework. Protocol, JSON text frames:
+
+  client -> {"type": "hello", "after_id": N}        history after N (ring buffer)
+  client -> {"type": "send", "username": .., "message": ..}
+  server -> {"type": "messages", "items": [...]}    history / live batches
+  server -> {"type": "ack", "seq": N, "message": ..} provisional seq, text as stored
+  server -> {"type": "error", "error": "..", ["retry_after": s]}
+
+Connect with ?cid=<client id> so sends share the client's rate limit.
+
+Sends go through moderation and chat_ingest like chat_send; live batches arrive through
+the per-worker hub (chat_hub.py) once committed. chat/messages.json and
+chat/send.json stay as the fallback when a socket can't be opened.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import re
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http.request import split_domain_port, validate_host
+
+from . import chat_buffer, chat_ingest, moderation, ratelimit
+from .chat_hub import hub
+from .models import Channel
+
+
+log = logging.getLogger(__name__)
+
+PATH = re.compile(r"^/ws/freestyle/channel/(?P<channel>[-a-zA-Z0-9_]+)/chat/?$")
+HISTORY_LIMIT = 60
+
+
+def _origin_ok(scope) -> bool:
+    headers = dict(scope.get("headers") or [])
+    origin = headers.get(b"origin", b"").decode("latin-1")
+    if not origin:
+        return True  # non-browser client
+    host = origin.split("://", 1)[-1]
+    domain, _ = split_domain_port(host)
+    allowed = settings.ALLOWED_HOSTS or (["localhost", "127.0.0.1", "[::1]"] if settings.DEBUG else [])
+    return bool(domain) and validate_host(domain, allowed)
+
+
+def _channel_id(slug: str) -> int | None:
+    return Channel.objects.filter(slug=slug).values_list("id", flat=True).first()
+
+
+def _client(scope) -> tuple[str, str]:
+    """(client id from ?cid=, IP) for rate limiting, like ratelimit.client_key/client_ip."""
+    query = parse_qs((scope.get("query_string") or b"").decode("latin-1"))
+    client = (query.get("cid") or [""])[0].strip()[:120]
+    headers = dict(scope.get("headers") or [])
+    meta = {"HTTP_X_FORWARDED_FOR": headers.get(b"x-forwarded-for", b"").decode("latin-1")}
+    meta["REMOTE_ADDR"] = (scope.get("client") or ("", 0))[0]
+    return client, ratelimit.client_ip(SimpleNamespace(META=meta))
+
+
+def _send(channel_id: int, payload: dict, client: tuple[str, str]) -> dict:
+    wait = ratelimit.check("chat_send", *client)
+    if wait:
+        return {"type": "error", "error": "rate_limited", "retry_after": max(1, math.ceil(wait))}
+    username = str(payload.get("username") or "Guest").strip()[:60]
+    message = str(payload.get("message") or "").strip()[:280]
+    if not message:
+        return {"type": "error", "error": "empty"}
+    message = moderation.apply(message)
+    if message is None:
+        return {"type": "error", "error": "blocked"}
+    return {"type": "ack", "seq": chat_ingest.submit(channel_id, username, message), "message": message}
+
+
+async def application(scope, receive, send):
+    match = PATH.match(scope.get("path", ""))
+    event = await receive()
+    if event["type"] != "websocket.connect":
+        return
+    if not match or not _origin_ok(scope):
+        await send({"type": "websocket.close", "code": 4403})
+        return
+    channel_id = await sync_to_async(_channel_id)(match["channel"])
+    if channel_id is None:
+        await send({"type": "websocket.close", "code": 4404})
+        return
+
+    await send({"type": "websocket.accept"})
+    sub = hub.subscribe(channel_id)
+    client = _client(scope)
+
+    async def emit(payload: dict) -> None:
+        await send({"type": "websocket.send", "text": json.dumps(payload)})
+
+    async def reader():
+        while True:
+            event = await receive()
+            if event["type"] == "websocket.disconnect":
+                return
+            if event["type"] != "websocket.receive":
+                continue
+            try:
+                payload = json.loads(event.get("text") or event.get("bytes") or "{}")
+            except ValueError:
+                await emit({"type": "error", "error": "bad json"})
+                continue
+            if not isinstance(payload, dict):
+                await emit({"type": "error", "error": "bad message"})
+                continue
+            kind = payload.get("type")
+            if kind == "hello":
+                try:
+                    after_id = int(payload.get("after_id") or 0)
+                except (TypeError, ValueError):
+                    await emit({"type": "error", "error": "bad after_id"})
+                    continue
+                items = await sync_to_async(chat_buffer.read)(channel_id, after_id, HISTORY_LIMIT)
+                await emit({"type": "messages", "items": items})
+            elif kind == "send":
+                await emit(await sync_to_async(_send)(channel_id, payload, client))
+
+    async def writer():
+        while True:
+            text = await sub.queue.get()
+            if text is None:  # fell too far behind; client reconnects/polls
+                await send({"type": "websocket.close", "code": 4408})
+                return
+            await send({"type": "websocket.send", "text": text})
+
+    tasks = [asyncio.ensure_future(reader()), asyncio.ensure_future(writer())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        hub.unsubscribe(sub)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
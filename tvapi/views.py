@@ -3,6 +3,7 @@ from django.http import JsonResponse, HttpResponseBadRequest
 from django.views.decorators.http import require_GET, require_POST
 from django.utils import timezone
 from django.db.models import Count
+from freestyle import tv_api_views as freestyle_tv_api
 from freestyle.models import Channel, ChannelEntry, FreestyleVideo, ChatMessage
 
 
@@ -112,10 +113,9 @@ def now_json(request, channel_slug: str):
         return JsonResponse({"ok": False, "error": str(e)}, status=200)
 
 
-@require_GET
 def captions_json(request, video_id: int):
-    # You can upgrade later; for now return empty words so frontend never breaks
-    return JsonResponse({"ok": True, "video_id": video_id, "words": []})
+    # windowed ?from=&to= slices with ETags (freestyle/captions.py)
+    return freestyle_tv_api.captions_json(request, video_id)
 
 
 @require_GET